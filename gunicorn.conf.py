@@ -5,6 +5,7 @@ Optimized for production deployment on Render
 
 import multiprocessing
 import os
+import sys
 
 # Server socket
 bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
@@ -13,9 +14,43 @@ backlog = 2048
 # Worker processes
 # On Render's free tier, limit to 2 workers to avoid memory issues
 # On paid tiers, use CPU count
+# Compare worker counts/classes under realistic traffic with `manage.py load_test`
 workers = int(os.environ.get('GUNICORN_WORKERS', '2'))
 worker_class = 'sync'
 worker_connections = 1000
+
+# Threads per worker; above 1 switches to gthread workers, so a worker busy with
+# a report (see HEAVY_REQUEST_SLOTS in settings) still serves kiosk/POS requests
+threads = int(os.environ.get('GUNICORN_THREADS', '1'))
+if threads > 1:
+    worker_class = 'gthread'
+
+# Server profile
+# "wsgi" (default): sync workers, one request at a time per worker.
+# "asgi": uvicorn workers serving sales_inventory/asgi.py, so async views
+# (kiosk home/status/cart details, sales data, cashier ingredients) and the
+# order event streams wait on the database without holding a worker. Start
+# without an app argument so the app below is used:
+#   GUNICORN_PROFILE=asgi gunicorn -c gunicorn.conf.py
+profile = os.environ.get('GUNICORN_PROFILE', 'wsgi')
+if profile == 'asgi':
+    wsgi_app = 'sales_inventory_system.sales_inventory.asgi:application'
+    worker_class = 'uvicorn_worker.UvicornWorker'
+    # Requests run their sync ORM work in per-request threads under ASGI, so
+    # persistent connections would pile up; without DB_POOL open one per request
+    os.environ.setdefault('DB_CONN_MAX_AGE', '0')
+else:
+    wsgi_app = 'sales_inventory_system.sales_inventory.wsgi:application'
+
+# Database connection pool per worker (PostgreSQL, DB_POOL in settings): a sync
+# worker needs one connection per request in flight plus one for the background
+# scheduler; ASGI workers run many requests at once
+if profile == 'asgi':
+    db_pool_size = 8
+else:
+    db_pool_size = threads + 1
+os.environ.setdefault('DB_POOL_MAX_SIZE', str(db_pool_size))
+
 max_requests = 1000  # Restart workers after 1000 requests to prevent memory leaks
 max_requests_jitter = 50  # Add randomness to prevent all workers restarting at once
 timeout = 120  # Increased from default 30s for complex forecasting operations
@@ -44,3 +79,37 @@ certfile = None
 
 # Performance tuning
 preload_app = True  # Load application code before forking workers (saves memory)
+
+
+# Background jobs
+# Expire stale PENDING orders every N seconds from each worker instead of on
+# every cashier request (set ORDER_EXPIRY_INTERVAL=0 to disable, e.g. when
+# running `manage.py expire_pending_orders --interval 60` separately)
+order_expiry_interval = int(os.environ.get('ORDER_EXPIRY_INTERVAL', '60'))
+
+
+def on_starting(server):
+    """Refuse an app given on the command line that doesn't match the profile"""
+    # A command-line app overrides wsgi_app, e.g. running UvicornWorker
+    # against the WSGI callable when GUNICORN_PROFILE=asgi
+    app_uri = getattr(server.app, 'app_uri', None)
+    if app_uri and app_uri != wsgi_app:
+        server.log.error(
+            f"GUNICORN_PROFILE={profile} serves {wsgi_app}, but {app_uri} was given on the "
+            f"command line; start with `gunicorn --config gunicorn.conf.py` and no app argument"
+        )
+        sys.exit(1)
+
+
+def post_fork(server, worker):
+    """Drop database pools inherited from the preloaded master"""
+    from sales_inventory_system.sales_inventory.db_pool import close_inherited_pools
+    close_inherited_pools()
+
+
+def post_worker_init(worker):
+    """Start per-worker background schedulers once the app is loaded"""
+    from sales_inventory_system.orders.scheduler import start_expiry_scheduler
+    from sales_inventory_system.sales_inventory.db_pool import start_stats_publisher
+    start_expiry_scheduler(order_expiry_interval)
+    start_stats_publisher()
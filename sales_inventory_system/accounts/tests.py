@@ -1,3 +1,46 @@
-from django.test import TestCase
+from django.urls import reverse
 
-# Create your tests here.
+from sales_inventory_system.accounts.models import User
+from sales_inventory_system.sales_inventory.testing import QueryBudgetTestCase
+
+
+class AccountQueryBudgetTests(QueryBudgetTestCase):
+    """Login page and user management"""
+
+    def setUp(self):
+        super().setUp()
+        self.login(self.admin)
+
+    def archive_cashier(self, size=None):
+        self.cashier.is_archived = True
+        self.cashier.save()
+
+    def test_login_page(self):
+        self.client.logout()
+        self.assertQueryBudget(0, lambda: self.client.get(reverse('accounts:login')))
+
+    def test_user_list(self):
+        self.assertQueryBudget(3, lambda: self.client.get(reverse('accounts:user_list')))
+
+    def test_user_list_ajax(self):
+        self.assertQueryBudget(5, lambda: self.client.get(
+            reverse('accounts:user_list'), HTTP_X_REQUESTED_WITH='XMLHttpRequest'
+        ))
+
+    def test_user_create_form(self):
+        self.assertQueryBudget(2, lambda: self.client.get(reverse('accounts:user_create')))
+
+    def test_user_edit_form(self):
+        self.assertQueryBudget(3, lambda: self.client.get(reverse('accounts:user_edit', args=[self.cashier.pk])))
+
+    def test_user_archive(self):
+        self.assertQueryBudget(4, lambda: self.client.post(
+            reverse('accounts:user_archive', args=[User.objects.filter(is_archived=False).last().pk])
+        ), status=302)
+
+    def test_user_unarchive(self):
+        self.assertQueryBudget(6, lambda: self.client.post(reverse('accounts:user_unarchive', args=[self.cashier.pk])),
+                               setup=self.archive_cashier, status=302)
+
+    def test_user_audit_trail(self):
+        self.assertQueryBudget(5, lambda: self.client.get(reverse('accounts:user_audit_trail', args=[self.admin.pk])))
@@ -5,9 +5,11 @@ from django.contrib import messages
 from django.urls import reverse
 from django.http import JsonResponse
 from django.core.paginator import Paginator
+from django.db import transaction
 from django.db.models import Q
 from .models import User
-from sales_inventory_system.system.models import AuditTrail
+from sales_inventory_system.system.models import AuditTrail, Archive
+from sales_inventory_system.sales_inventory.pagination import KeysetPaginator, approximate_count
 
 def login_view(request):
     """Handle user login"""
@@ -227,8 +229,12 @@ def user_archive(request, pk):
         messages.error(request, 'Cannot archive your own account.')
         return redirect('accounts:user_list')
 
-    user.is_archived = not user.is_archived
-    user.save()
+    # Saving adds or drops the archive entry (system.signals)
+    with transaction.atomic():
+        user.is_archived = not user.is_archived
+        user.save()
+        if user.is_archived:
+            Archive.record_archiver(user, request.user)
 
     action = 'archived' if user.is_archived else 'restored'
     messages.success(request, f'User {user.username} {action} successfully!')
@@ -242,17 +248,21 @@ def user_audit_trail(request, pk):
     user = get_object_or_404(User, pk=pk)
 
     # Get audit logs for this user
-    audit_logs = AuditTrail.objects.filter(user=user).select_related('user').order_by('-created_at')
+    audit_logs = AuditTrail.objects.filter(user=user).select_related('user')
 
-    # Pagination
-    paginator = Paginator(audit_logs, 50)  # 50 logs per page
-    page_number = request.GET.get('page', 1)
-    page_obj = paginator.get_page(page_number)
+    # Keyset pagination - avoids OFFSET scans for users with long histories
+    paginator = KeysetPaginator(audit_logs, 50, ordering=('-created_at', '-id'))  # 50 logs per page
+    page_obj = paginator.get_page(request.GET.get('cursor'), request.GET.get('direction', 'next'))
+
+    total_actions, total_actions_exact = approximate_count(audit_logs, cap=10000)
 
     context = {
         'user': user,
         'audit_logs': page_obj,
-        'total_actions': paginator.count,
+        'page_obj': page_obj,
+        'is_paginated': page_obj.has_next() or page_obj.has_previous(),
+        'total_actions': total_actions,
+        'total_actions_exact': total_actions_exact,
     }
     return render(request, 'accounts/user_audit_trail.html', context)
 
@@ -268,8 +278,10 @@ def user_archive(request, pk):
         messages.error(request, 'You cannot archive yourself!')
         return redirect('accounts:user_list')
 
-    user.is_archived = True
-    user.save()
+    with transaction.atomic():
+        user.is_archived = True
+        user.save()
+        Archive.record_archiver(user, request.user)
 
     # Create audit log
     AuditTrail.objects.create(
@@ -291,6 +303,7 @@ def user_unarchive(request, pk):
     """Restore an archived user/staff member"""
     user = get_object_or_404(User, pk=pk, is_archived=True)
 
+    # Saving drops the archive entry (system.signals)
     user.is_archived = False
     user.save()
 
@@ -305,4 +318,4 @@ def user_unarchive(request, pk):
     )
 
     messages.success(request, f'User "{user.username}" restored successfully!')
-    return redirect('accounts:archived_list')
+    return redirect('accounts:user_list')
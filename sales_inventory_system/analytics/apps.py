@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class AnalyticsConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "sales_inventory_system.analytics"
+
+    def ready(self):
+        """Register signals when app is ready"""
+        import sales_inventory_system.analytics.signals  # noqa
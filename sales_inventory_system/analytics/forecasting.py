@@ -11,6 +11,7 @@ from django.db.models import Sum
 from django.db.models.functions import TruncDate
 from statsmodels.tsa.holtwinters import ExponentialSmoothing
 from sales_inventory_system.orders.models import Payment
+from sales_inventory_system.sales_inventory.dates import day_range
 from decimal import Decimal
 from scipy import stats
 
@@ -94,10 +95,11 @@ def prepare_sales_data(days=60):
     start_date = end_date - timedelta(days=days)
 
     # Get daily revenue data using optimized query
+    range_start, range_end = day_range(start_date, end_date)
     daily_payments = Payment.objects.filter(
         status='SUCCESS',
-        created_at__date__gte=start_date,
-        created_at__date__lte=end_date
+        created_at__gte=range_start,
+        created_at__lt=range_end
     ).values('created_at__date').annotate(
         total=Sum('amount')
     ).order_by('created_at__date')
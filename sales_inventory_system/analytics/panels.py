@@ -0,0 +1,138 @@
+"""
+Analytics dashboard panels, each cached and invalidated on its own.
+
+The dashboard used to be one cache_page entry: any miss recomputed every
+aggregate, and the cached HTML was keyed by URL only. Each panel below is
+now a plain-data value cached under its own key family (TTL from
+settings.CACHE_TTLS, see sales_inventory.caching) and dropped by the
+signals in analytics.signals when its source data changes:
+
+    revenue        <- successful payments
+    orders         <- orders
+    top_products   <- order items, products
+    low_stock      <- products, ingredients, recipes
+    recent_orders  <- orders, payments
+
+The page itself is rendered per request, so nothing user-specific is cached.
+"""
+
+from datetime import timedelta
+from decimal import Decimal
+from django.db.models import Sum, Count, Case, When, Value, DecimalField, F, Q
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from sales_inventory_system.orders.models import Order, Payment, OrderItem
+from sales_inventory_system.products.models import Product
+from sales_inventory_system.sales_inventory.caching import get_or_compute, invalidate
+
+
+def _date_ranges():
+    today = timezone.now().date()
+    today_start = timezone.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    return today, today_start, today - timedelta(days=7), today - timedelta(days=30)
+
+
+def revenue_panel():
+    """Total, today, week and month revenue from successful payments (one query)"""
+    today, today_start, week_ago, month_ago = _date_ranges()
+
+    def window(condition):
+        return Coalesce(
+            Sum(Case(When(condition, then='amount'), default=Value(0), output_field=DecimalField())),
+            Decimal('0.00')
+        )
+
+    return Payment.objects.filter(status='SUCCESS').aggregate(
+        total_revenue=Coalesce(Sum('amount'), Decimal('0.00')),
+        today_revenue=window(Q(created_at__gte=today_start)),
+        week_revenue=window(Q(created_at__date__gte=week_ago)),
+        month_revenue=window(Q(created_at__date__gte=month_ago)),
+    )
+
+
+def orders_panel():
+    """Order counts by period and status (one query)"""
+    today, today_start, week_ago, month_ago = _date_ranges()
+    return Order.objects.aggregate(
+        total_orders=Count('id'),
+        today_orders=Count(Case(When(created_at__gte=today_start, then=1))),
+        week_orders=Count(Case(When(created_at__date__gte=week_ago, then=1))),
+        pending_orders=Count(Case(When(status='PENDING', then=1))),
+        in_progress_orders=Count(Case(When(status='IN_PROGRESS', then=1))),
+        completed_orders=Count(Case(When(status='FINISHED', then=1))),
+    )
+
+
+def top_products_panel():
+    """Ten best-selling products with their bar widths relative to the best seller"""
+    top_products = list(OrderItem.objects.values(
+        'product__name',
+        'product__price'
+    ).annotate(
+        total_quantity=Sum('quantity'),
+        total_revenue=Sum('subtotal')
+    ).order_by('-total_quantity')[:10])
+
+    # The first row is the overall best seller
+    max_product_quantity = int(top_products[0]['total_quantity'] or 0) if top_products else 0
+    max_product_quantity = max_product_quantity or 1
+
+    for product in top_products:
+        product['width_percent'] = int(int(product['total_quantity'] or 0) / max_product_quantity * 100)
+
+    return {'top_products': top_products, 'max_product_quantity': max_product_quantity}
+
+
+def low_stock_panel():
+    """Ten products with the lowest producible stock under their threshold"""
+    products = Product.objects.filter(
+        is_archived=False, producible_units__lt=F('threshold')
+    ).order_by('producible_units', 'name').values('name', 'producible_units', 'threshold')[:10]
+
+    return [
+        {'name': product['name'], 'calculated_stock': product['producible_units'], 'threshold': product['threshold']}
+        for product in products
+    ]
+
+
+def recent_orders_panel():
+    """Ten newest orders with their payment amount"""
+    rows = Order.objects.order_by('-created_at').values(
+        'order_number', 'customer_name', 'status', 'created_at', 'payment__amount'
+    )[:10]
+    return [
+        {
+            'order_number': row['order_number'],
+            'customer_name': row['customer_name'],
+            'status': row['status'],
+            'created_at': row['created_at'],
+            'payment': {'amount': row['payment__amount']} if row['payment__amount'] is not None else None,
+        }
+        for row in rows
+    ]
+
+
+PANELS = {
+    'revenue': revenue_panel,
+    'orders': orders_panel,
+    'top_products': top_products_panel,
+    'low_stock': low_stock_panel,
+    'recent_orders': recent_orders_panel,
+}
+
+
+def _panel_key():
+    # Period figures ("today", "this week") roll over with the date
+    return timezone.now().date().isoformat()
+
+
+def get_panel(name):
+    """Cached value of a dashboard panel"""
+    return get_or_compute(f'dashboard_{name}', _panel_key(), PANELS[name])
+
+
+def invalidate_panels(*names):
+    """Drop cached panels so the next dashboard view recomputes them"""
+    key = _panel_key()
+    for name in names:
+        invalidate(f'dashboard_{name}', key)
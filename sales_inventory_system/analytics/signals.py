@@ -0,0 +1,48 @@
+"""
+Signals that drop cached analytics dashboard panels when their data changes
+"""
+
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from sales_inventory_system.orders.models import Order, OrderItem, Payment
+from sales_inventory_system.products.models import Product, Ingredient, RecipeItem, RecipeIngredient
+from .panels import invalidate_panels
+
+
+def invalidate_on_commit(*names):
+    """Invalidate once the surrounding transaction commits, so readers see the new data"""
+    transaction.on_commit(lambda: invalidate_panels(*names))
+
+
+@receiver(post_save, sender=Payment)
+def payment_saved(sender, instance, **kwargs):
+    if instance.status == 'SUCCESS':
+        invalidate_on_commit('revenue', 'recent_orders')
+
+
+@receiver(post_delete, sender=Payment)
+def payment_deleted(sender, instance, **kwargs):
+    invalidate_on_commit('revenue', 'recent_orders')
+
+
+@receiver([post_save, post_delete], sender=Order)
+def order_changed(sender, instance, **kwargs):
+    invalidate_on_commit('orders', 'recent_orders')
+
+
+@receiver([post_save, post_delete], sender=OrderItem)
+def order_item_changed(sender, instance, **kwargs):
+    invalidate_on_commit('top_products')
+
+
+@receiver([post_save, post_delete], sender=Product)
+def product_changed(sender, instance, **kwargs):
+    invalidate_on_commit('low_stock', 'top_products')
+
+
+@receiver([post_save, post_delete], sender=Ingredient)
+@receiver([post_save, post_delete], sender=RecipeItem)
+@receiver([post_save, post_delete], sender=RecipeIngredient)
+def stock_changed(sender, instance, **kwargs):
+    invalidate_on_commit('low_stock')
@@ -1,3 +1,114 @@
-from django.test import TestCase
+from datetime import datetime, timezone as dt_timezone
+from decimal import Decimal
+from unittest import mock
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
 
-# Create your tests here.
+from sales_inventory_system.analytics import panels
+from sales_inventory_system.orders.models import Order, Payment
+from sales_inventory_system.sales_inventory.testing import TEST_CACHES, QueryBudgetTestCase
+
+
+class AnalyticsQueryBudgetTests(QueryBudgetTestCase):
+    """Dashboards, chart data and forecast, measured with a cold cache"""
+
+    def setUp(self):
+        super().setUp()
+        self.login(self.admin)
+
+    def test_admin_dashboard(self):
+        self.assertQueryBudget(11, lambda: self.client.get(reverse('admin_dashboard')))
+
+    def test_analytics_dashboard(self):
+        self.assertQueryBudget(10, lambda: self.client.get(reverse('analytics:dashboard')))
+
+    def test_sales_data_day(self):
+        self.assertQueryBudget(3, lambda: self.client.get(reverse('analytics:sales_data_api'), {'period': 'day'}))
+
+    def test_sales_data_week(self):
+        self.assertQueryBudget(3, lambda: self.client.get(reverse('analytics:sales_data_api'), {'period': 'week'}))
+
+    def test_sales_data_month(self):
+        self.assertQueryBudget(3, lambda: self.client.get(reverse('analytics:sales_data_api'), {'period': 'month'}))
+
+    def test_sales_forecast(self):
+        self.assertQueryBudget(3, lambda: self.client.get(reverse('analytics:sales_forecast')))
+
+
+class SalesDataAsyncViewTests(QueryBudgetTestCase):
+    """The sales chart API is served natively async"""
+
+    async def test_sales_data(self):
+        await self.async_client.aforce_login(self.admin)
+        for period, points in (('day', 24), ('week', 7), ('month', 30)):
+            response = await self.async_client.get(reverse('analytics:sales_data_api'), {'period': period})
+            self.assertEqual(len(response.json()['data']), points)
+
+    async def test_sales_data_requires_admin(self):
+        await self.async_client.aforce_login(self.cashier)
+        response = await self.async_client.get(reverse('analytics:sales_data_api'))
+        self.assertEqual(response.status_code, 302)
+
+
+@override_settings(CACHES=TEST_CACHES)
+class PanelInvalidationTests(TestCase):
+    """Saving orders and payments drops the cached panels once the transaction commits"""
+
+    def setUp(self):
+        cache.clear()
+        self.computed = {name: 0 for name in panels.PANELS}
+        patcher = mock.patch.dict(panels.PANELS, {name: self.counter(name) for name in panels.PANELS})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def counter(self, name):
+        def compute():
+            self.computed[name] += 1
+            return self.computed[name]
+        return compute
+
+    def test_order_save_invalidates_on_commit(self):
+        self.assertEqual(panels.get_panel('orders'), 1)
+        with self.captureOnCommitCallbacks() as callbacks:
+            Order.objects.create(customer_name='Walk-in')
+            # Still cached until the order is committed
+            self.assertEqual(panels.get_panel('orders'), 1)
+        self.assertTrue(callbacks)
+        for callback in callbacks:
+            callback()
+
+        self.assertEqual(panels.get_panel('orders'), 2)
+        self.assertEqual(panels.get_panel('recent_orders'), 1)  # not cached before, computed now
+
+    def test_successful_payment_invalidates_revenue(self):
+        order = Order.objects.create(customer_name='Walk-in', total_amount=Decimal('100'))
+        self.assertEqual(panels.get_panel('revenue'), 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            payment = Payment.objects.create(order=order, method='CASH', amount=Decimal('100'))
+        self.assertEqual(panels.get_panel('revenue'), 1)  # pending payments don't count
+
+        with self.captureOnCommitCallbacks(execute=True):
+            payment.status = 'SUCCESS'
+            payment.save()
+        self.assertEqual(panels.get_panel('revenue'), 2)
+
+
+class AdminDashboardTodayTests(QueryBudgetTestCase):
+    """The admin dashboard's "today" is the local (Asia/Manila) day, not the UTC one"""
+
+    def test_today_is_the_local_day(self):
+        # 00:30 and 01:00 on March 10 in Manila are still March 9 in UTC
+        for customer, created_at in (
+            ('yesterday', datetime(2026, 3, 9, 15, 0, tzinfo=dt_timezone.utc)),   # 23:00 March 9, Manila
+            ('today', datetime(2026, 3, 9, 16, 30, tzinfo=dt_timezone.utc)),      # 00:30 March 10, Manila
+            ('today', datetime(2026, 3, 9, 16, 45, tzinfo=dt_timezone.utc)),      # 00:45 March 10, Manila
+        ):
+            order = Order.objects.create(customer_name=customer)
+            Order.objects.filter(pk=order.pk).update(created_at=created_at)
+
+        self.login(self.admin)
+        with mock.patch('django.utils.timezone.now', return_value=datetime(2026, 3, 9, 17, 0, tzinfo=dt_timezone.utc)):
+            response = self.client.get(reverse('admin_dashboard'))
+        self.assertEqual(response.context['today_orders'], 2)
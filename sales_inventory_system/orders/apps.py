@@ -4,3 +4,11 @@ from django.apps import AppConfig
 class OrdersConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "sales_inventory_system.orders"
+
+    def ready(self):
+        """Register signals when app is ready"""
+        import sales_inventory_system.orders.signals  # noqa
+        from .scheduler import autostart_expiry_scheduler
+
+        # Expire stale PENDING orders under servers that don't load gunicorn.conf.py
+        autostart_expiry_scheduler()
@@ -0,0 +1,154 @@
+"""
+Cart storage for the kiosk and POS, kept in a dedicated cache instead of the session.
+
+Carts used to live in the database-backed session, so every add/update/remove
+rewrote the django_session row. They are now stored in the "carts" cache
+alias (a SQLite file by default, shared by all worker processes on a host,
+that never evicts a cart before it expires) under the visitor's session
+key, in a compact JSON list format:
+
+    kiosk: [[product_id, quantity], ...]
+    pos:   [[product_id, quantity, price, name], ...]
+
+The session row is only written once, when an anonymous kiosk visitor first
+needs a session key. The order itself is written to the database at checkout,
+after which the cart is cleared.
+"""
+
+import hashlib
+import json
+import logging
+from django.core.cache import caches
+from django.core.cache.backends.base import InvalidCacheBackendError
+
+logger = logging.getLogger(__name__)
+
+KIOSK = 'kiosk'
+POS = 'pos'
+
+# Session keys that held carts before the cart store existed
+LEGACY_SESSION_KEYS = {KIOSK: 'cart', POS: 'pos_cart'}
+
+
+def _cart_cache():
+    try:
+        return caches['carts']
+    except InvalidCacheBackendError:
+        return caches['default']
+
+
+def _cache_key(request, kind, create=False):
+    session = request.session
+    if session.session_key is None:
+        if not create:
+            return None
+        session.create()
+    return f'cart:{kind}:{session.session_key}'
+
+
+def _encode(kind, cart):
+    if kind == POS:
+        rows = [
+            [int(product_id), item['quantity'], item['price'], item['name']]
+            for product_id, item in cart.items()
+        ]
+    else:
+        rows = [[int(product_id), quantity] for product_id, quantity in cart.items()]
+    return json.dumps(rows, separators=(',', ':'))
+
+
+def _decode(kind, payload):
+    rows = json.loads(payload)
+    if kind == POS:
+        return {
+            str(product_id): {
+                'product_id': product_id,
+                'name': name,
+                'price': price,
+                'quantity': quantity,
+                'subtotal': price * quantity,
+            }
+            for product_id, quantity, price, name in rows
+        }
+    return {str(product_id): quantity for product_id, quantity in rows}
+
+
+def load_cart(request, kind):
+    """
+    Return the visitor's cart as a dict keyed by product id (as str).
+
+    Kiosk carts map to quantities; POS carts map to item dicts with
+    product_id, name, price, quantity and subtotal.
+    """
+    key = _cache_key(request, kind)
+    if key is None:
+        return {}
+
+    payload = _cart_cache().get(key)
+    if payload is not None:
+        return _decode_or_discard(kind, key, payload)
+
+    # Carry over a cart stored in the session before the cart store existed
+    legacy_key = LEGACY_SESSION_KEYS[kind]
+    if legacy_key in request.session:
+        cart = request.session.pop(legacy_key) or {}
+        if cart:
+            save_cart(request, kind, cart)
+        return cart
+
+    return {}
+
+
+async def aload_cart(request, kind):
+    """load_cart() for async views"""
+    key = _cache_key(request, kind)
+    if key is None:
+        return {}
+
+    payload = await _cart_cache().aget(key)
+    if payload is not None:
+        return _decode_or_discard(kind, key, payload)
+
+    legacy_key = LEGACY_SESSION_KEYS[kind]
+    if await request.session.ahas_key(legacy_key):
+        cart = await request.session.apop(legacy_key) or {}
+        if cart:
+            await _cart_cache().aset(key, _encode(kind, cart))
+        return cart
+
+    return {}
+
+
+def _decode_or_discard(kind, key, payload):
+    try:
+        return _decode(kind, payload)
+    except (ValueError, TypeError, KeyError):
+        logger.warning(f'Discarding unreadable {kind} cart {key}')
+        return {}
+
+
+def save_cart(request, kind, cart):
+    """Store the cart; an empty cart is deleted"""
+    key = _cache_key(request, kind, create=bool(cart))
+    if key is None:
+        return
+    if cart:
+        _cart_cache().set(key, _encode(kind, cart))
+    else:
+        _cart_cache().delete(key)
+
+
+def clear_cart(request, kind):
+    save_cart(request, kind, {})
+
+
+def cart_stamp(request, kind):
+    """Version stamp of the visitor's cart for conditional responses: a sha256 of its stored payload"""
+    key = _cache_key(request, kind)
+    if key is None:
+        return None
+    payload = _cart_cache().get(key)
+    if payload is not None:
+        return hashlib.sha256(payload.encode()).hexdigest()
+    # A cart still in the session is carried over by load_cart
+    return None if LEGACY_SESSION_KEYS[kind] in request.session else 'empty'
@@ -0,0 +1,233 @@
+"""
+Batched cart operations for the kiosk and POS.
+
+The frontends used to send one request per click (add, update quantity,
+remove) plus get-cart and get-cart-details to redraw, and each mutation
+checked ingredients and rewrote the cart on its own. sync_cart applies a
+whole batch of operations instead:
+
+    [{"op": "add", "product_id": 3, "quantity": 1},
+     {"op": "set", "product_id": 5, "quantity": 2},
+     {"op": "remove", "product_id": 7},
+     {"op": "clear"}]
+
+and costs one product fetch, one batched ingredient check and one cart
+store write, then returns the full cart state with product details.
+"""
+
+from contextlib import nullcontext
+from decimal import Decimal
+from sales_inventory_system.products.models import Product
+from sales_inventory_system.products.inventory_service import BOMService
+from . import cart_store
+
+OPERATIONS = ('add', 'set', 'remove', 'clear')
+
+# Upper bound on operations accepted in one batch
+MAX_OPERATIONS = 50
+
+
+class CartSyncError(ValueError):
+    """Raised when a batch of cart operations is malformed"""
+    pass
+
+
+def parse_operations(ops):
+    """Validate raw operations and normalize them to (op, product_id, quantity)"""
+    if ops is None:
+        return []
+    if not isinstance(ops, list):
+        raise CartSyncError('ops must be a list')
+    if len(ops) > MAX_OPERATIONS:
+        raise CartSyncError(f'At most {MAX_OPERATIONS} operations per request')
+
+    parsed = []
+    for raw in ops:
+        if not isinstance(raw, dict) or raw.get('op') not in OPERATIONS:
+            raise CartSyncError(f'Unknown cart operation: {raw!r}')
+        op = raw['op']
+        if op == 'clear':
+            parsed.append((op, None, 0))
+            continue
+        try:
+            product_id = int(raw['product_id'])
+            quantity = int(raw.get('quantity', 1))
+        except (KeyError, TypeError, ValueError):
+            raise CartSyncError(f'Invalid cart operation: {raw!r}')
+        parsed.append((op, product_id, quantity))
+    return parsed
+
+
+def _shortage_warning(shortages):
+    warning = "⚠️ Limited ingredients: "
+    warning += ", ".join(
+        f"{s['ingredient']} ({s['available']:.0f}/{s['needed']:.0f} {s['unit']})" for s in shortages[:2]
+    )
+    if len(shortages) > 2:
+        warning += f" +{len(shortages) - 2} more"
+    return warning
+
+
+def _apply(op, product_id, quantity, quantities, products, kind):
+    """Apply one operation to the {product_id: quantity} map; return its result"""
+    result = {'op': op, 'product_id': product_id, 'success': False}
+
+    if op == 'clear':
+        quantities.clear()
+        result.update(success=True, message='Cart cleared')
+        return result
+
+    if op == 'remove':
+        if product_id in quantities:
+            del quantities[product_id]
+            result.update(success=True, message='Product removed from cart')
+        else:
+            result['message'] = 'Product not in cart'
+        return result
+
+    product = products.get(product_id)
+    if product is None or product.is_archived:
+        result['message'] = 'Product not found'
+        return result
+
+    new_quantity = quantities.get(product_id, 0) + quantity if op == 'add' else quantity
+    if quantity < 1 or new_quantity < 1:
+        result['message'] = 'Quantity must be at least 1'
+        return result
+
+    # The kiosk sells from product stock; the POS only checks ingredients
+    if kind == cart_store.KIOSK:
+        if product.stock <= 0:
+            result['message'] = 'Product is out of stock'
+            return result
+        if new_quantity > product.stock:
+            result['message'] = f'Only {product.stock} items available in stock'
+            return result
+
+    quantities[product_id] = new_quantity
+    message = f'{product.name} added to cart' if op == 'add' else 'Cart updated'
+    result.update(success=True, message=message, quantity=new_quantity)
+    return result
+
+
+def _quantities(kind, cart):
+    if kind == cart_store.POS:
+        return {int(product_id): item['quantity'] for product_id, item in cart.items()}
+    return {int(product_id): quantity for product_id, quantity in cart.items()}
+
+
+def _build_cart(kind, quantities, products):
+    if kind == cart_store.POS:
+        return {
+            str(product_id): {
+                'product_id': product_id,
+                'name': products[product_id].name,
+                'price': float(products[product_id].price),
+                'quantity': quantity,
+                'subtotal': float(products[product_id].price) * quantity,
+            }
+            for product_id, quantity in quantities.items()
+        }
+    return {str(product_id): quantity for product_id, quantity in quantities.items()}
+
+
+def cart_state(kind, quantities, products):
+    """Full cart state for the frontends: items with product details and totals"""
+    items = []
+    total = Decimal('0.00')
+    for product_id, quantity in quantities.items():
+        product = products[product_id]
+        subtotal = product.price * quantity
+        total += subtotal
+        items.append({
+            'product_id': product_id,
+            'name': product.name,
+            'price': float(product.price),
+            'image': product.image.url if product.image else None,
+            'stock': product.stock,
+            'quantity': quantity,
+            'subtotal': float(subtotal),
+        })
+
+    # Kiosk badges count units, the POS counts lines
+    cart_count = sum(quantities.values()) if kind == cart_store.KIOSK else len(quantities)
+    return {'items': items, 'cart_count': cart_count, 'total': float(total)}
+
+
+def sync_cart(request, kind, ops, timing=None):
+    """
+    Apply a batch of cart operations and return the resulting cart state.
+
+    Operations run in order against the stored cart. Products touched by the
+    batch are checked for ingredients in one pass afterwards: the kiosk keeps
+    them with a warning (as add_to_cart does), the POS rolls them back to
+    their previous quantity (as pos_add_to_cart refuses them).
+
+    Args:
+        request: current request (the cart is keyed by its session)
+        kind: cart_store.KIOSK or cart_store.POS
+        ops: list of operation dicts, see module docstring
+        timing: optional ServerTiming to record phases in
+
+    Returns:
+        dict: {'success', 'results': [per-operation result], 'cart': cart_state}
+
+    Raises:
+        CartSyncError: if the operations are malformed
+    """
+    def measure(name):
+        return timing.measure(name) if timing else nullcontext()
+
+    operations = parse_operations(ops)
+
+    with measure('cart-load'):
+        cart = cart_store.load_cart(request, kind)
+    original = _quantities(kind, cart)
+
+    with measure('products'):
+        product_ids = set(original) | {product_id for _, product_id, _ in operations if product_id}
+        products = Product.objects.in_bulk(product_ids) if product_ids else {}
+
+    # Drop lines whose product has been deleted since it was added
+    quantities = {pid: qty for pid, qty in original.items() if pid in products}
+
+    results = []
+    touched = {}
+    for op, product_id, quantity in operations:
+        result = _apply(op, product_id, quantity, quantities, products, kind)
+        results.append(result)
+        if result['success'] and op in ('add', 'set'):
+            touched[product_id] = result
+
+    pending = {pid: quantities[pid] for pid in touched if pid in quantities}
+    if pending:
+        with measure('bom'):
+            availability = BOMService.check_bulk_availability(pending)
+        for product_id, check in availability.items():
+            if check['available']:
+                continue
+            result = touched[product_id]
+            if kind == cart_store.POS:
+                if product_id in original:
+                    quantities[product_id] = original[product_id]
+                else:
+                    quantities.pop(product_id, None)
+                result['success'] = False
+                result.pop('quantity', None)
+                if check['shortages']:
+                    result['message'] = f"Not enough ingredients available. {check['shortages'][0]['ingredient']} is short."
+                else:
+                    result['message'] = check.get('error', 'Not enough ingredients available.')
+                result['shortages'] = check['shortages']
+            elif check['has_recipe']:
+                result['warning'] = _shortage_warning(check['shortages'])
+
+    if quantities != original:
+        with measure('cart-save'):
+            cart_store.save_cart(request, kind, _build_cart(kind, quantities, products))
+
+    return {
+        'success': all(result['success'] for result in results),
+        'results': results,
+        'cart': cart_state(kind, quantities, products),
+    }
@@ -0,0 +1,140 @@
+"""
+In-process pub/sub for order status changes, streamed as Server-Sent Events.
+
+Kiosk order pages and cashier screens used to poll by reloading the page,
+re-querying the order and its items every 30 seconds. They now open an
+EventSource on the stream views below and only reload when an event for
+them arrives.
+
+Publishing:
+    publish_order_event(order)   # inside the view, after order.save()
+
+The event is delivered after the surrounding transaction commits. Delivery
+is in-process: every stream connected to the same server process receives
+it. On each heartbeat, single-order streams re-check their order and the
+all-orders stream checks the shared order board sequence for orders
+changed meanwhile, so changes made by another worker process or by the
+expiry scheduler are picked up within one heartbeat interval.
+
+The stream views need an ASGI server (sales_inventory/asgi.py, e.g. the
+GUNICORN_PROFILE=asgi profile in gunicorn.conf.py). Under WSGI
+they answer 204 No Content, which stops the browser's EventSource, and the
+pages fall back to their polling timers.
+"""
+
+import asyncio
+import json
+import logging
+import threading
+import time
+from django.db import transaction
+from .order_board import mark_changed
+
+logger = logging.getLogger(__name__)
+
+# Seconds between keep-alive comments on an idle stream
+HEARTBEAT_INTERVAL = 15
+
+# Streams are closed after this many seconds; EventSource reconnects on its own
+MAX_STREAM_DURATION = 300
+
+# Reconnect delay suggested to the browser, in milliseconds
+RETRY_MS = 3000
+
+# Events buffered per subscriber before it is told to resync
+SUBSCRIBER_QUEUE_SIZE = 100
+
+
+class Subscription:
+    """One connected stream, bound to the event loop that reads it"""
+
+    def __init__(self, loop, order_number=None):
+        self.loop = loop
+        self.order_number = order_number
+        self.queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self.overflowed = False
+
+    def wants(self, event):
+        return self.order_number is None or self.order_number == event['order_number']
+
+    def deliver(self, event):
+        """Runs on the subscriber's event loop"""
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.overflowed = True
+
+
+class OrderEventBroker:
+    """Fan out order events from request threads to async stream consumers"""
+
+    def __init__(self):
+        self._subscriptions = set()
+        self._lock = threading.Lock()
+        self._last_event_id = 0
+
+    def subscribe(self, order_number=None):
+        subscription = Subscription(asyncio.get_running_loop(), order_number)
+        with self._lock:
+            self._subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscriptions.discard(subscription)
+
+    def subscriber_count(self):
+        with self._lock:
+            return len(self._subscriptions)
+
+    def publish(self, event):
+        """Deliver an event to every interested subscriber (thread-safe)"""
+        with self._lock:
+            self._last_event_id += 1
+            event = {**event, 'id': self._last_event_id}
+            subscriptions = [s for s in self._subscriptions if s.wants(event)]
+
+        for subscription in subscriptions:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.deliver, event)
+            except RuntimeError:
+                # Event loop already closed; the stream is going away
+                self.unsubscribe(subscription)
+        return event
+
+
+broker = OrderEventBroker()
+
+
+def order_event_payload(order, event_type='status'):
+    return {
+        'type': event_type,
+        'order_id': order.id,
+        'order_number': order.order_number,
+        'status': order.status,
+        'status_display': order.get_status_display(),
+        'updated_at': order.updated_at.isoformat() if order.updated_at else None,
+        'timestamp': time.time(),
+    }
+
+
+def publish_order_event(order, event_type='status'):
+    """Publish an order change (and update the order boards) once the current transaction commits"""
+    payload = order_event_payload(order, event_type)
+
+    def publish():
+        mark_changed()
+        broker.publish(payload)
+
+    transaction.on_commit(publish)
+
+
+def format_sse(data, event=None, event_id=None):
+    """Encode one Server-Sent Events message"""
+    lines = []
+    if event_id is not None:
+        lines.append(f'id: {event_id}')
+    if event:
+        lines.append(f'event: {event}')
+    lines.append(f'data: {json.dumps(data, separators=(",", ":"))}')
+    return '\n'.join(lines) + '\n\n'
@@ -1,25 +1,33 @@
+from asgiref.sync import sync_to_async
 from django.shortcuts import render, redirect, get_object_or_404
 from django.http import HttpResponse, JsonResponse
 from django.contrib import messages
 from django.db import transaction
+from django.utils.cache import get_conditional_response, patch_cache_control
 from django.views.decorators.http import require_http_methods
 import json
 from decimal import Decimal
 from sales_inventory_system.products.models import Product
 from sales_inventory_system.products.inventory_service import BOMService
+from sales_inventory_system.products.thumbnails import variant_url
+from sales_inventory_system.sales_inventory.conditional import conditional_json
+from sales_inventory_system.sales_inventory.timing import ServerTiming
+from sales_inventory_system.sales_inventory.write_queue import serialized_writes
+from . import cart_store
+from .cart_sync import CartSyncError, sync_cart
+from .events import publish_order_event
+from .menu_snapshot import get_menu_snapshot
 from .models import Order, OrderItem, Payment
 
 
 def get_cart(request):
-    """Get cart from session or initialize empty cart"""
-    cart = request.session.get('cart', {})
-    return cart
+    """Get cart from the cart store or initialize empty cart"""
+    return cart_store.load_cart(request, cart_store.KIOSK)
 
 
 def save_cart(request, cart):
-    """Save cart to session"""
-    request.session['cart'] = cart
-    request.session.modified = True
+    """Save cart to the cart store"""
+    cart_store.save_cart(request, cart_store.KIOSK, cart)
 
 
 def calculate_cart_total(cart, products_dict):
@@ -32,34 +40,44 @@ def calculate_cart_total(cart, products_dict):
     return total
 
 
-def kiosk_home(request):
+async def kiosk_home(request):
     """Display kiosk home page with available products"""
-    all_products = Product.objects.filter(is_archived=False).order_by('category', 'name')
+    # The product grid comes pre-rendered from the menu snapshot (orders.menu_snapshot)
+    menu = await sync_to_async(get_menu_snapshot)()
 
-    # Filter products based on calculated_stock (accounts for BOM products)
-    available_products = [p for p in all_products if p.calculated_stock > 0]
-
-    # Check ingredient availability for each product
-    unavailable_products = set()
-    for product in available_products:
-        availability = BOMService.check_ingredient_availability(product.id)
-        if not availability['available']:
-            unavailable_products.add(product.id)
-
-    # Add availability flag to products
-    for product in available_products:
-        product.is_available_for_order = product.id not in unavailable_products
-
-    products = available_products
-
-    cart = get_cart(request)
+    cart = await cart_store.aload_cart(request, cart_store.KIOSK)
     cart_count = sum(cart.values())
 
     context = {
-        'products': products,
+        'menu': menu,
         'cart_count': cart_count,
     }
-    return render(request, 'kiosk/home.html', context)
+    # Rendered in a thread: template messages may read the database-backed session
+    return await sync_to_async(render)(request, 'kiosk/home.html', context)
+
+
+@require_http_methods(["GET", "HEAD"])
+def kiosk_menu(request):
+    """
+    The current menu snapshot, answered with 304 while the client's copy is current.
+
+    Returns the grid HTML, or the product data with ?format=json.
+    """
+    menu = get_menu_snapshot()
+    response = get_conditional_response(request, etag=menu['etag'])
+    if response is None:
+        if request.GET.get('format') == 'json':
+            response = JsonResponse({
+                'version': menu['version'],
+                'built_at': menu['built_at'],
+                'products': menu['products'],
+            })
+        else:
+            response = HttpResponse(menu['html'])
+    response['ETag'] = menu['etag']
+    # Cacheable, but revalidated on every use
+    patch_cache_control(response, no_cache=True)
+    return response
 
 
 def cart_view(request):
@@ -141,7 +159,7 @@ def checkout(request):
 
                 raise ValueError(error_msg.strip())
 
-            with transaction.atomic():
+            with serialized_writes(timing=ServerTiming.for_request(request)), transaction.atomic():
                 # Create order
                 order = Order.objects.create(
                     customer_name=customer_name,
@@ -190,9 +208,11 @@ def checkout(request):
                         product.stock -= item.quantity
                         product.save()
 
-                # Clear cart
-                request.session['cart'] = {}
-                request.session.modified = True
+                # Notify cashier screens once the order is committed
+                publish_order_event(order, 'created')
+
+                # Clear cart once the order is committed
+                transaction.on_commit(lambda: cart_store.clear_cart(request, cart_store.KIOSK))
 
                 # Check if AJAX request
                 if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
@@ -231,20 +251,21 @@ def checkout(request):
     return render(request, 'kiosk/checkout.html', context)
 
 
-def order_status(request, order_number):
+async def order_status(request, order_number):
     """Display order status for tracking"""
-    try:
-        order = Order.objects.get(order_number=order_number)
-
-        context = {
-            'order': order,
-            'items': order.items.all(),
-        }
-        return render(request, 'kiosk/order_status.html', context)
-    except Order.DoesNotExist:
+    order = await Order.objects.filter(order_number=order_number).select_related('payment').prefetch_related(
+        'items'
+    ).afirst()
+    if order is None:
         messages.error(request, 'Order not found!')
         return redirect('kiosk:home')
 
+    context = {
+        'order': order,
+        'items': order.items.all(),
+    }
+    return await sync_to_async(render)(request, 'kiosk/order_status.html', context)
+
 
 def add_to_cart(request, product_id):
     """Add product to cart"""
@@ -385,28 +406,28 @@ def update_cart_quantity(request, product_id):
     return JsonResponse({'success': False, 'message': 'Invalid request'})
 
 
+@conditional_json(lambda request: cart_store.cart_stamp(request, cart_store.KIOSK), per_user=False)
 def get_cart_json(request):
     """Return cart data as JSON for modal"""
     cart = get_cart(request)
     return JsonResponse(cart)
 
 
-def get_cart_details(request):
+async def get_cart_details(request):
     """Get cart items with product details for modal display"""
     if request.method == 'POST':
         try:
             data = json.loads(request.body)
             product_ids = [int(pid) for pid in data.get('product_ids', [])]
 
-            products = Product.objects.filter(id__in=product_ids)
             products_dict = {}
 
-            for product in products:
+            async for product in Product.objects.filter(id__in=product_ids):
                 products_dict[str(product.id)] = {
                     'id': product.id,
                     'name': product.name,
                     'price': float(product.price),
-                    'image': product.image.url if product.image else None,
+                    'image': variant_url(product, 160),  # cart thumbnail
                     'stock': product.stock
                 }
 
@@ -423,7 +444,30 @@ def get_cart_details(request):
     return JsonResponse({'success': False, 'message': 'Invalid request'})
 
 
-def search_order(request):
+@require_http_methods(["GET", "POST"])
+def cart_sync(request):
+    """
+    Apply a batch of cart operations and return the full cart.
+
+    POST {"ops": [...]} (see orders.cart_sync); GET returns the cart unchanged.
+    """
+    timing = ServerTiming.for_request(request)
+    ops = []
+    if request.method == 'POST':
+        try:
+            ops = json.loads(request.body or b'{}').get('ops', [])
+        except (ValueError, AttributeError):
+            return JsonResponse({'success': False, 'message': 'Invalid request'}, status=400)
+
+    try:
+        data = sync_cart(request, cart_store.KIOSK, ops, timing=timing)
+    except CartSyncError as e:
+        return JsonResponse({'success': False, 'message': str(e)}, status=400)
+
+    return timing.apply(JsonResponse(data))
+
+
+async def search_order(request):
     """Search for order by order number"""
     if request.method == 'POST':
         try:
@@ -437,10 +481,10 @@ def search_order(request):
                 })
 
             try:
-                order = Order.objects.get(order_number=order_number)
+                order = await Order.objects.aget(order_number=order_number)
                 items = []
 
-                for order_item in order.items.all():
+                async for order_item in order.items.all():
                     items.append({
                         'quantity': order_item.quantity,
                         'product_name': order_item.product_name,
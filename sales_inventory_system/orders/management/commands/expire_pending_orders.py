@@ -1,16 +1,41 @@
 """
 Management command to expire pending orders that are older than 1 hour
 Run with: python manage.py expire_pending_orders
+Run continuously with: python manage.py expire_pending_orders --interval 60
 """
+import time
 from django.core.management.base import BaseCommand
-from sales_inventory_system.orders.models import Order
+from sales_inventory_system.orders.scheduler import run_expiry
 
 
 class Command(BaseCommand):
     help = 'Expire pending orders that have been pending for more than 1 hour'
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval',
+            type=int,
+            default=0,
+            help='Keep running and expire orders every N seconds (default: run once)'
+        )
+
     def handle(self, *args, **options):
-        expired_count = Order.expire_old_pending_orders()
+        interval = options['interval']
+
+        if interval <= 0:
+            self.expire_once()
+            return
+
+        self.stdout.write(f'Expiring pending orders every {interval}s (Ctrl+C to stop)')
+        try:
+            while True:
+                self.expire_once()
+                time.sleep(interval)
+        except KeyboardInterrupt:
+            self.stdout.write('Scheduler stopped')
+
+    def expire_once(self):
+        expired_count = run_expiry()
 
         if expired_count > 0:
             self.stdout.write(
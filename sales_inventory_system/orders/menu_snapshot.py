@@ -0,0 +1,117 @@
+"""
+Kiosk menu snapshot: the product grid rendered once per catalog version.
+
+The kiosk home page is the same for every customer except for the cart,
+yet it loaded every product with its recipe and ingredients and rendered
+the grid on each visit. The grid (categories, prices, images, availability)
+is now rendered once into a snapshot shared through the cache:
+
+- Catalog writers bump a version number in the cache (mark_menu_changed;
+  products.signals does this for products, recipes and ingredient stock
+  or availability).
+- get_menu_snapshot() returns the snapshot of the current version, building
+  it on first use (one build per version across workers, see
+  sales_inventory.caching.get_or_compute).
+- The snapshot holds the grid HTML, the same data as JSON and an ETag
+  hashed from both, so a version bump that changes nothing visible keeps
+  the ETag and clients keep getting 304s.
+
+kiosk_home embeds the HTML; kiosk:menu serves the snapshot conditionally
+for the page to poll. The cart is loaded separately by the page.
+"""
+
+import hashlib
+import json
+import time
+from django.core.cache import cache
+from django.template.loader import render_to_string
+from django.utils import timezone
+from sales_inventory_system.products.inventory_service import BOMService
+from sales_inventory_system.products.models import Product, RecipeItem
+from sales_inventory_system.products.thumbnails import variant_url
+from sales_inventory_system.sales_inventory.caching import get_or_compute
+
+# Cache key of the catalog version number
+MENU_VERSION_CACHE_KEY = 'kiosk_menu:version'
+
+MENU_TEMPLATE = 'kiosk/menu.html'
+
+
+def mark_menu_changed():
+    """Make the next kiosk request rebuild the menu snapshot"""
+    try:
+        cache.incr(MENU_VERSION_CACHE_KEY)
+    except ValueError:
+        # Key missing or evicted - any new value invalidates the snapshots
+        cache.set(MENU_VERSION_CACHE_KEY, int(time.time() * 1000), None)
+
+
+def menu_version():
+    version = cache.get(MENU_VERSION_CACHE_KEY)
+    if version is None:
+        cache.add(MENU_VERSION_CACHE_KEY, int(time.time() * 1000), None)
+        version = cache.get(MENU_VERSION_CACHE_KEY)
+    return version
+
+
+def menu_products():
+    """Products the kiosk offers, each flagged with is_available_for_order"""
+    # Only products that can be made (producible units account for BOM products)
+    products = list(
+        Product.objects.filter(
+            is_archived=False, producible_units__gt=0
+        ).order_by('category', 'name').prefetch_related('recipe__ingredients__ingredient')
+    )
+
+    # Check ingredient availability for all products in one batch, reusing the prefetched recipes
+    recipes = {}
+    for product in products:
+        try:
+            recipes[product.id] = product.recipe
+        except RecipeItem.DoesNotExist:
+            pass
+    availability = BOMService.check_bulk_availability(
+        {product.id: 1 for product in products}, recipes=recipes
+    )
+    for product in products:
+        product.is_available_for_order = availability.get(product.id, {'available': True})['available']
+    return products
+
+
+def build_menu_snapshot(version):
+    """Render the grid and its JSON for the given catalog version"""
+    products = menu_products()
+    html = render_to_string(MENU_TEMPLATE, {'products': products})
+    items = [
+        {
+            'id': product.id,
+            'name': product.name,
+            'description': product.description,
+            'category': product.category,
+            'price': str(product.price),
+            'stock': product.stock,
+            'image': variant_url(product, 320),
+            'available': product.is_available_for_order,
+        }
+        for product in products
+    ]
+    digest = hashlib.sha256(html.encode())
+    digest.update(json.dumps(items, sort_keys=True).encode())
+    return {
+        'version': version,
+        'etag': f'"{digest.hexdigest()[:20]}"',
+        'built_at': timezone.now().isoformat(),
+        'html': html,
+        'products': items,
+    }
+
+
+def get_menu_snapshot():
+    """
+    The snapshot of the current catalog version.
+
+    Returns:
+        dict: version, etag, built_at, html (the grid) and products (its data)
+    """
+    version = menu_version()
+    return get_or_compute('kiosk_menu', str(version), lambda: build_menu_snapshot(version))
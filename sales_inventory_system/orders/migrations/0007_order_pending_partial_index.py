@@ -0,0 +1,19 @@
+# Generated by Django 5.2.8 on 2026-10-19 07:08
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0006_merge_20260102_2240'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(condition=models.Q(('status', 'PENDING')), fields=['status', 'created_at'], name='orders_order_pending_idx'),
+        ),
+    ]
@@ -0,0 +1,35 @@
+from django.db import migrations
+
+INDEX_NAME = 'orders_orderitem_product_idx'
+
+
+def create_product_index(apps, schema_editor):
+    """
+    Restore the OrderItem.product FK index on PostgreSQL (dropped by 0009 for
+    SQLite's planner), so PROTECT checks on product deletes and per-product
+    item lookups don't scan the largest table. SQLite stays without it.
+    """
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    OrderItem = apps.get_model('orders', 'OrderItem')
+    schema_editor.execute(
+        f'CREATE INDEX IF NOT EXISTS {schema_editor.quote_name(INDEX_NAME)} '
+        f'ON {schema_editor.quote_name(OrderItem._meta.db_table)} ({schema_editor.quote_name("product_id")})'
+    )
+
+
+def drop_product_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(f'DROP INDEX IF EXISTS {schema_editor.quote_name(INDEX_NAME)}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0009_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_product_index, drop_product_index),
+    ]
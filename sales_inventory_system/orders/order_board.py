@@ -0,0 +1,235 @@
+"""
+Live order board: the active orders kept in memory per worker process.
+
+The cashier POS and the kitchen display used to query PENDING, IN_PROGRESS
+and recent FINISHED orders (with items and products) plus three statistics
+queries on every render. The board holds a compact copy of exactly those
+orders and refreshes itself from a change feed instead:
+
+- Writers call mark_changed() (publish_order_event does this on commit),
+  which bumps a change sequence number in the cache.
+- On read, a board whose sequence is stale reloads only the orders whose
+  updated_at moved since its last sync (delta sync).
+- Every ORDER_BOARD_RESYNC_SECONDS the board reloads everything, which
+  covers writers that bypass the feed and the change of day for statistics.
+
+Reads with no pending change cost one cache lookup and no database queries.
+"""
+
+import threading
+import time
+from datetime import timedelta
+from decimal import Decimal
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+from sales_inventory_system.sales_inventory.dates import day_range
+
+# Cache key of the order change sequence number
+BOARD_SEQUENCE_CACHE_KEY = 'order_board:sequence'
+
+# Orders shown on the board
+ACTIVE_STATUSES = ('PENDING', 'IN_PROGRESS')
+FINISHED_LIMIT = 10
+
+# Slack for clock skew and in-flight transactions in delta syncs
+DELTA_OVERLAP = timedelta(seconds=5)
+
+
+def mark_changed():
+    """Signal every worker's board that orders changed"""
+    try:
+        cache.incr(BOARD_SEQUENCE_CACHE_KEY)
+    except ValueError:
+        # Key missing or evicted - any new value invalidates the boards
+        cache.set(BOARD_SEQUENCE_CACHE_KEY, int(time.time() * 1000), None)
+
+
+class BoardOrder:
+    """Compact, template-friendly copy of an order on the board"""
+
+    __slots__ = (
+        'pk', 'order_number', 'customer_name', 'table_number', 'status',
+        'notes', 'total_amount', 'created_at', 'updated_at',
+        'payment_method', 'payment_status', 'items',
+    )
+
+    def __init__(self, **fields):
+        for name in self.__slots__:
+            setattr(self, name, fields.get(name))
+
+    @property
+    def id(self):
+        return self.pk
+
+    def as_dict(self):
+        return {
+            'id': self.pk,
+            'order_number': self.order_number,
+            'customer_name': self.customer_name,
+            'table_number': self.table_number,
+            'status': self.status,
+            'notes': self.notes,
+            'total_amount': str(self.total_amount),
+            'created_at': self.created_at.isoformat(),
+            'payment_method': self.payment_method,
+            'payment_status': self.payment_status,
+            'items': self.items,
+        }
+
+
+class OrderBoard:
+    """Per-process board of active orders, synchronized from the change feed"""
+
+    def __init__(self, finished_limit=FINISHED_LIMIT, resync_seconds=None):
+        self.finished_limit = finished_limit
+        self.resync_seconds = resync_seconds if resync_seconds is not None else getattr(
+            settings, 'ORDER_BOARD_RESYNC_SECONDS', 30
+        )
+        self._lock = threading.Lock()
+        self._orders = {}
+        self._stats = {}
+        self._sequence = None
+        self._synced_at = None
+        self._full_sync_at = 0.0
+
+    # ---- loading ----
+
+    def _load_orders(self, queryset):
+        """Fetch board rows for a queryset of orders: two queries, no model instances"""
+        from .models import OrderItem
+
+        rows = list(queryset.values(
+            'pk', 'order_number', 'customer_name', 'table_number', 'status',
+            'notes', 'total_amount', 'created_at', 'updated_at',
+            'payment__method', 'payment__status',
+        ))
+
+        items = {}
+        item_rows = OrderItem.objects.filter(
+            order_id__in=[row['pk'] for row in rows]
+        ).order_by('created_at', 'id').values_list('order_id', 'product_name', 'quantity')
+        for order_id, name, quantity in item_rows:
+            items.setdefault(order_id, []).append({'name': name, 'quantity': quantity})
+
+        return [
+            BoardOrder(
+                pk=row['pk'],
+                order_number=row['order_number'],
+                customer_name=row['customer_name'],
+                table_number=row['table_number'],
+                status=row['status'],
+                notes=row['notes'],
+                total_amount=row['total_amount'],
+                created_at=row['created_at'],
+                updated_at=row['updated_at'],
+                payment_method=row['payment__method'],
+                payment_status=row['payment__status'],
+                items=items.get(row['pk'], []),
+            )
+            for row in rows
+        ]
+
+    def _load_stats(self):
+        from .models import Order, Payment
+
+        today = timezone.localdate()
+        today_start, today_end = day_range(today)
+        counts = Order.objects.filter(created_at__gte=today_start, created_at__lt=today_end).aggregate(
+            orders=Count('id'),
+            completed=Count('id', filter=Q(status='FINISHED')),
+        )
+        revenue = Payment.objects.filter(
+            status='SUCCESS', created_at__gte=today_start, created_at__lt=today_end
+        ).aggregate(total=Sum('amount'))['total']
+        return {
+            'today_orders_count': counts['orders'],
+            'today_completed': counts['completed'],
+            'today_revenue': revenue or Decimal('0.00'),
+        }
+
+    def _trim_finished(self, orders):
+        finished = sorted(
+            (order for order in orders.values() if order.status == 'FINISHED'),
+            key=lambda order: (order.created_at, order.pk),
+            reverse=True,
+        )
+        for order in finished[self.finished_limit:]:
+            del orders[order.pk]
+
+    def _full_sync(self):
+        from .models import Order
+
+        started_at = timezone.now()
+        finished_ids = Order.objects.filter(status='FINISHED').order_by(
+            '-created_at', '-id'
+        ).values_list('pk', flat=True)[:self.finished_limit]
+        orders = self._load_orders(Order.objects.filter(
+            Q(status__in=ACTIVE_STATUSES) | Q(pk__in=list(finished_ids))
+        ))
+        self._orders = {order.pk: order for order in orders}
+        self._stats = self._load_stats()
+        self._synced_at = started_at
+        self._full_sync_at = time.monotonic()
+
+    def _delta_sync(self):
+        from .models import Order
+
+        started_at = timezone.now()
+        changed = self._load_orders(Order.objects.filter(updated_at__gte=self._synced_at - DELTA_OVERLAP))
+
+        orders = dict(self._orders)
+        for order in changed:
+            if order.status in ACTIVE_STATUSES or order.status == 'FINISHED':
+                orders[order.pk] = order
+            else:
+                orders.pop(order.pk, None)
+        self._trim_finished(orders)
+
+        self._orders = orders
+        if changed:
+            self._stats = self._load_stats()
+        self._synced_at = started_at
+
+    def sync(self, force=False):
+        """Bring the board up to date if the change feed moved"""
+        sequence = cache.get(BOARD_SEQUENCE_CACHE_KEY)
+        stale = force or self._synced_at is None or (
+            time.monotonic() - self._full_sync_at >= self.resync_seconds
+        )
+        if not stale and sequence == self._sequence:
+            return
+
+        with self._lock:
+            if stale:
+                self._full_sync()
+            elif sequence != self._sequence:
+                self._delta_sync()
+            self._sequence = sequence
+
+    # ---- reading ----
+
+    def snapshot(self):
+        """Current board: order lists by column plus today's statistics"""
+        self.sync()
+        orders = self._orders
+
+        def column(status, newest_first=True):
+            return sorted(
+                (order for order in orders.values() if order.status == status),
+                key=lambda order: (order.created_at, order.pk),
+                reverse=newest_first,
+            )
+
+        pending = column('PENDING')
+        return {
+            'pending_orders': pending,
+            'in_progress_orders': column('IN_PROGRESS'),
+            'finished_orders': column('FINISHED'),
+            'pending_count': len(pending),
+            **self._stats,
+        }
+
+
+board = OrderBoard()
@@ -0,0 +1,138 @@
+"""
+Background scheduler for periodic order maintenance.
+
+Expiring stale PENDING orders used to happen at the start of order_list and
+update_order_status, which turned every cashier click into an UPDATE scan on
+the Order table. The expiry now runs on a fixed interval instead, either:
+
+- in-process, as a daemon thread started per gunicorn worker
+  (see post_worker_init in gunicorn.conf.py, ORDER_EXPIRY_INTERVAL env),
+- in-process under runserver, uvicorn, daphne or hypercorn (or any process
+  with ORDER_EXPIRY_AUTOSTART=true), started by OrdersConfig.ready() via
+  autostart_expiry_scheduler(), or
+- out-of-process, with `python manage.py expire_pending_orders --interval 60`
+  (set ORDER_EXPIRY_INTERVAL=0 to turn the in-process thread off).
+
+The expiry UPDATE is idempotent, so several workers running it is harmless;
+it is served by the (status, created_at) index (orders_order_status_time_idx).
+"""
+
+import logging
+import os
+import sys
+import threading
+from django.db import close_old_connections
+
+logger = logging.getLogger(__name__)
+
+# Default number of seconds between expiry runs
+DEFAULT_EXPIRY_INTERVAL = 60
+
+# Servers (besides runserver) whose processes start the scheduler on app load
+AUTOSTART_SERVERS = ('uvicorn', 'daphne', 'hypercorn')
+
+_scheduler_thread = None
+_scheduler_lock = threading.Lock()
+
+
+def run_expiry():
+    """Expire old pending orders once, returning the number expired"""
+    from .models import Order
+
+    close_old_connections()
+    try:
+        expired_count = Order.expire_old_pending_orders()
+        if expired_count:
+            from .order_board import mark_changed
+            from sales_inventory_system.analytics.panels import invalidate_panels
+            mark_changed()
+            # Expiry is a bulk update, which sends no signals
+            invalidate_panels('orders', 'recent_orders')
+            logger.info(f"Expired {expired_count} pending order(s)")
+        return expired_count
+    finally:
+        close_old_connections()
+
+
+def _run_forever(interval, stop_event):
+    while not stop_event.wait(interval):
+        try:
+            run_expiry()
+        except Exception as e:
+            # Keep the scheduler alive on transient database errors
+            logger.error(f"Pending order expiry failed: {str(e)}")
+
+
+def start_expiry_scheduler(interval=DEFAULT_EXPIRY_INTERVAL):
+    """
+    Start the in-process expiry thread (once per process).
+
+    Args:
+        interval: Seconds between expiry runs; 0 or less disables the scheduler
+
+    Returns:
+        threading.Event that stops the scheduler when set, or None if disabled
+    """
+    global _scheduler_thread
+
+    if interval <= 0:
+        return None
+
+    with _scheduler_lock:
+        if _scheduler_thread is not None and _scheduler_thread.is_alive():
+            return _scheduler_thread.stop_event
+
+        stop_event = threading.Event()
+        thread = threading.Thread(
+            target=_run_forever,
+            args=(interval, stop_event),
+            name='order-expiry-scheduler',
+            daemon=True,
+        )
+        thread.stop_event = stop_event
+        thread.start()
+        _scheduler_thread = thread
+        logger.info(f"Order expiry scheduler started (every {interval}s)")
+        return stop_event
+
+
+def _program_name(argv):
+    """Name of the running program; `python -m pkg` runs pkg/__main__.py"""
+    path = argv[0] if argv else ''
+    if os.path.basename(path) == '__main__.py':
+        path = os.path.dirname(path)
+    return os.path.basename(path)
+
+
+def autostart_expiry_scheduler(argv=None):
+    """
+    Start the scheduler from app loading when no gunicorn worker hook will.
+
+    Only known long-running servers start it: runserver's serving process
+    (the autoreload child, or --noreload) and the ASGI servers in
+    AUTOSTART_SERVERS. Everything else that loads Django - management
+    commands, scripts calling django.setup(), test runners, shells - is left
+    alone unless ORDER_EXPIRY_AUTOSTART=true opts in. gunicorn workers start
+    it from post_worker_init instead.
+
+    Returns:
+        The stop event from start_expiry_scheduler, or None if not started
+    """
+    argv = sys.argv if argv is None else argv
+    program = _program_name(argv)
+
+    if os.environ.get('ORDER_EXPIRY_AUTOSTART', '').lower() == 'true':
+        autostart = True
+    elif program in AUTOSTART_SERVERS:
+        autostart = True
+    elif program in ('manage.py', 'django-admin', 'django'):
+        command = argv[1] if len(argv) > 1 else ''
+        autostart = command == 'runserver' and (
+            '--noreload' in argv or os.environ.get('RUN_MAIN') == 'true'
+        )
+    else:
+        autostart = False
+
+    if not autostart:
+        return None
+    return start_expiry_scheduler(int(os.environ.get('ORDER_EXPIRY_INTERVAL', DEFAULT_EXPIRY_INTERVAL)))
@@ -0,0 +1,9 @@
+"""
+Signals for order events
+"""
+
+from sales_inventory_system.sales_inventory.conditional import track_changes
+from .models import Order, OrderItem, Payment
+
+# Change counters for conditional responses (sales_inventory.conditional)
+track_changes(Order, OrderItem, Payment)
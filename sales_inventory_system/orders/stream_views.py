@@ -0,0 +1,134 @@
+"""
+Server-Sent Events streams for order status (see orders.events).
+"""
+
+import asyncio
+from django.contrib.auth.decorators import login_required
+from django.core.cache import cache
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils import timezone
+from .events import (
+    HEARTBEAT_INTERVAL, MAX_STREAM_DURATION, RETRY_MS, SUBSCRIBER_QUEUE_SIZE,
+    broker, format_sse, order_event_payload,
+)
+from .models import Order
+from .order_board import BOARD_SEQUENCE_CACHE_KEY, DELTA_OVERLAP
+
+
+def _event_stream_response(stream):
+    response = StreamingHttpResponse(stream, content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # don't let proxies buffer the stream
+    return response
+
+
+def _event_state(event):
+    return event['status'], event['updated_at']
+
+
+async def _event_stream(order_number=None, initial_event=None, resync=None):
+    """
+    Yield SSE messages for one order (or all orders) until the stream times out.
+
+    resync: optional coroutine called on idle heartbeats with the state
+    ({order_number: (status, updated_at)}) of the events sent so far; it
+    returns newer events (changes made outside this process), or None when
+    the client should reload its full state instead.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + MAX_STREAM_DURATION
+    sent = {}
+    subscription = broker.subscribe(order_number=order_number)
+
+    try:
+        yield f'retry: {RETRY_MS}\n\n'
+        if initial_event:
+            sent[initial_event['order_number']] = _event_state(initial_event)
+            yield format_sse(initial_event, event='order')
+
+        while loop.time() < deadline:
+            try:
+                events = [await asyncio.wait_for(subscription.queue.get(), timeout=HEARTBEAT_INTERVAL)]
+            except asyncio.TimeoutError:
+                events = await resync(sent) if resync else []
+                if events is None:
+                    yield format_sse({}, event='resync')
+                    return
+                if not events:
+                    yield ': keep-alive\n\n'
+                    continue
+
+            if subscription.overflowed:
+                # Consumer fell behind - have the page reload its full state
+                yield format_sse({}, event='resync')
+                return
+
+            for event in events:
+                sent[event['order_number']] = _event_state(event)
+                yield format_sse(event, event='order', event_id=event.get('id'))
+    finally:
+        broker.unsubscribe(subscription)
+
+
+async def order_events(request, order_number):
+    """Stream status changes for one order (kiosk order status page)"""
+    if not isinstance(request, ASGIRequest):
+        # Streaming needs the ASGI server; 204 tells EventSource to stop retrying
+        return HttpResponse(status=204)
+
+    order = await Order.objects.filter(order_number=order_number).afirst()
+    if order is None:
+        return HttpResponse(status=404)
+
+    async def resync(sent):
+        # Picks up changes made by other worker processes or the expiry scheduler
+        current = await Order.objects.filter(order_number=order_number).afirst()
+        if current is None:
+            return []
+        event = order_event_payload(current)
+        if _event_state(event) == sent.get(order_number):
+            return []
+        return [event]
+
+    return _event_stream_response(
+        _event_stream(order_number, initial_event=order_event_payload(order), resync=resync)
+    )
+
+
+@login_required
+async def all_order_events(request):
+    """Stream status changes for every order (cashier screens)"""
+    if not isinstance(request, ASGIRequest):
+        return HttpResponse(status=204)
+
+    return _event_stream_response(_event_stream(resync=await all_orders_resync()))
+
+
+async def all_orders_resync():
+    """
+    resync for the all-orders stream: events published by other worker
+    processes never reach this process's broker, but every publish bumps
+    the shared order board sequence (orders.order_board). When it moved
+    since the last heartbeat, the orders updated meanwhile are sent as a
+    delta, or a resync when there are more than a stream buffers.
+    """
+    state = {'sequence': await cache.aget(BOARD_SEQUENCE_CACHE_KEY), 'since': timezone.now()}
+
+    async def resync(sent):
+        sequence = await cache.aget(BOARD_SEQUENCE_CACHE_KEY)
+        if sequence == state['sequence']:
+            return []
+        started_at = timezone.now()
+        changed = [
+            order async for order in Order.objects.filter(
+                updated_at__gte=state['since'] - DELTA_OVERLAP
+            ).order_by('updated_at', 'id')[:SUBSCRIBER_QUEUE_SIZE + 1]
+        ]
+        state.update(sequence=sequence, since=started_at)
+        if len(changed) > SUBSCRIBER_QUEUE_SIZE:
+            return None
+        events = [order_event_payload(order) for order in changed]
+        return [event for event in events if _event_state(event) != sent.get(event['order_number'])]
+
+    return resync
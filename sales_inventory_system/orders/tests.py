@@ -1,3 +1,466 @@
-from django.test import TestCase
+import json
+from decimal import Decimal
+from unittest import mock
+from django.test import SimpleTestCase
+from django.urls import reverse
 
-# Create your tests here.
+from sales_inventory_system.orders import order_board, scheduler
+from sales_inventory_system.orders.events import SUBSCRIBER_QUEUE_SIZE
+from sales_inventory_system.orders.menu_snapshot import menu_version
+from sales_inventory_system.orders.models import Order, OrderItem, Payment
+from sales_inventory_system.orders.stream_views import all_orders_resync
+from sales_inventory_system.products.models import Ingredient, Product, RecipeIngredient, RecipeItem
+from sales_inventory_system.sales_inventory.testing import QueryBudgetTestCase
+
+
+class OrderQueryBudgetTests(QueryBudgetTestCase):
+    """Order list, detail and status/payment actions"""
+
+    def setUp(self):
+        super().setUp()
+        self.login(self.admin)
+
+    def create_pending_order(self, size=None):
+        product = self.products[0]
+        self.order = Order.objects.create(customer_name='Walk-in', total_amount=product.price * 2)
+        OrderItem.objects.create(order=self.order, product=product, quantity=2)
+        Payment.objects.create(order=self.order, method='CASH', amount=self.order.total_amount)
+
+    def test_order_list(self):
+        self.assertQueryBudget(5, lambda: self.client.get(reverse('orders:list')))
+
+    def test_order_list_ajax(self):
+        self.assertQueryBudget(5, lambda: self.client.get(
+            reverse('orders:list'), HTTP_X_REQUESTED_WITH='XMLHttpRequest'
+        ))
+
+    def test_order_list_ajax_cursor(self):
+        self.assertQueryBudget(5, lambda: self.client.get(
+            reverse('orders:list'), {'cursor': ''}, HTTP_X_REQUESTED_WITH='XMLHttpRequest'
+        ))
+
+    def test_order_detail(self):
+        self.assertQueryBudget(6, lambda: self.client.get(reverse('orders:detail', args=[self.order.pk])),
+                               setup=self.create_pending_order)
+
+    def test_update_status(self):
+        self.assertQueryBudget(
+            5,
+            lambda: self.client.post(reverse('orders:update_status', args=[self.order.pk]),
+                                     json.dumps({'status': 'IN_PROGRESS'}), content_type='application/json'),
+            setup=self.create_pending_order,
+        )
+
+    def test_process_payment(self):
+        self.assertQueryBudget(27, lambda: self.client.post(reverse('orders:process_payment', args=[self.order.pk])),
+                               setup=self.create_pending_order, status=302)
+
+    def test_quick_payment(self):
+        self.assertQueryBudget(
+            27,
+            lambda: self.client.post(reverse('orders:quick_payment', args=[self.order.pk]),
+                                     json.dumps({'cash_amount': 1000}), content_type='application/json'),
+            setup=self.create_pending_order,
+        )
+
+    def test_archive(self):
+        self.assertQueryBudget(14, lambda: self.client.post(reverse('orders:archive', args=[self.order.pk])),
+                               setup=self.create_pending_order, status=302)
+
+
+class PosQueryBudgetTests(QueryBudgetTestCase):
+    """Cashier POS, cart endpoints, checkout and the order boards"""
+
+    def setUp(self):
+        super().setUp()
+        self.login(self.cashier)
+
+    def fill_cart(self, size=None):
+        ops = [{'op': 'clear'}] + [
+            {'op': 'add', 'product_id': product.pk, 'quantity': 1} for product in self.products[:2]
+        ]
+        self.client.post(reverse('orders:pos_cart_sync'), json.dumps({'ops': ops}), content_type='application/json')
+
+    def change_board(self, size=None):
+        # Measure the delta sync a board does after an order changed
+        order_board.board.sync(force=True)
+        order_board.mark_changed()
+
+    def test_pos_home(self):
+        self.assertQueryBudget(3, lambda: self.client.get(reverse('orders:pos_home')))
+
+    def test_add_to_cart(self):
+        self.assertQueryBudget(6, lambda: self.client.post(
+            reverse('orders:pos_add_to_cart', args=[self.products[0].pk]), {'quantity': 1}
+        ))
+
+    def test_update_cart(self):
+        self.assertQueryBudget(6, lambda: self.client.post(
+            reverse('orders:pos_update_cart', args=[self.products[0].pk]), {'quantity': 3}
+        ), setup=self.fill_cart)
+
+    def test_remove_from_cart(self):
+        self.assertQueryBudget(2, lambda: self.client.post(
+            reverse('orders:pos_remove_from_cart', args=[self.products[0].pk])
+        ), setup=self.fill_cart)
+
+    def test_get_cart(self):
+        self.assertQueryBudget(2, lambda: self.client.get(reverse('orders:pos_get_cart')), setup=self.fill_cart)
+
+    def test_get_cart_details(self):
+        self.assertQueryBudget(2, lambda: self.client.get(reverse('orders:pos_get_cart_details')),
+                               setup=self.fill_cart)
+
+    def test_cart_sync(self):
+        self.assertQueryBudget(6, lambda: self.client.post(
+            reverse('orders:pos_cart_sync'),
+            json.dumps({'ops': [{'op': 'add', 'product_id': p.pk, 'quantity': 1} for p in self.products[:2]]}),
+            content_type='application/json',
+        ))
+
+    def test_cart_view(self):
+        self.assertQueryBudget(3, lambda: self.client.get(reverse('orders:pos_cart')), setup=self.fill_cart)
+
+    def test_checkout_form(self):
+        self.assertQueryBudget(2, lambda: self.client.get(reverse('orders:pos_checkout')), setup=self.fill_cart)
+
+    def test_checkout(self):
+        self.assertQueryBudget(26, lambda: self.client.post(
+            reverse('orders:pos_checkout'), {'customer_name': 'Walk-in', 'payment_method': 'CASH'}
+        ), setup=self.fill_cart, status=302)
+
+    def test_confirmation(self):
+        self.assertQueryBudget(5, lambda: self.client.get(
+            reverse('orders:pos_confirmation', args=[Order.objects.first().order_number])
+        ))
+
+    def test_cashier_pos(self):
+        self.assertQueryBudget(6, lambda: self.client.get(reverse('cashier_pos')), setup=self.change_board)
+
+    def test_kitchen_display(self):
+        self.assertQueryBudget(6, lambda: self.client.get(reverse('kitchen_display')), setup=self.change_board)
+
+
+class KioskQueryBudgetTests(QueryBudgetTestCase):
+    """Self-service kiosk pages and cart endpoints (anonymous)"""
+
+    def fill_cart(self, size=None):
+        ops = [{'op': 'clear'}] + [
+            {'op': 'add', 'product_id': product.pk, 'quantity': 1} for product in self.products[:2]
+        ]
+        self.client.post(reverse('kiosk:cart_sync'), json.dumps({'ops': ops}), content_type='application/json')
+
+    def test_home(self):
+        self.assertQueryBudget(4, lambda: self.client.get(reverse('kiosk:home')))
+
+    def test_home_from_snapshot(self):
+        self.client.get(reverse('kiosk:home'))
+        with self.assertNumQueries(0):
+            self.client.get(reverse('kiosk:home'))
+
+    def test_menu(self):
+        self.assertQueryBudget(4, lambda: self.client.get(reverse('kiosk:menu')))
+
+    def test_cart(self):
+        self.assertQueryBudget(1, lambda: self.client.get(reverse('kiosk:cart')), setup=self.fill_cart)
+
+    def test_add_to_cart(self):
+        self.assertQueryBudget(4, lambda: self.client.post(
+            reverse('kiosk:add_to_cart', args=[self.products[0].pk]), {'quantity': 1}
+        ), setup=self.fill_cart)
+
+    def test_update_cart_quantity(self):
+        self.assertQueryBudget(1, lambda: self.client.post(
+            reverse('kiosk:update_cart_quantity', args=[self.products[0].pk]), {'quantity': 3}
+        ), setup=self.fill_cart)
+
+    def test_remove_from_cart(self):
+        self.assertQueryBudget(0, lambda: self.client.post(
+            reverse('kiosk:remove_from_cart', args=[self.products[0].pk])
+        ), setup=self.fill_cart)
+
+    def test_get_cart_details(self):
+        self.assertQueryBudget(0, lambda: self.client.get(reverse('kiosk:get_cart_details')),
+                               setup=self.fill_cart)
+
+    def test_cart_sync(self):
+        self.assertQueryBudget(4, lambda: self.client.post(
+            reverse('kiosk:cart_sync'),
+            json.dumps({'ops': [{'op': 'add', 'product_id': p.pk, 'quantity': 1} for p in self.products[:2]]}),
+            content_type='application/json',
+        ), setup=self.fill_cart)
+
+    def test_checkout_form(self):
+        self.assertQueryBudget(1, lambda: self.client.get(reverse('kiosk:checkout')), setup=self.fill_cart)
+
+    def test_checkout(self):
+        self.assertQueryBudget(15, lambda: self.client.post(
+            reverse('kiosk:checkout'), {'customer_name': 'Guest', 'payment_method': 'CASH'}
+        ), setup=self.fill_cart, status=302)
+
+    def test_order_status(self):
+        self.assertQueryBudget(3, lambda: self.client.get(
+            reverse('kiosk:order_status', args=[Order.objects.first().order_number])
+        ))
+
+    def test_search_order(self):
+        self.assertQueryBudget(3, lambda: self.client.post(
+            reverse('kiosk:search_order'),
+            json.dumps({'order_number': Order.objects.first().order_number}), content_type='application/json',
+        ))
+
+
+
+class CartSyncTests(QueryBudgetTestCase):
+    """Batched cart operations on the kiosk and POS carts"""
+
+    def setUp(self):
+        super().setUp()
+        self.pizza = self.product('Pizza', 'Dough', stock=Decimal('1000'))
+        self.pasta = self.product('Pasta', 'Cheese', stock=Decimal('3'))
+
+    def product(self, name, ingredient_name, stock):
+        product = Product.objects.create(name=name, price=Decimal('100'), stock=10, requires_bom=True)
+        ingredient = Ingredient.objects.create(name=ingredient_name, current_stock=stock, unit='g')
+        recipe = RecipeItem.objects.create(product=product, created_by=self.admin)
+        RecipeIngredient.objects.create(recipe=recipe, ingredient=ingredient, quantity=Decimal('5'))
+        return product
+
+    def sync(self, url_name, ops, status=200):
+        response = self.client.post(reverse(url_name), json.dumps({'ops': ops}), content_type='application/json')
+        self.assertEqual(response.status_code, status, response.content)
+        return response.json()
+
+    def cart(self, url_name):
+        return {item['product_id']: item['quantity'] for item in self.client.get(reverse(url_name)).json()['cart']['items']}
+
+    def test_mixed_batch(self):
+        self.sync('kiosk:cart_sync', [{'op': 'add', 'product_id': self.pasta.pk}])
+        data = self.sync('kiosk:cart_sync', [
+            {'op': 'clear'},
+            {'op': 'add', 'product_id': self.pizza.pk, 'quantity': 1},
+            {'op': 'add', 'product_id': self.pizza.pk, 'quantity': 1},
+            {'op': 'set', 'product_id': self.pizza.pk, 'quantity': 3},
+            {'op': 'add', 'product_id': self.pasta.pk},
+            {'op': 'remove', 'product_id': self.pasta.pk},
+        ])
+
+        self.assertTrue(data['success'])
+        self.assertEqual([result.get('quantity') for result in data['results']], [None, 1, 2, 3, 1, None])
+        self.assertEqual((data['cart']['cart_count'], data['cart']['total']), (3, 300.0))
+        self.assertEqual(self.cart('kiosk:cart_sync'), {self.pizza.pk: 3})
+
+    def test_failed_operations_are_reported(self):
+        data = self.sync('kiosk:cart_sync', [
+            {'op': 'remove', 'product_id': self.pizza.pk},
+            {'op': 'set', 'product_id': self.pizza.pk, 'quantity': 0},
+            {'op': 'add', 'product_id': self.pizza.pk, 'quantity': 11},
+            {'op': 'add', 'product_id': 999999},
+        ])
+        self.assertFalse(data['success'])
+        self.assertEqual([result['message'] for result in data['results']], [
+            'Product not in cart', 'Quantity must be at least 1', 'Only 10 items available in stock',
+            'Product not found',
+        ])
+        self.assertEqual(self.cart('kiosk:cart_sync'), {})
+
+    def test_malformed_batch_applies_nothing(self):
+        self.sync('kiosk:cart_sync', [{'op': 'add', 'product_id': self.pizza.pk}])
+        for bad in ({'op': 'explode'}, {'op': 'set', 'product_id': 'abc'}, {'op': 'add'}, 'clear'):
+            with self.subTest(bad=bad):
+                data = self.sync('kiosk:cart_sync', [
+                    {'op': 'clear'}, {'op': 'add', 'product_id': self.pasta.pk}, bad,
+                ], status=400)
+                self.assertFalse(data['success'])
+                self.assertEqual(self.cart('kiosk:cart_sync'), {self.pizza.pk: 1})
+        self.sync('kiosk:cart_sync', {'op': 'clear'}, status=400)
+
+    def test_kiosk_keeps_short_products_with_a_warning(self):
+        data = self.sync('kiosk:cart_sync', [{'op': 'add', 'product_id': self.pasta.pk}])
+        result = data['results'][0]
+        self.assertTrue(result['success'])
+        self.assertEqual(result['warning'], '⚠️ Limited ingredients: Cheese (3/5 g)')
+        self.assertEqual(self.cart('kiosk:cart_sync'), {self.pasta.pk: 1})
+
+    def test_pos_rolls_back_short_products(self):
+        self.login(self.cashier)
+        self.sync('orders:pos_cart_sync', [{'op': 'add', 'product_id': self.pizza.pk}])
+        data = self.sync('orders:pos_cart_sync', [
+            {'op': 'set', 'product_id': self.pizza.pk, 'quantity': 2},
+            {'op': 'add', 'product_id': self.pasta.pk},
+        ])
+
+        pasta = data['results'][1]
+        self.assertFalse(data['success'])
+        self.assertEqual(pasta['message'], 'Not enough ingredients available. Cheese is short.')
+        self.assertEqual(pasta['shortages'][0]['ingredient'], 'Cheese')
+        self.assertEqual(self.cart('orders:pos_cart_sync'), {self.pizza.pk: 2})
+
+    def test_methods(self):
+        self.login(self.cashier)
+        for url_name in ('kiosk:cart_sync', 'orders:pos_cart_sync'):
+            with self.subTest(url_name=url_name):
+                self.assertEqual(self.client.put(reverse(url_name)).status_code, 405)
+                self.assertEqual(self.client.get(reverse(url_name)).status_code, 200)
+
+class OrderStreamResyncTests(QueryBudgetTestCase):
+    """The all-orders stream picks up orders changed by other worker processes"""
+
+    async def test_all_orders_resync(self):
+        resync = await all_orders_resync()
+        self.assertEqual(await resync({}), [])
+
+        # Another worker creates an order: no broker event here, only the shared sequence moves
+        order = await Order.objects.acreate(customer_name='Elsewhere', total_amount=100)
+        order_board.mark_changed()
+        events = await resync({})
+        self.assertEqual([event['order_number'] for event in events], [order.order_number])
+        self.assertEqual(await resync({}), [])  # sequence unchanged since
+
+        # Orders whose current state the stream already sent are skipped
+        order_board.mark_changed()
+        sent = {order.order_number: (events[0]['status'], events[0]['updated_at'])}
+        self.assertEqual(await resync(sent), [])
+
+    async def test_all_orders_resync_overflow(self):
+        resync = await all_orders_resync()
+        await Order.objects.abulk_create([
+            Order(order_number=f'BULK{n}', customer_name='Bulk', total_amount=1)
+            for n in range(SUBSCRIBER_QUEUE_SIZE + 1)
+        ])
+        order_board.mark_changed()
+        self.assertIsNone(await resync({}))  # too many changes: the client reloads instead
+
+
+class KioskAsyncViewTests(QueryBudgetTestCase):
+    """Read-only kiosk views served natively async, as under the ASGI server"""
+
+    def setUp(self):
+        super().setUp()
+        self.grow(2)
+
+    async def test_home(self):
+        response = await self.async_client.get(reverse('kiosk:home'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['menu']['products']), 2)
+
+    async def test_order_status(self):
+        order = await Order.objects.afirst()
+        response = await self.async_client.get(reverse('kiosk:order_status', args=[order.order_number]))
+        self.assertContains(response, order.order_number)
+
+    async def test_order_status_not_found(self):
+        response = await self.async_client.get(reverse('kiosk:order_status', args=['missing']))
+        self.assertRedirects(response, reverse('kiosk:home'), fetch_redirect_response=False)
+
+    async def test_search_order(self):
+        order = await Order.objects.afirst()
+        response = await self.async_client.post(
+            reverse('kiosk:search_order'), {'order_number': order.order_number}, content_type='application/json'
+        )
+        self.assertEqual(response.json()['order']['order_number'], order.order_number)
+        self.assertEqual(len(response.json()['order']['items']), 1)
+
+    async def test_get_cart_details(self):
+        response = await self.async_client.post(
+            reverse('kiosk:get_cart_details'), {'product_ids': [p.pk for p in self.products]},
+            content_type='application/json',
+        )
+        self.assertEqual(set(response.json()['products']), {str(p.pk) for p in self.products})
+
+
+class MenuSnapshotTests(QueryBudgetTestCase):
+    """The kiosk menu snapshot follows catalog changes and is served conditionally"""
+
+    def setUp(self):
+        super().setUp()
+        self.grow(2)
+
+    def test_not_modified(self):
+        response = self.client.get(reverse('kiosk:menu'))
+        etag = response['ETag']
+        self.assertContains(response, self.products[0].name)
+        self.assertIn('no-cache', response['Cache-Control'])
+
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('kiosk:menu'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+    def test_json(self):
+        response = self.client.get(reverse('kiosk:menu'), {'format': 'json'})
+        products = {item['id']: item for item in response.json()['products']}
+        self.assertEqual(products[self.products[0].pk]['price'], '100.00')
+        self.assertTrue(products[self.products[0].pk]['available'])
+
+    def test_product_change(self):
+        etag = self.client.get(reverse('kiosk:menu'))['ETag']
+        product = self.products[0]
+        product.price = '120.00'
+        with self.captureOnCommitCallbacks(execute=True):
+            product.save()
+
+        response = self.client.get(reverse('kiosk:menu'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertContains(response, '120.00')
+
+    def test_ingredient_availability(self):
+        self.client.get(reverse('kiosk:menu'))
+        ingredient = Ingredient.objects.filter(recipeingredient__recipe__product=self.products[0]).first()
+        ingredient.current_stock = 0
+        with self.captureOnCommitCallbacks(execute=True):
+            ingredient.save()
+
+        response = self.client.get(reverse('kiosk:menu'), {'format': 'json'})
+        self.assertNotIn(self.products[0].pk, [item['id'] for item in response.json()['products']])
+
+    def test_unchanged_content_keeps_etag(self):
+        etag = self.client.get(reverse('kiosk:menu'))['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            self.products[1].save()  # bumps the version, renders the same grid
+        response = self.client.get(reverse('kiosk:menu'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_version_bumped_on_commit(self):
+        version = menu_version()
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.products[0].save()
+            # A kiosk request before the commit must not cache the old rows under a new version
+            self.assertEqual(menu_version(), version)
+        for callback in callbacks:
+            callback()
+        self.assertNotEqual(menu_version(), version)
+
+
+class ExpirySchedulerAutostartTests(SimpleTestCase):
+    """Pending orders expire under servers that don't load gunicorn.conf.py"""
+
+    def autostart(self, argv, run_main=None, opt_in=None):
+        environ = {'RUN_MAIN': run_main or '', 'ORDER_EXPIRY_AUTOSTART': opt_in or ''}
+        with mock.patch.object(scheduler, 'start_expiry_scheduler') as start, \
+                mock.patch.dict('os.environ', environ):
+            scheduler.autostart_expiry_scheduler(argv)
+        return start.called
+
+    def test_started_by_servers(self):
+        self.assertTrue(self.autostart(['manage.py', 'runserver'], run_main='true'))
+        self.assertTrue(self.autostart(['manage.py', 'runserver', '--noreload']))
+        self.assertTrue(self.autostart(['/venv/bin/uvicorn', 'sales_inventory_system.sales_inventory.asgi:application']))
+        self.assertTrue(self.autostart(['/venv/lib/uvicorn/__main__.py', 'app']))  # python -m uvicorn
+        self.assertTrue(self.autostart(['/venv/bin/daphne', 'app']))
+        self.assertTrue(self.autostart(['/venv/lib/django/__main__.py', 'runserver', '--noreload']))
+        self.assertTrue(self.autostart(['/venv/bin/waitress-serve', 'app'], opt_in='true'))
+
+    def test_skipped(self):
+        self.assertFalse(self.autostart(['/venv/bin/gunicorn', 'app']))  # post_worker_init starts it
+        self.assertFalse(self.autostart(['manage.py', 'runserver']))  # autoreload parent
+        self.assertFalse(self.autostart(['manage.py', 'migrate']))
+        self.assertFalse(self.autostart(['manage.py', 'test']))
+        self.assertFalse(self.autostart(['seed_data.py']))  # scripts calling django.setup()
+        self.assertFalse(self.autostart(['qa_test.py']))
+        self.assertFalse(self.autostart(['/venv/lib/django/__main__.py', 'migrate']))  # python -m django
+        self.assertFalse(self.autostart(['/venv/bin/pytest', '-q']))
+        self.assertFalse(self.autostart(['/venv/lib/pytest/__main__.py']))
+        self.assertFalse(self.autostart(['']))  # interactive python
+        self.assertFalse(self.autostart([]))
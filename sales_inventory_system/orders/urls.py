@@ -1,10 +1,11 @@
 from django.urls import path
-from . import views
+from . import views, stream_views
 
 app_name = 'orders'
 
 urlpatterns = [
     path('', views.order_list, name='list'),
+    path('events/', stream_views.all_order_events, name='events'),
 
     # NEW POS Flow (Optimized)
     path('pos/', views.pos_home, name='pos_home'),
@@ -13,6 +14,7 @@ urlpatterns = [
     path('pos/update-cart/<int:product_id>/', views.pos_update_cart_quantity, name='pos_update_cart'),
     path('pos/get-cart/', views.pos_get_cart, name='pos_get_cart'),
     path('pos/get-cart-details/', views.pos_get_cart_details, name='pos_get_cart_details'),
+    path('pos/cart/sync/', views.pos_cart_sync, name='pos_cart_sync'),
     path('pos/cart/', views.pos_cart_view, name='pos_cart'),
     path('pos/checkout/', views.pos_checkout, name='pos_checkout'),
     path('pos/order/<str:order_number>/', views.pos_confirmation, name='pos_confirmation'),
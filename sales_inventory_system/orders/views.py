@@ -3,21 +3,77 @@ from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.http import HttpResponse, JsonResponse
 from django.db import transaction
-from django.db.models import Q
+from django.db.models import F
 from django.core.paginator import Paginator
 from django.utils import timezone
+from django.views.decorators.http import require_http_methods
+from collections import defaultdict
 from datetime import timedelta
+import time
+from sales_inventory_system.sales_inventory.conditional import conditional_json, table_changes
+from sales_inventory_system.sales_inventory.pagination import KeysetPaginator, keyset_pagination_data
+from sales_inventory_system.sales_inventory.search import search_filter
+from sales_inventory_system.sales_inventory.serialization import as_float, format_rows, json_response
+from sales_inventory_system.sales_inventory.timing import ServerTiming
+from sales_inventory_system.sales_inventory.write_queue import serialized_writes
+from . import cart_store
+from .cart_sync import CartSyncError, sync_cart
+from .events import publish_order_event
 from .models import Order, OrderItem, Payment
 from sales_inventory_system.products.models import Product
-from sales_inventory_system.system.models import AuditTrail
+from sales_inventory_system.products.thumbnails import variant_url
+from sales_inventory_system.system.models import AuditTrail, Archive
+
+
+def order_list_values(orders):
+    """The order list's JSON columns as values() rows"""
+    return orders.values(
+        'id', 'order_number', 'customer_name', 'table_number', 'status', 'created_at',
+        total=as_float('total_amount'), payment_status=F('payment__status'),
+    )
+
+
+def order_list_rows(rows):
+    """Turn order_list_values() rows into the order list's JSON rows, in place"""
+    items = defaultdict(list)
+    for order_id, quantity, product_name in OrderItem.objects.filter(
+        order_id__in=[row['id'] for row in rows]
+    ).values_list('order_id', 'quantity', 'product_name'):
+        items[order_id].append(f"{quantity}x {product_name}")
+
+    for row in rows:
+        items_list = items[row['id']]
+        row['items_summary'] = ", ".join(items_list[:2])  # First 2 items
+        if len(items_list) > 2:
+            row['items_summary'] += f", +{len(items_list) - 2} more"
+        row['status_display'] = row['status']
+
+    return format_rows(
+        rows,
+        rename={'total': 'total_amount'},
+        datetimes={'created_at': '%b %d, %Y %I:%M %p'},
+        choices={'status_display': Order.STATUS_CHOICES},
+        defaults={'table_number': '-', 'payment_status': 'PENDING'},
+    )
+
+
+def order_list_stamp(request):
+    """Version stamp of the order list's AJAX data (the HTML page is not conditional)"""
+    if request.headers.get('X-Requested-With') != 'XMLHttpRequest':
+        return None
+    stamp = table_changes(Order, OrderItem, Payment)(request)
+    if request.GET.get('time_range', 'all').strip() != 'all':
+        # Relative time windows move on their own; revalidate at least every minute
+        stamp += f':{int(time.time() // 60)}'
+    return stamp
 
 
 @login_required
+@conditional_json(order_list_stamp)
 def order_list(request):
     """Display list of all orders with search, filter, and pagination"""
-
-    # Auto-expire pending orders older than 1 hour
-    Order.expire_old_pending_orders()
+    # Pending orders are expired by the background scheduler (orders.scheduler),
+    # keeping this request path read-only
 
     # Get query parameters
     search = request.GET.get('search', '').strip()
@@ -26,15 +82,11 @@ def order_list(request):
     page_number = request.GET.get('page', 1)
 
     # Base queryset
-    orders = Order.objects.all().select_related('payment').prefetch_related('items__product')
+    orders = Order.objects.all()
 
     # Apply search filter
     if search:
-        orders = orders.filter(
-            Q(order_number__icontains=search) |
-            Q(customer_name__icontains=search) |
-            Q(table_number__icontains=search)
-        )
+        orders = search_filter(orders, search, ['order_number', 'customer_name', 'table_number'])
 
     # Apply status filter
     if status_filter:
@@ -60,41 +112,35 @@ def order_list(request):
     # 'all' or default: no time filter
 
     # Order by most recent
-    orders = orders.order_by('-created_at')
+    orders = orders.order_by('-created_at', '-id')
 
-    # Pagination
-    paginator = Paginator(orders, 20)  # 20 orders per page
-    page_obj = paginator.get_page(page_number)
+    is_ajax = request.headers.get('X-Requested-With') == 'XMLHttpRequest'
+    if is_ajax:
+        # Plain rows for the JSON response (sales_inventory.serialization)
+        page_source = order_list_values(orders)
+    else:
+        # Items carry a snapshot of the product name, so products need not be loaded
+        page_source = orders.select_related('payment').prefetch_related('items')
+
+    # Pagination - AJAX clients can opt into keyset pagination with ?cursor=
+    # (avoids COUNT(*) and OFFSET scans on deep pages)
+    use_cursor = is_ajax and 'cursor' in request.GET
+    if use_cursor:
+        paginator = KeysetPaginator(page_source, 20, ordering=('-created_at', '-id'))
+        page_obj = paginator.get_page(request.GET.get('cursor'), request.GET.get('direction', 'next'))
+    else:
+        paginator = Paginator(page_source, 20)  # 20 orders per page
+        page_obj = paginator.get_page(page_number)
 
     # Check if AJAX request
-    if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
+    if is_ajax:
         # Return JSON for AJAX requests
-        orders_data = []
-        for order in page_obj:
-            # Use prefetched items to avoid N+1 query
-            items = list(order.items.all())  # Already prefetched from queryset
-            items_list = [f"{item.quantity}x {item.product.name}" for item in items]
-            items_summary = ", ".join(items_list[:2])  # First 2 items
-            if len(items_list) > 2:
-                items_summary += f", +{len(items_list) - 2} more"
-
-            orders_data.append({
-                'id': order.id,
-                'order_number': order.order_number,
-                'customer_name': order.customer_name,
-                'table_number': order.table_number or '-',
-                'items_summary': items_summary,
-                'total_amount': float(order.total_amount),
-                'status': order.status,
-                'status_display': order.get_status_display(),
-                'created_at': order.created_at.strftime('%b %d, %Y %I:%M %p'),
-                'payment_status': order.payment.status if hasattr(order, 'payment') else 'PENDING',
-            })
+        orders_data = order_list_rows(list(page_obj))
 
-        return JsonResponse({
-            'success': True,
-            'orders': orders_data,
-            'pagination': {
+        if use_cursor:
+            pagination = keyset_pagination_data(page_obj, 20, request.GET.get('count', 'approx'), orders)
+        else:
+            pagination = {
                 'current_page': page_obj.number,
                 'total_pages': paginator.num_pages,
                 'total_count': paginator.count,
@@ -103,6 +149,11 @@ def order_list(request):
                 'previous_page': page_obj.previous_page_number() if page_obj.has_previous() else None,
                 'next_page': page_obj.next_page_number() if page_obj.has_next() else None,
             }
+
+        return json_response({
+            'success': True,
+            'orders': orders_data,
+            'pagination': pagination,
         })
 
     context = {
@@ -119,9 +170,6 @@ def order_list(request):
 @login_required
 def order_detail(request, pk):
     """Display details of a specific order"""
-    # Auto-expire pending orders older than 1 hour
-    Order.expire_old_pending_orders()
-
     order = get_object_or_404(Order, pk=pk)
 
     context = {
@@ -134,9 +182,6 @@ def order_detail(request, pk):
 @login_required
 def update_order_status(request, pk):
     """Update the status of an order"""
-    # Auto-expire pending orders older than 1 hour
-    Order.expire_old_pending_orders()
-
     if request.method == 'POST':
         try:
             import json
@@ -159,6 +204,7 @@ def update_order_status(request, pk):
             order.status = new_status
             order.processed_by = request.user
             order.save()
+            publish_order_event(order)
 
             # Create audit log
             AuditTrail.objects.create(
@@ -216,7 +262,7 @@ def process_payment(request, pk):
                     'message': f'Payment is already {payment.get_status_display()}'
                 })
 
-            with transaction.atomic():
+            with serialized_writes(timing=ServerTiming.for_request(request)), transaction.atomic():
                 # Update payment status
                 payment.status = 'SUCCESS'
                 payment.processed_by = request.user
@@ -226,6 +272,7 @@ def process_payment(request, pk):
                 order.status = 'IN_PROGRESS'
                 order.processed_by = request.user
                 order.save()
+                publish_order_event(order)
 
                 # Deduct ingredients from order (strict validation via BOMService)
                 try:
@@ -310,7 +357,7 @@ def quick_payment(request, pk):
                 'message': f'Payment is already {payment.get_status_display()}'
             })
 
-        with transaction.atomic():
+        with serialized_writes(timing=ServerTiming.for_request(request)), transaction.atomic():
             # Update payment status
             payment.status = 'SUCCESS'
             payment.processed_by = request.user
@@ -320,6 +367,7 @@ def quick_payment(request, pk):
             order.status = 'IN_PROGRESS'
             order.processed_by = request.user
             order.save()
+            publish_order_event(order)
 
             # Deduct ingredients from order
             try:
@@ -369,9 +417,7 @@ def pos_home(request):
         is_archived=False
     ).order_by('category', 'name')
 
-    # Initialize cart in session if not exists
-    if 'pos_cart' not in request.session:
-        request.session['pos_cart'] = {}
+    cart = cart_store.load_cart(request, cart_store.POS)
 
     # Mark all as available initially (will be validated in add_to_cart)
     for product in products:
@@ -379,8 +425,8 @@ def pos_home(request):
 
     context = {
         'products': products,
-        'cart': request.session.get('pos_cart', {}),
-        'cart_count': len(request.session.get('pos_cart', {})),
+        'cart': cart,
+        'cart_count': len(cart),
     }
     return render(request, 'orders/pos_home_optimized.html', context)
 
@@ -403,16 +449,13 @@ def pos_add_to_cart(request, product_id):
             'shortages': availability['shortages']
         })
 
-    # Initialize cart if not exists
-    if 'pos_cart' not in request.session:
-        request.session['pos_cart'] = {}
-
-    cart = request.session['pos_cart']
+    cart = cart_store.load_cart(request, cart_store.POS)
     product_key = str(product_id)
 
     # Add or update quantity
     if product_key in cart:
         cart[product_key]['quantity'] += quantity
+        cart[product_key]['subtotal'] = cart[product_key]['price'] * cart[product_key]['quantity']
     else:
         cart[product_key] = {
             'product_id': product_id,
@@ -422,7 +465,7 @@ def pos_add_to_cart(request, product_id):
             'subtotal': float(product.price) * quantity,
         }
 
-    request.session.modified = True
+    cart_store.save_cart(request, cart_store.POS, cart)
 
     # Calculate cart total
     total = sum(item['subtotal'] for item in cart.values())
@@ -438,15 +481,15 @@ def pos_add_to_cart(request, product_id):
 @login_required
 def pos_remove_from_cart(request, product_id):
     """AJAX endpoint to remove product from cart"""
-    if 'pos_cart' not in request.session:
+    cart = cart_store.load_cart(request, cart_store.POS)
+    if not cart:
         return JsonResponse({'success': False, 'message': 'Cart is empty'})
 
-    cart = request.session['pos_cart']
     product_key = str(product_id)
 
     if product_key in cart:
         del cart[product_key]
-        request.session.modified = True
+        cart_store.save_cart(request, cart_store.POS, cart)
 
         total = sum(item['subtotal'] for item in cart.values()) if cart else 0
 
@@ -465,7 +508,8 @@ def pos_update_cart_quantity(request, product_id):
     """AJAX endpoint to update product quantity in cart"""
     from sales_inventory_system.products.inventory_service import BOMService
 
-    if 'pos_cart' not in request.session:
+    cart = cart_store.load_cart(request, cart_store.POS)
+    if not cart:
         return JsonResponse({'success': False, 'message': 'Cart is empty'})
 
     product = get_object_or_404(Product, pk=product_id, is_archived=False)
@@ -484,13 +528,12 @@ def pos_update_cart_quantity(request, product_id):
             'message': f'Not enough ingredients. {availability["shortages"][0]["ingredient"]} is short.',
         })
 
-    cart = request.session['pos_cart']
     product_key = str(product_id)
 
     if product_key in cart:
         cart[product_key]['quantity'] = new_quantity
         cart[product_key]['subtotal'] = float(product.price) * new_quantity
-        request.session.modified = True
+        cart_store.save_cart(request, cart_store.POS, cart)
 
         total = sum(item['subtotal'] for item in cart.values())
 
@@ -504,9 +547,10 @@ def pos_update_cart_quantity(request, product_id):
 
 
 @login_required
+@conditional_json(lambda request: cart_store.cart_stamp(request, cart_store.POS), per_user=False)
 def pos_get_cart(request):
     """AJAX endpoint to get cart as JSON"""
-    cart = request.session.get('pos_cart', {})
+    cart = cart_store.load_cart(request, cart_store.POS)
     # Return simplified cart data (product_id: quantity)
     simplified_cart = {product_id: item['quantity'] for product_id, item in cart.items()}
     return JsonResponse(simplified_cart)
@@ -535,7 +579,7 @@ def pos_get_cart_details(request):
                 'id': product.id,
                 'name': product.name,
                 'price': float(product.price),
-                'image': product.image.url if product.image else None,
+                'image': variant_url(product, 160),  # cart thumbnail
             }
 
         return JsonResponse({'success': True, 'products': product_details})
@@ -544,10 +588,35 @@ def pos_get_cart_details(request):
         return JsonResponse({'success': False, 'message': str(e)})
 
 
+@login_required
+@require_http_methods(["GET", "POST"])
+def pos_cart_sync(request):
+    """
+    AJAX endpoint to apply a batch of cart operations and return the full cart.
+
+    POST {"ops": [...]} (see orders.cart_sync); GET returns the cart unchanged.
+    """
+    timing = ServerTiming.for_request(request)
+    ops = []
+    if request.method == 'POST':
+        try:
+            import json
+            ops = json.loads(request.body or b'{}').get('ops', [])
+        except (ValueError, AttributeError):
+            return JsonResponse({'success': False, 'message': 'Invalid request'}, status=400)
+
+    try:
+        data = sync_cart(request, cart_store.POS, ops, timing=timing)
+    except CartSyncError as e:
+        return JsonResponse({'success': False, 'message': str(e)}, status=400)
+
+    return timing.apply(JsonResponse(data))
+
+
 @login_required
 def pos_cart_view(request):
     """Display POS cart"""
-    cart = request.session.get('pos_cart', {})
+    cart = cart_store.load_cart(request, cart_store.POS)
 
     # Get all products at once for efficiency
     if cart:
@@ -570,7 +639,7 @@ def pos_cart_view(request):
 @login_required
 def pos_checkout(request):
     """Checkout form with customer details and payment"""
-    cart = request.session.get('pos_cart', {})
+    cart = cart_store.load_cart(request, cart_store.POS)
 
     if not cart:
         messages.error(request, 'Your cart is empty!')
@@ -605,7 +674,7 @@ def pos_checkout(request):
                 messages.error(request, shortage_msg)
                 return redirect('orders:pos_checkout')
 
-            with transaction.atomic():
+            with serialized_writes(timing=ServerTiming.for_request(request)), transaction.atomic():
                 # Calculate total amount FIRST
                 total_amount = 0
                 order_items = []
@@ -670,10 +739,10 @@ def pos_checkout(request):
                         'payment_method': payment_method
                     }
                 )
+                publish_order_event(order, 'created')
 
-                # Clear cart
-                request.session['pos_cart'] = {}
-                request.session.modified = True
+                # Clear cart once the order is committed
+                transaction.on_commit(lambda: cart_store.clear_cart(request, cart_store.POS))
 
                 messages.success(request, f'Order {order.order_number} created successfully!')
                 return redirect('orders:pos_confirmation', order_number=order.order_number)
@@ -880,11 +949,12 @@ def order_archive(request, pk):
         return redirect('orders:list')
 
     order = get_object_or_404(Order, pk=pk)
-    order.is_archived = True
-    order.save()
+    with transaction.atomic():
+        order.is_archived = True
+        order.save()
+        Archive.record_archiver(order, request.user)
 
     # Create audit log
-    from sales_inventory_system.system.models import AuditTrail
     AuditTrail.objects.create(
         user=request.user,
         action='ARCHIVE',
@@ -910,11 +980,11 @@ def order_unarchive(request, pk):
         return redirect('orders:list')
 
     order = get_object_or_404(Order, pk=pk, is_archived=True)
+    # Saving drops the archive entry (system.signals)
     order.is_archived = False
     order.save()
 
     # Create audit log
-    from sales_inventory_system.system.models import AuditTrail
     AuditTrail.objects.create(
         user=request.user,
         action='RESTORE',
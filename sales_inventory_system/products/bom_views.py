@@ -15,6 +15,7 @@ from .models import (
     PhysicalCount, VarianceRecord, Product
 )
 from .inventory_service import BOMService
+from sales_inventory_system.sales_inventory.serialization import as_float, format_rows, json_response
 import json
 import csv
 from io import StringIO
@@ -28,11 +29,10 @@ def bom_dashboard(request):
     # Low stock ingredients
     low_stock = BOMService.get_low_stock_ingredients()[:5]
 
-    # Low stock products (calculated from ingredients) - optimized with prefetch_related
-    all_active_products = Product.objects.filter(
-        is_archived=False
-    ).prefetch_related('recipe__ingredients__ingredient')
-    low_stock_products = [p for p in all_active_products if p.calculated_stock < p.threshold][:5]
+    # Low stock products (producible units from ingredients)
+    low_stock_products = Product.objects.filter(
+        is_archived=False, producible_units__lt=F('threshold')
+    ).order_by('name')[:5]
 
     # Stock transactions this week
     week_ago = timezone.now() - timedelta(days=7)
@@ -81,6 +81,10 @@ def ingredient_usage_report(request):
     end_date = timezone.now()
     start_date = end_date - timedelta(days=days)
 
+    # AJAX requests only need per-ingredient totals, aggregated in SQL
+    if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
+        return ingredient_usage_json(days, start_date, end_date)
+
     # Get all transactions in a single database query - optimized for performance
     all_transactions = StockTransaction.objects.filter(
         created_at__gte=start_date,
@@ -145,62 +149,6 @@ def ingredient_usage_report(request):
     top_cost_items = sorted_by_cost[:5]
     top_used_items = sorted_by_quantity[:5]
 
-    # Handle AJAX requests for async filtering
-    if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
-        # Prepare data for JSON response
-        usage_data = []
-        total_cost_value = float(total_cost) if total_cost > 0 else 0
-
-        for item in sorted_by_cost:
-            percentage = (item['cost'] / total_cost_value * 100) if total_cost_value > 0 else 0
-            usage_data.append({
-                'ingredient_id': item['ingredient'].id,
-                'ingredient_name': item['ingredient'].name,
-                'ingredient_unit': item['ingredient'].unit,
-                'total_quantity': float(item['total_quantity']),
-                'cost': float(item['cost']),
-                'transactions_count': item['transactions_count'],
-                'percentage_of_total': percentage
-            })
-
-        # Prepare top cost items
-        top_cost_data = []
-        for item in top_cost_items:
-            percentage = (item['cost'] / total_cost_value * 100) if total_cost_value > 0 else 0
-            top_cost_data.append({
-                'ingredient_id': item['ingredient'].id,
-                'ingredient_name': item['ingredient'].name,
-                'total_quantity': float(item['total_quantity']),
-                'cost': float(item['cost']),
-                'percentage_of_total': percentage
-            })
-
-        # Prepare top used items
-        top_used_data = []
-        for item in top_used_items:
-            top_used_data.append({
-                'ingredient_id': item['ingredient'].id,
-                'ingredient_name': item['ingredient'].name,
-                'total_quantity': float(item['total_quantity']),
-                'unit': item['ingredient'].unit
-            })
-
-        return JsonResponse({
-            'success': True,
-            'days': days,
-            'period_start': start_date.strftime('%Y-%m-%d'),
-            'period_end': end_date.strftime('%Y-%m-%d'),
-            'summary_stats': {
-                'total_ingredients': len(usage_summary),
-                'total_used': float(total_used),
-                'total_cost': float(total_cost),
-                'avg_cost': float(avg_cost)
-            },
-            'usage_summary': usage_data,
-            'top_cost_items': top_cost_data,
-            'top_used_items': top_used_data
-        })
-
     # Handle downloads
     if download == 'csv':
         return generate_usage_csv_download(usage_summary, days)
@@ -223,6 +171,70 @@ def ingredient_usage_report(request):
     return render(request, 'products/ingredient_usage_report_enhanced.html', context)
 
 
+def ingredient_usage_json(days, start_date, end_date):
+    """
+    JSON for the ingredient usage report, one values() row per ingredient
+    (see sales_inventory.serialization) instead of every transaction.
+    """
+    usage_data = list(
+        StockTransaction.objects.filter(
+            created_at__gte=start_date,
+            created_at__lte=end_date,
+            ingredient__is_active=True
+        ).order_by('ingredient__name', 'ingredient_id').values('ingredient_id').annotate(
+            ingredient_name=F('ingredient__name'),
+            ingredient_unit=F('ingredient__unit'),
+            total_quantity=as_float(Sum('quantity', filter=Q(transaction_type__in=['DEDUCTION', 'PREP']))),
+            transactions_count=Count('id'),
+        )
+    )
+
+    # Note: cost calculation not applicable with simplified ingredient system
+    total_cost = 0.0
+    for row in usage_data:
+        row['total_quantity'] = row['total_quantity'] or 0.0
+        row['cost'] = 0.0
+        row['percentage_of_total'] = (row['cost'] / total_cost * 100) if total_cost > 0 else 0
+    total_used = sum(row['total_quantity'] for row in usage_data)
+
+    # Rows are in ingredient name order, which the stable sort by cost keeps
+    sorted_by_cost = sorted(usage_data, key=lambda row: row['cost'], reverse=True)
+    sorted_by_quantity = sorted(usage_data, key=lambda row: row['total_quantity'], reverse=True)
+
+    return json_response({
+        'success': True,
+        'days': days,
+        'period_start': start_date.strftime('%Y-%m-%d'),
+        'period_end': end_date.strftime('%Y-%m-%d'),
+        'summary_stats': {
+            'total_ingredients': len(usage_data),
+            'total_used': float(total_used),
+            'total_cost': total_cost,
+            'avg_cost': total_cost / total_used if total_used > 0 else 0.0
+        },
+        'usage_summary': sorted_by_cost,
+        'top_cost_items': [
+            {
+                'ingredient_id': row['ingredient_id'],
+                'ingredient_name': row['ingredient_name'],
+                'total_quantity': row['total_quantity'],
+                'cost': row['cost'],
+                'percentage_of_total': row['percentage_of_total']
+            }
+            for row in sorted_by_cost[:5]
+        ],
+        'top_used_items': [
+            {
+                'ingredient_id': row['ingredient_id'],
+                'ingredient_name': row['ingredient_name'],
+                'total_quantity': row['total_quantity'],
+                'unit': row['ingredient_unit']
+            }
+            for row in sorted_by_quantity[:5]
+        ]
+    })
+
+
 def generate_usage_csv_download(usage_summary, days):
     """Generate CSV report for ingredient usage"""
     response = HttpResponse(content_type='text/csv')
@@ -493,40 +505,41 @@ def waste_report(request):
 
     waste_logs = waste_logs.order_by('-waste_date')
 
-    # Aggregate by type
-    waste_by_type = {}
-    total_cost = 0
-    for waste in waste_logs:
-        waste_t = waste.get_waste_type_display()
-        if waste_t not in waste_by_type:
-            waste_by_type[waste_t] = {
-                'count': 0,
-                'quantity': 0,
-                'cost': 0
-            }
-        waste_by_type[waste_t]['count'] += 1
-        waste_by_type[waste_t]['quantity'] += float(waste.quantity)
-        waste_by_type[waste_t]['cost'] += float(waste.cost_impact)
-        total_cost += float(waste.cost_impact)
+    # Aggregate by type in SQL, most recent type first
+    waste_types = dict(WasteLog.WASTE_TYPES)
+    waste_by_type = {
+        waste_types.get(row['waste_type'], row['waste_type']): {
+            'count': row['count'],
+            'quantity': row['quantity'] or 0.0,
+            'cost': 0.0,  # WasteLog.cost_impact: not applicable with simplified ingredient system
+        }
+        for row in waste_logs.order_by().values('waste_type').annotate(
+            count=Count('id'), quantity=as_float(Sum('quantity')), latest=Max('waste_date'),
+        ).order_by('-latest')
+    }
+    total_cost = sum(entry['cost'] for entry in waste_by_type.values())
 
     # Check if this is an AJAX request
     if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
-        # Return JSON for async filtering
-        waste_logs_data = []
-        for waste in waste_logs[:20]:  # Latest 20
-            waste_logs_data.append({
-                'id': waste.id,
-                'ingredient_name': waste.ingredient.name if waste.ingredient else 'Unknown',
-                'waste_type': waste.get_waste_type_display(),
-                'quantity': float(waste.quantity),
-                'unit': waste.ingredient.unit if waste.ingredient else '',
-                'cost_impact': float(waste.cost_impact),
-                'reason': waste.reason or '',
-                'waste_date': waste.waste_date.strftime('%b %d, %Y %I:%M %p'),
-                'reported_by': waste.reported_by.username if waste.reported_by else 'Unknown',
-            })
-
-        return JsonResponse({
+        # Return JSON for async filtering, built from values() rows (sales_inventory.serialization)
+        waste_logs_data = list(waste_logs.values(
+            'id', 'waste_type', 'reason', 'waste_date',
+            ingredient_name=F('ingredient__name'),
+            unit=F('ingredient__unit'),
+            quantity_value=as_float('quantity'),
+            reporter=F('reported_by__username'),
+        )[:20])  # Latest 20
+        for row in waste_logs_data:
+            row['cost_impact'] = 0.0
+        format_rows(
+            waste_logs_data,
+            rename={'quantity_value': 'quantity', 'reporter': 'reported_by'},
+            datetimes={'waste_date': '%b %d, %Y %I:%M %p'},
+            choices={'waste_type': WasteLog.WASTE_TYPES},
+            defaults={'ingredient_name': 'Unknown', 'unit': '', 'reason': '', 'reported_by': 'Unknown'},
+        )
+
+        return json_response({
             'success': True,
             'waste_logs': waste_logs_data,
             'waste_by_type': waste_by_type,
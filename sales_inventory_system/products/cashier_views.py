@@ -1,6 +1,7 @@
 from django.shortcuts import render
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.http import JsonResponse
+from sales_inventory_system.sales_inventory.conditional import conditional_json, table_changes
 from .models import Ingredient
 
 
@@ -42,7 +43,7 @@ def api_toggle_ingredient_availability(request):
 
             # Toggle availability
             ingredient.is_available = not ingredient.is_available
-            ingredient.save()
+            ingredient.save(update_fields=['is_available', 'updated_at'])
 
             return JsonResponse({
                 'success': True,
@@ -71,14 +72,15 @@ def api_toggle_ingredient_availability(request):
 
 @login_required
 @user_passes_test(is_cashier)
-def api_get_ingredients(request):
+@conditional_json(table_changes(Ingredient))
+async def api_get_ingredients(request):
     """API endpoint to get all ingredients with current availability"""
 
     try:
         ingredients = Ingredient.objects.filter(is_active=True).order_by('name')
 
         ingredients_data = []
-        for ingredient in ingredients:
+        async for ingredient in ingredients:
             ingredients_data.append({
                 'id': ingredient.id,
                 'name': ingredient.name,
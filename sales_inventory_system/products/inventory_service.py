@@ -17,6 +17,7 @@ from .models import (
     RecipeItem, StockTransaction, Ingredient,
     VarianceRecord, WasteLog, PhysicalCount
 )
+from .producible import deferred_refresh
 
 
 class IngredientDeductionError(Exception):
@@ -47,8 +48,13 @@ class BOMService:
 
         try:
             with transaction.atomic():
+                # Load items with their recipes and ingredients once for both passes
+                order_items = list(order.items.select_related('product__recipe').prefetch_related(
+                    'product__recipe__ingredients__ingredient'
+                ))
+
                 # FIRST PASS: Validate all products have recipes and ingredients are sufficient
-                for order_item in order.items.all():
+                for order_item in order_items:
                     product = order_item.product
                     quantity = order_item.quantity
 
@@ -72,8 +78,12 @@ class BOMService:
                                 f"Need {total_needed} {ingredient.unit}, but only {ingredient.current_stock} available."
                             )
 
-                # SECOND PASS: Perform actual deductions (only if all validations passed)
-                for order_item in order.items.all():
+                # SECOND PASS: Perform actual deductions (only if all validations passed).
+                # Prefetching shares one instance per ingredient, so an ingredient used
+                # by several items accumulates its deductions and is saved once.
+                changed_ingredients = {}
+                stock_transactions = []
+                for order_item in order_items:
                     product = order_item.product
                     quantity = order_item.quantity
                     recipe = product.recipe  # Already validated to exist
@@ -84,10 +94,10 @@ class BOMService:
 
                         # Deduct from ingredient stock
                         ingredient.current_stock -= total_needed
-                        ingredient.save()
+                        changed_ingredients[ingredient.pk] = ingredient
 
-                        # Create stock transaction
-                        StockTransaction.objects.create(
+                        # Stock transaction, inserted in one batch below
+                        stock_transactions.append(StockTransaction(
                             ingredient=ingredient,
                             transaction_type='DEDUCTION',
                             quantity=total_needed,
@@ -96,7 +106,7 @@ class BOMService:
                             reference_id=order.id,
                             notes=f"Deduction for {product.name} (Order: {order.order_number})",
                             recorded_by=user
-                        )
+                        ))
 
                         deductions.append({
                             'ingredient': ingredient.name,
@@ -106,6 +116,12 @@ class BOMService:
                             'remaining_stock': ingredient.current_stock
                         })
 
+                # One producible units refresh for all products using these ingredients
+                with deferred_refresh():
+                    for ingredient in changed_ingredients.values():
+                        ingredient.save()
+                StockTransaction.objects.bulk_create(stock_transactions)
+
                 return {
                     'success': True,
                     'deductions': deductions,
@@ -119,38 +135,18 @@ class BOMService:
             raise IngredientDeductionError(f"Error deducting ingredients: {str(e)}")
 
     @staticmethod
-    def check_ingredient_availability(product_id, quantity=1):
+    def _recipe_availability(recipe, quantity):
         """
-        Check if a product has sufficient ingredients available.
-        STRICT: Products MUST have recipes defined.
+        Availability of one recipe for a quantity, shared by
+        check_ingredient_availability and check_bulk_availability.
 
         Args:
-            product_id: Product ID
+            recipe: RecipeItem with 'ingredients__ingredient' prefetched
             quantity: Quantity to produce
 
         Returns:
             dict: Availability status with shortage details
         """
-        try:
-            recipe = RecipeItem.objects.prefetch_related(
-                'ingredients__ingredient'
-            ).get(product_id=product_id)
-        except RecipeItem.DoesNotExist:
-            # STRICT: Product MUST have a recipe
-            from .models import Product
-            try:
-                product = Product.objects.get(id=product_id)
-                product_name = product.name
-            except Product.DoesNotExist:
-                product_name = f"Product #{product_id}"
-
-            return {
-                'available': False,
-                'has_recipe': False,
-                'error': f"Product '{product_name}' does not have a recipe defined. All products must have recipes.",
-                'shortages': []
-            }
-
         shortages = []
 
         for recipe_ingredient in recipe.ingredients.all():
@@ -185,6 +181,84 @@ class BOMService:
             'total_shortages': len(shortages)
         }
 
+    @staticmethod
+    def check_ingredient_availability(product_id, quantity=1):
+        """
+        Check if a product has sufficient ingredients available.
+        STRICT: Products MUST have recipes defined.
+
+        Args:
+            product_id: Product ID
+            quantity: Quantity to produce
+
+        Returns:
+            dict: Availability status with shortage details
+        """
+        try:
+            recipe = RecipeItem.objects.prefetch_related(
+                'ingredients__ingredient'
+            ).get(product_id=product_id)
+        except RecipeItem.DoesNotExist:
+            # STRICT: Product MUST have a recipe
+            from .models import Product
+            try:
+                product = Product.objects.get(id=product_id)
+                product_name = product.name
+            except Product.DoesNotExist:
+                product_name = f"Product #{product_id}"
+
+            return {
+                'available': False,
+                'has_recipe': False,
+                'error': f"Product '{product_name}' does not have a recipe defined. All products must have recipes.",
+                'shortages': []
+            }
+
+        return BOMService._recipe_availability(recipe, quantity)
+
+    @staticmethod
+    def check_bulk_availability(quantities, recipes=None):
+        """
+        Check ingredient availability for several products at once.
+
+        Same result per product as check_ingredient_availability, but all
+        recipes and ingredients are loaded in one batch instead of per product.
+
+        Args:
+            quantities: dict of {product_id: quantity}
+            recipes: optional dict of {product_id: RecipeItem} with
+                'ingredients__ingredient' prefetched; loaded when omitted
+
+        Returns:
+            dict: {product_id: availability dict}
+        """
+        if not quantities:
+            return {}
+
+        if recipes is None:
+            recipes = {
+                recipe.product_id: recipe
+                for recipe in RecipeItem.objects.filter(
+                    product_id__in=list(quantities)
+                ).prefetch_related('ingredients__ingredient')
+            }
+
+        results = {}
+        for product_id, quantity in quantities.items():
+            recipe = recipes.get(product_id)
+            if recipe is None:
+                results[product_id] = {
+                    'available': False,
+                    'has_recipe': False,
+                    'error': "Product does not have a recipe defined. All products must have recipes.",
+                    'shortages': []
+                }
+                continue
+
+            results[product_id] = BOMService._recipe_availability(recipe, quantity)
+
+        return results
+
     @staticmethod
     def log_waste(ingredient_id, quantity, waste_type='WASTE', reason='', user=None):
         """
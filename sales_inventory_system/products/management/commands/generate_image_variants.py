@@ -0,0 +1,31 @@
+"""
+Management command to generate the resized variants of product images
+Run with: python manage.py generate_image_variants
+
+Uploads get their variants from products.signals; this backfills images
+uploaded before products.thumbnails existed (hashing them so templates
+switch to the variants) and any variant missing from storage. Variants
+are otherwise generated on first request, so running it is optional.
+"""
+from django.core.management.base import BaseCommand
+from sales_inventory_system.products.models import Product
+from sales_inventory_system.products.thumbnails import content_hash, generate_variants
+
+
+class Command(BaseCommand):
+    help = 'Hash product images and generate their missing WebP/AVIF variants'
+
+    def handle(self, *args, **options):
+        hashed = generated = 0
+        for product in Product.objects.exclude(image='').exclude(image__isnull=True).only('image', 'image_hash'):
+            try:
+                if not product.image_hash:
+                    with product.image.open('rb') as original:
+                        product.image_hash = content_hash(original)
+                    Product.objects.filter(pk=product.pk).update(image_hash=product.image_hash)
+                    hashed += 1
+                generated += generate_variants(product)
+            except (OSError, ValueError) as e:
+                self.stdout.write(self.style.WARNING(f'  Skipped product {product.pk} ({product.image.name}): {e}'))
+
+        self.stdout.write(self.style.SUCCESS(f'Hashed {hashed} images, generated {generated} variants'))
@@ -0,0 +1,19 @@
+"""
+Management command to recompute the stored producible units of every product
+Run with: python manage.py refresh_producible_units
+
+Signals keep Product.producible_units current (see products.producible);
+run this after writes that bypass them, such as bulk imports or raw SQL.
+"""
+from django.core.management.base import BaseCommand
+from sales_inventory_system.orders.menu_snapshot import mark_menu_changed
+from sales_inventory_system.products.producible import refresh_producible_units
+
+
+class Command(BaseCommand):
+    help = 'Recompute Product.producible_units from recipes and ingredient stock'
+
+    def handle(self, *args, **options):
+        updated = refresh_producible_units()
+        mark_menu_changed()
+        self.stdout.write(self.style.SUCCESS(f'Refreshed producible units of {updated} products'))
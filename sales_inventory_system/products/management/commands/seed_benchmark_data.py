@@ -0,0 +1,205 @@
+"""
+Management command to seed configurable data volumes for benchmarks
+Run with: python manage.py seed_benchmark_data --orders 100000 --products 200 --ingredients 150
+
+Starts from the regular seeders (seed_users, seed_pizza_data) and tops the
+catalog and order history (orders with their items, payments and ingredient
+stock movements) up to the requested volumes with bulk inserts,
+so it can be re-run against an existing database to grow it. Random
+choices are seeded, so the same arguments give the same data.
+"""
+
+import io
+import random
+from contextlib import contextmanager
+from datetime import timedelta
+from decimal import Decimal
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from sales_inventory_system.accounts.models import User
+from sales_inventory_system.products.models import Product, Ingredient, RecipeItem, RecipeIngredient, StockTransaction
+from sales_inventory_system.orders.models import Order, OrderItem, Payment
+from sales_inventory_system.orders.menu_snapshot import mark_menu_changed
+from sales_inventory_system.products.producible import refresh_producible_units
+
+CATEGORIES = ['Pizza', 'Pasta', 'Sides', 'Beverages', 'Desserts']
+CUSTOMER_NAMES = ['John Doe', 'Jane Smith', 'Bob Johnson', 'Alice Williams', 'Carlos Lopez',
+                  'Maria Garcia', 'David Lee', 'Sarah Brown', 'Michael Davis', 'Lisa Wilson', '']
+
+# Ingredient stock large enough that benchmark checkouts never run out
+BENCHMARK_STOCK = Decimal('99999999')  # max_digits=10, decimal_places=2
+
+
+@contextmanager
+def explicit_timestamps(*models):
+    """Let bulk_create keep the created_at values we set instead of now()"""
+    fields = [model._meta.get_field('created_at') for model in models]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+class Command(BaseCommand):
+    help = 'Seed (or top up) products, ingredients and order history to benchmark volumes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--orders', type=int, default=10000, help='Total orders wanted (default: 10000)')
+        parser.add_argument('--products', type=int, default=50, help='Total products wanted (default: 50)')
+        parser.add_argument('--ingredients', type=int, default=100, help='Total ingredients wanted (default: 100)')
+        parser.add_argument('--days', type=int, default=90, help='Days of history orders are spread over (default: 90)')
+        parser.add_argument('--seed', type=int, default=42, help='Random seed (default: 42)')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Orders inserted per batch (default: 5000)')
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        verbosity = options['verbosity']
+
+        call_command('seed_users', verbosity=0, stdout=io.StringIO())
+        if not Product.objects.exists():
+            call_command('seed_pizza_data', verbosity=0, stdout=io.StringIO())
+
+        ingredients = self.top_up_ingredients(options['ingredients'])
+        products = self.top_up_products(options['products'], ingredients, rng)
+        created = self.top_up_orders(
+            options['orders'], products, ingredients, options['days'], options['batch_size'], rng, verbosity
+        )
+        # Bulk inserts and updates above bypass the signals that maintain it
+        refresh_producible_units()
+        mark_menu_changed()
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Benchmark data ready: {Order.objects.count()} orders ({created} new), '
+            f'{Product.objects.count()} products, {Ingredient.objects.count()} ingredients'
+        ))
+
+    def top_up_ingredients(self, target):
+        missing = target - Ingredient.objects.count()
+        if missing > 0:
+            start = Ingredient.objects.filter(name__startswith='Benchmark ingredient').count()
+            Ingredient.objects.bulk_create([
+                Ingredient(
+                    name=f'Benchmark ingredient {start + i + 1:05d}',
+                    unit='g',
+                    current_stock=BENCHMARK_STOCK,
+                    min_stock=Decimal('100'),
+                )
+                for i in range(missing)
+            ])
+        # Make sure seeded recipes can always be produced during the benchmark
+        Ingredient.objects.update(current_stock=BENCHMARK_STOCK, is_available=True)
+        return list(Ingredient.objects.all())
+
+    def top_up_products(self, target, ingredients, rng):
+        missing = target - Product.objects.count()
+        if missing > 0:
+            start = Product.objects.filter(name__startswith='Benchmark product').count()
+            with transaction.atomic():
+                products = Product.objects.bulk_create([
+                    Product(
+                        name=f'Benchmark product {start + i + 1:04d}',
+                        price=Decimal(rng.randrange(50, 900)),
+                        stock=1000,
+                        threshold=10,
+                        category=rng.choice(CATEGORIES),
+                    )
+                    for i in range(missing)
+                ])
+                recipes = RecipeItem.objects.bulk_create([RecipeItem(product=product) for product in products])
+                RecipeIngredient.objects.bulk_create([
+                    RecipeIngredient(recipe=recipe, ingredient=ingredient, quantity=Decimal(rng.randrange(1, 50)))
+                    for recipe in recipes
+                    for ingredient in rng.sample(ingredients, min(len(ingredients), rng.randint(2, 6)))
+                ])
+        return list(Product.objects.filter(is_archived=False))
+
+    def top_up_orders(self, target, products, ingredients, days, batch_size, rng, verbosity):
+        existing = Order.objects.count()
+        missing = target - existing
+        if missing <= 0:
+            return 0
+
+        # Continue numbering after the last benchmark order (zero-padded, so it sorts)
+        last_number = Order.objects.filter(order_number__startswith='BEN-').order_by(
+            '-order_number'
+        ).values_list('order_number', flat=True).first()
+        next_number = int(last_number[4:]) + 1 if last_number else 1
+
+        cashiers = list(User.objects.filter(role='CASHIER')) or [None]
+        now = timezone.now()
+        start = now - timedelta(days=days)
+        span = (now - start).total_seconds()
+
+        created = 0
+        while created < missing:
+            count = min(batch_size, missing - created)
+            orders, items_per_order = [], []
+            for i in range(count):
+                created_at = start + timedelta(seconds=rng.random() * span)
+                status = rng.choices(['FINISHED', 'CANCELLED', 'PENDING'], weights=[85, 10, 5])[0]
+                lines = []
+                for product in rng.sample(products, min(len(products), rng.randint(1, 4))):
+                    quantity = rng.randint(1, 3)
+                    lines.append((product, quantity, product.price * quantity))
+                orders.append(Order(
+                    order_number=f'BEN-{next_number + created + i:09d}',
+                    customer_name=rng.choice(CUSTOMER_NAMES),
+                    table_number=str(rng.randint(1, 20)),
+                    status=status,
+                    total_amount=sum(line[2] for line in lines),
+                    processed_by=rng.choice(cashiers),
+                    created_at=created_at,
+                ))
+                items_per_order.append(lines)
+
+            with transaction.atomic(), explicit_timestamps(Order, OrderItem, Payment, StockTransaction):
+                orders = Order.objects.bulk_create(orders)
+                OrderItem.objects.bulk_create([
+                    OrderItem(
+                        order=order,
+                        product=product,
+                        product_name=product.name,
+                        product_price=product.price,
+                        quantity=quantity,
+                        subtotal=subtotal,
+                        created_at=order.created_at,
+                    )
+                    for order, lines in zip(orders, items_per_order)
+                    for product, quantity, subtotal in lines
+                ], batch_size=1000)
+                Payment.objects.bulk_create([
+                    Payment(
+                        order=order,
+                        method=rng.choice(['CASH', 'ONLINE']),
+                        status={'FINISHED': 'SUCCESS', 'CANCELLED': 'FAILED'}.get(order.status, 'PENDING'),
+                        amount=order.total_amount,
+                        processed_by=order.processed_by,
+                        created_at=order.created_at,
+                    )
+                    for order in orders
+                ], batch_size=1000)
+                # One deduction per sale, and now and then a delivery
+                StockTransaction.objects.bulk_create([
+                    StockTransaction(
+                        ingredient=rng.choice(ingredients),
+                        transaction_type=transaction_type,
+                        quantity=Decimal(rng.randrange(1, 50)) * (1 if transaction_type == 'PURCHASE' else -1),
+                        reference_type='order',
+                        reference_id=order.pk,
+                        created_at=order.created_at,
+                    )
+                    for order in orders
+                    for transaction_type in ['DEDUCTION'] + (['PURCHASE'] if rng.random() < 0.02 else [])
+                ], batch_size=1000)
+
+            created += count
+            if verbosity > 1:
+                self.stdout.write(f'  {existing + created}/{target} orders')
+
+        return created
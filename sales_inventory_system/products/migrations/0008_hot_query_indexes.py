@@ -0,0 +1,23 @@
+# Generated by Django 5.2.8 on 2026-10-19 08:10
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0007_merge_20260102_2240'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(condition=models.Q(('is_archived', False)), fields=['category', 'name'], name='products_product_active_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='stocktransaction',
+            index=models.Index(fields=['transaction_type', 'created_at'], name='products_stocktx_type_time_idx'),
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.8 on 2026-10-19 08:13
+
+from django.db import migrations, models
+
+
+def backfill_producible_units(apps, schema_editor):
+    """Store Product.calculated_stock for existing products"""
+    Product = apps.get_model('products', 'Product')
+    RecipeIngredient = apps.get_model('products', 'RecipeIngredient')
+
+    # {product_id: [units per ingredient]} for products with a recipe
+    units_by_product = {}
+    for product_id, current_stock, quantity in RecipeIngredient.objects.values_list(
+        'recipe__product_id', 'ingredient__current_stock', 'quantity'
+    ):
+        units = units_by_product.setdefault(product_id, [])
+        if quantity:
+            units.append(int(current_stock / quantity))
+    recipe_products = set(
+        apps.get_model('products', 'RecipeItem').objects.values_list('product_id', flat=True)
+    )
+
+    products = list(Product.objects.all())
+    for product in products:
+        if not product.requires_bom or product.pk not in recipe_products:
+            product.producible_units = product.stock
+        else:
+            product.producible_units = min(units_by_product.get(product.pk) or [0])
+    Product.objects.bulk_update(products, ['producible_units'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0008_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='producible_units',
+            field=models.IntegerField(default=0, editable=False, help_text='Stored calculated_stock, kept current by products.producible'),
+        ),
+        migrations.RunPython(backfill_producible_units, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-19 08:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0009_product_producible_units'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='image_hash',
+            field=models.CharField(blank=True, editable=False, help_text='Content hash naming the resized variants of image (products.thumbnails)', max_length=16),
+        ),
+    ]
@@ -15,12 +15,23 @@ class Product(models.Model):
         validators=[MinValueValidator(Decimal('0.01'))]
     )
     stock = models.IntegerField(default=0, validators=[MinValueValidator(0)])
+    producible_units = models.IntegerField(
+        default=0,
+        editable=False,
+        help_text="Stored calculated_stock, kept current by products.producible"
+    )
     threshold = models.IntegerField(
         default=10,
         validators=[MinValueValidator(0)],
         help_text="Minimum stock level before low-stock alert"
     )
     image = models.ImageField(upload_to='products/', blank=True, null=True)
+    image_hash = models.CharField(
+        max_length=16,
+        blank=True,
+        editable=False,
+        help_text="Content hash naming the resized variants of image (products.thumbnails)"
+    )
     category = models.CharField(max_length=100, blank=True)
     requires_bom = models.BooleanField(
         default=False,
@@ -32,6 +43,16 @@ class Product(models.Model):
 
     class Meta:
         ordering = ['name']
+        indexes = [
+            # Active product listings (kiosk, POS, product list) in category and name order.
+            # Partial: is_archived=False compiles to NOT is_archived, which an index on
+            # the column cannot serve on SQLite but matches this condition.
+            models.Index(
+                fields=['category', 'name'],
+                condition=models.Q(is_archived=False),
+                name='products_product_active_idx',
+            ),
+        ]
 
     def __str__(self):
         return self.name
@@ -66,10 +87,10 @@ class Product(models.Model):
         except RecipeItem.DoesNotExist:
             return self.stock
 
-        # Get all ingredients in the recipe
-        recipe_ingredients = recipe.ingredients.all()
+        # Get all ingredients in the recipe (uses prefetch_related('recipe__ingredients__ingredient') if present)
+        recipe_ingredients = list(recipe.ingredients.all())
 
-        if not recipe_ingredients.exists():
+        if not recipe_ingredients:
             # Recipe exists but has no ingredients
             return 0
 
@@ -222,6 +243,8 @@ class StockTransaction(models.Model):
         ordering = ['-created_at']
         indexes = [
             models.Index(fields=['ingredient', 'created_at']),
+            # Movements of one type over a date range (low stock report, usage reports)
+            models.Index(fields=['transaction_type', 'created_at'], name='products_stocktx_type_time_idx'),
         ]
 
     def __str__(self):
@@ -0,0 +1,101 @@
+"""
+Stored producible units per product (Product.producible_units).
+
+Product.calculated_stock derives how many units the recipe allows from the
+current ingredient stock, which listings could only evaluate in Python
+after loading every recipe. The same value is stored on the product so
+listings filter, sort and paginate on it in SQL. products.signals keeps it
+current, recomputing only the affected products:
+
+- an Ingredient save or delete: the products whose recipe uses it
+- a RecipeItem or RecipeIngredient change: that recipe's product
+- a Product save (stock and requires_bom feed in): that product
+
+Each refresh is a single UPDATE computing the value in the database. Inside
+deferred_refresh() changes are collected and refreshed in one UPDATE when
+the block exits, for code saving many ingredients in a row:
+
+    with deferred_refresh():
+        for ingredient in changed:
+            ingredient.save()
+
+Writes that bypass model signals (QuerySet.update, bulk_create) must call
+refresh_producible_units() themselves; `manage.py refresh_producible_units`
+recomputes every product.
+"""
+
+import threading
+from contextlib import contextmanager
+from django.db.models import Case, Exists, F, IntegerField, Min, OuterRef, Q, Subquery, Value, When
+from django.db.models.functions import Cast, Coalesce, Floor
+from .models import Product, RecipeIngredient, RecipeItem
+
+_local = threading.local()
+
+
+def producible_units_expression():
+    """Database expression of Product.calculated_stock, evaluated per product row"""
+    bottleneck = RecipeIngredient.objects.filter(
+        recipe__product=OuterRef('pk'), quantity__gt=0
+    ).values('recipe__product').annotate(
+        units=Min(Floor(F('ingredient__current_stock') / F('quantity')))
+    ).values('units')
+
+    return Case(
+        # Simple stock items, and BOM products without a recipe, use their own stock
+        When(Q(requires_bom=False) | ~Exists(RecipeItem.objects.filter(product=OuterRef('pk'))), then=F('stock')),
+        # A recipe without (non-zero) ingredients produces nothing
+        default=Coalesce(Cast(Subquery(bottleneck), IntegerField()), Value(0)),
+        output_field=IntegerField(),
+    )
+
+
+def refresh_producible_units(product_ids=None, ingredient_ids=(), recipe_ids=()):
+    """
+    Recompute producible_units for the given products, the products using the
+    given ingredients and the products of the given recipes (all products
+    when nothing is given).
+
+    Returns:
+        int: number of products updated
+    """
+    if product_ids is None and not ingredient_ids and not recipe_ids:
+        products = Product.objects.all()
+    else:
+        condition = Q(pk__in=list(product_ids or ()))
+        if ingredient_ids:
+            condition |= Q(pk__in=RecipeItem.objects.filter(
+                ingredients__ingredient__in=list(ingredient_ids)
+            ).values('product'))
+        if recipe_ids:
+            condition |= Q(pk__in=RecipeItem.objects.filter(pk__in=list(recipe_ids)).values('product'))
+        products = Product.objects.filter(condition)
+    return products.update(producible_units=producible_units_expression())
+
+
+def stock_changed(product_ids=(), ingredient_ids=(), recipe_ids=()):
+    """Refresh the affected products now, or when the enclosing deferred_refresh() exits"""
+    pending = getattr(_local, 'pending', None)
+    if pending is not None:
+        pending['product_ids'].update(product_ids)
+        pending['ingredient_ids'].update(ingredient_ids)
+        pending['recipe_ids'].update(recipe_ids)
+        return
+    if product_ids or ingredient_ids or recipe_ids:
+        refresh_producible_units(product_ids, ingredient_ids, recipe_ids)
+
+
+@contextmanager
+def deferred_refresh():
+    """Collect stock changes in the block and refresh the affected products once at the end"""
+    if getattr(_local, 'pending', None) is not None:
+        # Nested: the outermost block refreshes
+        yield
+        return
+
+    pending = _local.pending = {'product_ids': set(), 'ingredient_ids': set(), 'recipe_ids': set()}
+    try:
+        yield
+    finally:
+        _local.pending = None
+    stock_changed(**pending)
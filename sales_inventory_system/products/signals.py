@@ -2,15 +2,25 @@
 Signals for BOM-related events
 """
 
-from django.db.models.signals import post_save
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, pre_save
 from django.dispatch import receiver
 from django.contrib import messages
+from sales_inventory_system.orders.menu_snapshot import mark_menu_changed
 from sales_inventory_system.orders.models import Payment
+from sales_inventory_system.sales_inventory.conditional import track_changes
 from .inventory_service import BOMService, IngredientDeductionError
+from .models import Ingredient, Product, RecipeIngredient, RecipeItem
+from .producible import stock_changed
+from .thumbnails import content_hash, generate_variants
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Change counters for conditional responses (sales_inventory.conditional)
+track_changes(Ingredient)
+
 
 @receiver(post_save, sender=Payment)
 def deduct_ingredients_on_payment(sender, instance, created, **kwargs):
@@ -63,3 +73,80 @@ def deduct_ingredients_on_payment(sender, instance, created, **kwargs):
         logger.error(
             f"Unexpected error deducting ingredients for order {instance.order.order_number}: {str(e)}"
         )
+
+
+def _affects(update_fields, *fields):
+    return update_fields is None or bool(set(update_fields) & set(fields))
+
+
+@receiver(post_save, sender=Ingredient)
+def ingredient_saved(sender, instance, created, update_fields=None, **kwargs):
+    """Ingredient stock changed: refresh producible units of the products using it"""
+    if not created and _affects(update_fields, 'current_stock'):
+        stock_changed(ingredient_ids=[instance.pk])
+
+
+@receiver(post_save, sender=Product)
+def product_saved(sender, instance, created, update_fields=None, **kwargs):
+    if created or _affects(update_fields, 'stock', 'requires_bom'):
+        stock_changed(product_ids=[instance.pk])
+
+
+@receiver([post_save, post_delete], sender=RecipeItem)
+def recipe_changed(sender, instance, **kwargs):
+    stock_changed(product_ids=[instance.product_id])
+
+
+@receiver([post_save, post_delete], sender=RecipeIngredient)
+def recipe_ingredient_changed(sender, instance, **kwargs):
+    stock_changed(recipe_ids=[instance.recipe_id])
+
+
+def mark_menu_changed_on_commit(using=None):
+    """
+    Bump the menu version once the surrounding transaction commits, so a kiosk
+    request in between cannot cache a snapshot of the old rows under it
+    """
+    transaction.on_commit(mark_menu_changed, using=using)
+
+
+@receiver([post_save, post_delete], sender=Product)
+@receiver([post_save, post_delete], sender=RecipeItem)
+@receiver([post_save, post_delete], sender=RecipeIngredient)
+def catalog_changed(sender, using=None, **kwargs):
+    """Products or recipes changed: rebuild the kiosk menu snapshot"""
+    mark_menu_changed_on_commit(using)
+
+
+@receiver([post_save, post_delete], sender=Ingredient)
+def ingredient_availability_changed(sender, instance, update_fields=None, using=None, **kwargs):
+    """Ingredient stock and availability decide which menu items can be ordered"""
+    if _affects(update_fields, 'current_stock', 'is_available', 'is_active'):
+        mark_menu_changed_on_commit(using)
+
+
+@receiver(pre_save, sender=Product)
+def hash_uploaded_image(sender, instance, update_fields=None, **kwargs):
+    """Name the variants of a newly uploaded image after its contents"""
+    if not _affects(update_fields, 'image'):
+        return
+    if not instance.image:
+        instance.image_hash = ''
+    elif not instance.image._committed:
+        instance.image_hash = content_hash(instance.image.file)
+        instance._image_uploaded = True
+
+
+@receiver(post_save, sender=Product)
+def generate_image_variants(sender, instance, **kwargs):
+    """Resize a new upload right away instead of on the first kiosk request"""
+    if not getattr(instance, '_image_uploaded', False):
+        return
+    instance._image_uploaded = False
+    if not getattr(settings, 'PRODUCT_IMAGE_VARIANTS_ON_UPLOAD', True):
+        return
+    try:
+        generate_variants(instance)
+    except Exception as e:
+        # The variant view retries on first request; the upload itself succeeded
+        logger.error(f"Could not generate image variants for product {instance.pk}: {str(e)}")
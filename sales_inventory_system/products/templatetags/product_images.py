@@ -0,0 +1,37 @@
+"""
+Template tags rendering product images from their resized variants
+"""
+from django import template
+from django.utils.html import format_html, format_html_join
+
+from ..thumbnails import VARIANT_FORMATS, srcset, variant_url
+
+register = template.Library()
+
+
+@register.simple_tag
+def product_picture(product, sizes='100vw', css_class=''):
+    """
+    <picture> offering the AVIF and WebP variants in every width, so the
+    browser downloads the smallest file matching the tile and screen.
+
+    Usage in template: {% product_picture product "(min-width: 768px) 33vw, 100vw" "w-full h-full object-cover" %}
+
+    Images uploaded before variants existed (no image_hash yet) render the
+    original as a plain lazy <img>.
+    """
+    if not product.image:
+        return ''
+    if not product.image_hash:
+        return format_html(
+            '<img src="{}" alt="{}" class="{}" loading="lazy" decoding="async">',
+            product.image.url, product.name, css_class,
+        )
+    sources = format_html_join(
+        '', '<source type="image/{}" srcset="{}" sizes="{}">',
+        ((fmt, srcset(product, fmt), sizes) for fmt in VARIANT_FORMATS),
+    )
+    return format_html(
+        '<picture>{}<img src="{}" alt="{}" class="{}" loading="lazy" decoding="async"></picture>',
+        sources, variant_url(product, 320), product.name, css_class,
+    )
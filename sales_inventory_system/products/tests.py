@@ -1,3 +1,332 @@
-from django.test import TestCase
+import io
+import shutil
+import tempfile
+from decimal import Decimal
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import DEFAULT_DB_ALIAS
+from django.template import Context, Template
+from django.test import TestCase, override_settings
+from PIL import Image
+from django.urls import reverse
 
-# Create your tests here.
+from sales_inventory_system.accounts.models import User
+from sales_inventory_system.products.models import Ingredient, Product, RecipeIngredient, RecipeItem
+from sales_inventory_system.products.producible import deferred_refresh, refresh_producible_units
+from sales_inventory_system.products.thumbnails import VARIANT_FORMATS, VARIANT_WIDTHS, variant_name
+from sales_inventory_system.sales_inventory.search import _fts_available
+from sales_inventory_system.sales_inventory.testing import QueryBudgetTestCase
+
+
+class ProductQueryBudgetTests(QueryBudgetTestCase):
+    """Product, ingredient and recipe management pages"""
+
+    def setUp(self):
+        super().setUp()
+        self.login(self.admin)
+
+    def archive_first(self, size=None):
+        self.products[0].is_archived = True
+        self.products[0].save()
+
+    def test_product_list(self):
+        self.assertQueryBudget(11, lambda: self.client.get(reverse('products:list')))
+
+    def test_product_list_ajax(self):
+        self.assertQueryBudget(11, lambda: self.client.get(
+            reverse('products:list'), HTTP_X_REQUESTED_WITH='XMLHttpRequest'
+        ))
+
+    def test_product_create_form(self):
+        self.assertQueryBudget(2, lambda: self.client.get(reverse('products:create')))
+
+    def test_product_detail(self):
+        self.assertQueryBudget(8, lambda: self.client.get(reverse('products:detail', args=[self.products[0].pk])))
+
+    def test_product_edit_form(self):
+        self.assertQueryBudget(12, lambda: self.client.get(reverse('products:edit', args=[self.products[0].pk])))
+
+    def test_product_archive(self):
+        self.assertQueryBudget(14, lambda: self.client.post(reverse('products:archive', args=[self.products[-1].pk])),
+                               status=302)
+
+    def test_product_unarchive(self):
+        self.assertQueryBudget(6, lambda: self.client.post(reverse('products:unarchive', args=[self.products[0].pk])),
+                               setup=self.archive_first, status=302)
+
+    def test_archived_list(self):
+        self.assertQueryBudget(8, lambda: self.client.get(reverse('products:archived_list')),
+                               setup=self.archive_first)
+
+    def test_ingredient_list(self):
+        self.assertQueryBudget(4, lambda: self.client.get(reverse('products:ingredient_list')))
+
+    def test_ingredient_create_form(self):
+        self.assertQueryBudget(2, lambda: self.client.get(reverse('products:ingredient_create')))
+
+    def test_ingredient_edit_form(self):
+        self.assertQueryBudget(4, lambda: self.client.get(
+            reverse('products:ingredient_edit', args=[Ingredient.objects.first().pk])
+        ))
+
+    def create_unused_ingredient(self, size=None):
+        self.ingredient = Ingredient.objects.create(name=f'Unused {size}')
+
+    def test_ingredient_delete(self):
+        self.assertQueryBudget(11, lambda: self.client.post(
+            reverse('products:ingredient_delete', args=[self.ingredient.pk])
+        ), setup=self.create_unused_ingredient, status=302)
+
+    def test_recipe_edit_form(self):
+        self.assertQueryBudget(7, lambda: self.client.get(reverse('products:recipe_edit', args=[self.products[0].pk])))
+
+
+class BOMReportQueryBudgetTests(QueryBudgetTestCase):
+    """BOM dashboard and inventory reports, including CSV downloads"""
+
+    def setUp(self):
+        super().setUp()
+        self.login(self.admin)
+
+    def test_bom_dashboard(self):
+        self.assertQueryBudget(13, lambda: self.client.get(reverse('products:bom_dashboard')))
+
+    def test_usage_report(self):
+        self.assertQueryBudget(3, lambda: self.client.get(reverse('products:bom_usage_report')))
+
+    def test_usage_report_ajax(self):
+        self.assertQueryBudget(3, lambda: self.client.get(
+            reverse('products:bom_usage_report'), HTTP_X_REQUESTED_WITH='XMLHttpRequest'
+        ))
+
+    def test_usage_report_csv(self):
+        self.assertQueryBudget(3, lambda: self.client.get(reverse('products:bom_usage_report'), {'download': 'csv'}))
+
+    def test_usage_report_detailed_csv(self):
+        self.assertQueryBudget(3, lambda: self.client.get(
+            reverse('products:bom_usage_report'), {'download': 'detailed'}
+        ))
+
+    def test_variance_report(self):
+        self.assertQueryBudget(5, lambda: self.client.get(reverse('products:bom_variance')))
+
+    def test_variance_report_csv(self):
+        self.assertQueryBudget(5, lambda: self.client.get(reverse('products:bom_variance'), {'download': 'csv'}))
+
+    def test_variance_report_detailed_csv(self):
+        self.assertQueryBudget(5, lambda: self.client.get(reverse('products:bom_variance'), {'download': 'detailed'}))
+
+    def test_low_stock_report(self):
+        self.assertQueryBudget(5, lambda: self.client.get(reverse('products:bom_low_stock')))
+
+    def test_waste_report(self):
+        # Totals by type are aggregated in SQL instead of loading every log of the period
+        self.assertQueryBudget(4, lambda: self.client.get(reverse('products:bom_waste')))
+
+    def test_waste_report_ajax(self):
+        self.assertQueryBudget(4, lambda: self.client.get(
+            reverse('products:bom_waste'), HTTP_X_REQUESTED_WITH='XMLHttpRequest'
+        ))
+
+
+class ProductApiQueryBudgetTests(QueryBudgetTestCase):
+    """JSON endpoints for admins and cashiers"""
+
+    def setUp(self):
+        super().setUp()
+        self.login(self.admin)
+
+    def test_list_ingredients(self):
+        self.assertQueryBudget(3, lambda: self.client.get(reverse('products:api_list_ingredients')))
+
+    def test_create_ingredient(self):
+        self.assertQueryBudget(5, lambda: self.client.post(reverse('products:api_create_ingredient'), {
+            'name': f'New ingredient {Ingredient.objects.count()}', 'unit': 'g', 'current_stock': '10',
+        }))
+
+    def test_ingredient_availability(self):
+        self.assertQueryBudget(5, lambda: self.client.get(
+            reverse('products:api_ingredient_availability'), {'product_id': self.products[0].pk, 'quantity': 2}
+        ))
+
+    def test_search_ingredients(self):
+        self.assertQueryBudget(3, lambda: self.client.get(reverse('products:api_search_ingredients'), {'q': 'Ingr'}))
+
+    def test_list_categories(self):
+        self.assertQueryBudget(3, lambda: self.client.get(reverse('products:api_list_categories')))
+
+    def test_create_category(self):
+        self.assertQueryBudget(2, lambda: self.client.post(
+            reverse('products:api_create_category'), {'category': f'Category {len(self.products)}'}
+        ))
+
+    def test_search_categories(self):
+        self.assertQueryBudget(3, lambda: self.client.get(reverse('products:api_search_categories'), {'q': 'Cat'}))
+
+    def test_search_archives(self):
+        # The per-process probe for the SQLite search index is not part of the budget
+        self.assertQueryBudget(3, lambda: self.client.get(reverse('products:api_search_archives'), {'q': 'Prod'}),
+                               setup=lambda size: _fts_available(DEFAULT_DB_ALIAS))
+
+    def test_cashier_ingredients(self):
+        self.login(self.cashier)
+        self.assertQueryBudget(2, lambda: self.client.get(reverse('products:cashier_ingredients')))
+
+    def test_cashier_api_ingredients(self):
+        self.login(self.cashier)
+        self.assertQueryBudget(3, lambda: self.client.get(reverse('products:api_cashier_ingredients')))
+
+    def test_toggle_ingredient(self):
+        self.login(self.cashier)
+        self.assertQueryBudget(5, lambda: self.client.post(
+            reverse('products:api_toggle_ingredient'), {'ingredient_id': Ingredient.objects.first().pk}
+        ))
+
+
+class CashierIngredientsAsyncViewTests(QueryBudgetTestCase):
+    """The cashier ingredient API is served natively async"""
+
+    async def test_ingredients(self):
+        await self.async_client.aforce_login(self.cashier)
+        await Ingredient.objects.acreate(name='Basil')
+        response = await self.async_client.get(reverse('products:api_cashier_ingredients'))
+        self.assertEqual([i['name'] for i in response.json()['ingredients']], ['Basil'])
+
+
+class ProducibleUnitsTests(TestCase):
+    """Product.producible_units follows ingredient stock and recipe changes"""
+
+    def setUp(self):
+        self.dough = Ingredient.objects.create(name='Dough', current_stock=Decimal('1000'))
+        self.cheese = Ingredient.objects.create(name='Cheese', current_stock=Decimal('250'))
+        self.pizza = Product.objects.create(name='Pizza', price=Decimal('100'), stock=50, requires_bom=True)
+        self.recipe = RecipeItem.objects.create(product=self.pizza)
+        RecipeIngredient.objects.create(recipe=self.recipe, ingredient=self.dough, quantity=Decimal('200'))
+        self.cheese_line = RecipeIngredient.objects.create(
+            recipe=self.recipe, ingredient=self.cheese, quantity=Decimal('100')
+        )
+        self.soda = Product.objects.create(name='Soda', price=Decimal('30'), stock=7)
+
+    def units(self, product):
+        product.refresh_from_db()
+        return product.producible_units
+
+    def test_matches_calculated_stock(self):
+        self.assertEqual(self.units(self.pizza), 2)  # cheese is the bottleneck
+        self.assertEqual(self.units(self.soda), 7)
+        for product in Product.objects.prefetch_related('recipe__ingredients__ingredient'):
+            self.assertEqual(product.producible_units, product.calculated_stock)
+
+    def test_ingredient_stock_change(self):
+        self.cheese.current_stock = Decimal('1000')
+        self.cheese.save()
+        self.assertEqual(self.units(self.pizza), 5)
+
+        self.dough.current_stock = Decimal('150')
+        self.dough.save(update_fields=['current_stock'])
+        self.assertEqual(self.units(self.pizza), 0)
+
+    def test_recipe_change(self):
+        self.cheese_line.delete()
+        self.assertEqual(self.units(self.pizza), 5)
+
+        self.recipe.delete()
+        self.assertEqual(self.units(self.pizza), 50)  # no recipe: the product's own stock
+
+    def test_product_stock_change(self):
+        self.soda.stock = 3
+        self.soda.save()
+        self.assertEqual(self.units(self.soda), 3)
+
+    def test_deferred_refresh_updates_once(self):
+        with self.assertNumQueries(3):
+            with deferred_refresh():
+                self.dough.current_stock = Decimal('400')
+                self.dough.save()
+                self.cheese.current_stock = Decimal('100')
+                self.cheese.save()
+        self.assertEqual(self.units(self.pizza), 1)
+
+    def test_backfill(self):
+        Product.objects.update(producible_units=0)
+        self.assertEqual(refresh_producible_units(), 2)
+        self.assertEqual(self.units(self.pizza), 2)
+        self.assertEqual(self.units(self.soda), 7)
+
+    def test_stock_status_filter_uses_producible_units(self):
+        self.client.force_login(User.objects.create_user(username='admin', role='ADMIN'))
+        self.cheese.current_stock = Decimal('0')
+        self.cheese.save()
+
+        response = self.client.get(reverse('products:list'), {'stock_status': 'out'},
+                                   HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+        self.assertEqual([p['name'] for p in response.json()['products']], ['Pizza'])
+
+        response = self.client.get(reverse('products:list'), {'sort': 'stock'}, HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+        self.assertEqual([p['calculated_stock'] for p in response.json()['products']], [0, 7])
+
+
+class ProductImageVariantTests(TestCase):
+    """Uploads are resized into hashed WebP/AVIF variants served with immutable caching"""
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def upload(self, color='red', **kwargs):
+        output = io.BytesIO()
+        Image.new('RGB', (1200, 800), color).save(output, format='JPEG')
+        return Product.objects.create(
+            name='Pizza', price=Decimal('100'), stock=5,
+            image=SimpleUploadedFile('pizza.jpg', output.getvalue(), content_type='image/jpeg'), **kwargs
+        )
+
+    def variant_names(self, product):
+        return [variant_name(product.image.name, product.image_hash, width, fmt)
+                for width in VARIANT_WIDTHS for fmt in VARIANT_FORMATS]
+
+    def test_upload_generates_variants_beside_original(self):
+        product = self.upload()
+        self.assertEqual(len(product.image_hash), 16)
+        for name in self.variant_names(product):
+            self.assertTrue(name.startswith('products/pizza.'), name)
+            self.assertTrue(default_storage.exists(name), name)
+
+        # Same contents, same hash; new contents, new hash (and URLs)
+        self.assertEqual(self.upload().image_hash, product.image_hash)
+        self.assertNotEqual(self.upload(color='blue').image_hash, product.image_hash)
+
+    def test_variant_view(self):
+        with override_settings(PRODUCT_IMAGE_VARIANTS_ON_UPLOAD=False):
+            product = self.upload()
+        name = variant_name(product.image.name, product.image_hash, 320, 'webp')
+        self.assertFalse(default_storage.exists(name))
+
+        # Generated on first request
+        response = self.client.get(reverse('products:image_variant', args=[product.pk, product.image_hash, 320, 'webp']))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'image/webp')
+        self.assertEqual(response['Cache-Control'], 'public, max-age=31536000, immutable')
+        with Image.open(io.BytesIO(b''.join(response.streaming_content))) as image:
+            self.assertEqual(image.size, (320, 213))
+        self.assertTrue(default_storage.exists(name))
+
+        for args in [(product.pk, '0' * 16, 320, 'webp'), (product.pk, product.image_hash, 333, 'webp'),
+                     (product.pk, product.image_hash, 320, 'png')]:
+            self.assertEqual(self.client.get(reverse('products:image_variant', args=args)).status_code, 404)
+
+    def test_picture_tag(self):
+        product = self.upload()
+        html = Template('{% load product_images %}{% product_picture product "50vw" "cover" %}').render(
+            Context({'product': product})
+        )
+        self.assertIn('<source type="image/avif"', html)
+        self.assertIn(f'/products/{product.pk}/image/{product.image_hash}-640.webp 640w', html)
+        self.assertIn('sizes="50vw"', html)
+
+        product.image_hash = ''  # uploaded before variants existed
+        html = Template('{% load product_images %}{% product_picture product %}').render(Context({'product': product}))
+        self.assertIn(f'src="{product.image.url}"', html)
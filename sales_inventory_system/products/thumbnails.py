@@ -0,0 +1,108 @@
+"""
+Resized WebP/AVIF variants of product images.
+
+Kiosk and POS grids showed Product.image at its uploaded resolution, often
+several megabytes per tile on kiosk tablets. Each upload gets a set of
+derivatives (VARIANT_WIDTHS x VARIANT_FORMATS) stored beside the original,
+named after the SHA-256 of the original's bytes:
+
+    products/pizza.jpg
+    products/pizza.3f2a9c0d1e4b5a69-320.webp
+
+Product.image_hash holds that hash, so templates build the variant URLs
+without touching storage. The URLs point at products.views.product_image_variant,
+which serves the stored file with a one-year immutable Cache-Control (a new
+upload changes the hash, hence the URL) and generates a missing variant on
+first request. Uploads generate their variants right away unless
+PRODUCT_IMAGE_VARIANTS_ON_UPLOAD is False; `manage.py generate_image_variants`
+backfills images uploaded before the pipeline existed.
+"""
+
+import hashlib
+import io
+import logging
+import posixpath
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.urls import reverse
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+VARIANT_WIDTHS = (160, 320, 640)
+# Most compact first: <picture> takes the first <source> the browser supports
+VARIANT_FORMATS = ('avif', 'webp')
+CONTENT_TYPES = {'avif': 'image/avif', 'webp': 'image/webp'}
+ENCODER_OPTIONS = {
+    'avif': {'quality': 55, 'speed': 8},
+    'webp': {'quality': 80, 'method': 4},
+}
+HASH_LENGTH = 16
+
+
+def content_hash(file):
+    """Hex digest identifying an image file's contents"""
+    digest = hashlib.sha256()
+    file.seek(0)
+    for chunk in iter(lambda: file.read(64 * 1024), b''):
+        digest.update(chunk)
+    file.seek(0)
+    return digest.hexdigest()[:HASH_LENGTH]
+
+
+def variant_name(image_name, image_hash, width, fmt):
+    """Storage name of a variant, in the original's directory"""
+    stem = posixpath.splitext(posixpath.basename(image_name))[0]
+    return posixpath.join(posixpath.dirname(image_name), f'{stem}.{image_hash}-{width}.{fmt}')
+
+
+def variant_url(product, width, fmt='webp'):
+    """URL of a product image variant, or of the original when it has no variants yet"""
+    if not product.image:
+        return None
+    if not product.image_hash:
+        return product.image.url
+    return reverse('products:image_variant', args=[product.pk, product.image_hash, width, fmt])
+
+
+def srcset(product, fmt):
+    return ', '.join(f'{variant_url(product, width, fmt)} {width}w' for width in VARIANT_WIDTHS)
+
+
+def render_variant(image_file, width, fmt):
+    """Encode the image scaled down to width (never up) and return the bytes"""
+    image_file.seek(0)
+    with Image.open(image_file) as image:
+        image = ImageOps.exif_transpose(image)
+        image = image.convert('RGBA' if image.has_transparency_data else 'RGB')
+        if image.width > width:
+            image = image.resize((width, round(image.height * width / image.width)), Image.Resampling.LANCZOS)
+        output = io.BytesIO()
+        image.save(output, format=fmt.upper(), **ENCODER_OPTIONS[fmt])
+    return output.getvalue()
+
+
+def ensure_variant(product, width, fmt, storage=default_storage):
+    """Storage name of the variant, generating it from the original if missing"""
+    name = variant_name(product.image.name, product.image_hash, width, fmt)
+    if not storage.exists(name):
+        with product.image.open('rb') as original:
+            data = render_variant(original, width, fmt)
+        # Concurrent first requests may both render; the later save gets a suffixed name
+        # and is dropped, the file under `name` is identical either way
+        saved = storage.save(name, ContentFile(data))
+        if saved != name:
+            storage.delete(saved)
+    return name
+
+
+def generate_variants(product, storage=default_storage):
+    """Generate every variant of the product's image; returns how many were missing"""
+    missing = 0
+    for width in VARIANT_WIDTHS:
+        for fmt in VARIANT_FORMATS:
+            if not storage.exists(variant_name(product.image.name, product.image_hash, width, fmt)):
+                ensure_variant(product, width, fmt, storage)
+                missing += 1
+    return missing
@@ -13,6 +13,7 @@ urlpatterns = [
     path('<int:pk>/archive/', views.product_archive, name='archive'),
     path('archives/', views.archived_products_list, name='archived_list'),
     path('<int:pk>/unarchive/', views.product_unarchive, name='unarchive'),
+    path('<int:pk>/image/<str:image_hash>-<int:width>.<str:fmt>', views.product_image_variant, name='image_variant'),
     path('unified-archives/', views.archived_products_list, name='unified_archives'),
 
     # Ingredient Management
@@ -1,22 +1,54 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.contrib import messages
-from django.http import JsonResponse
+from django.http import FileResponse, Http404, JsonResponse
+from django.core.files.storage import default_storage
+from django.views.decorators.http import require_http_methods
+from django.db import transaction
 from django.db.models import F, Q, Prefetch
 from django.core.paginator import Paginator
 from .models import Product, Ingredient, RecipeItem, RecipeIngredient
-from sales_inventory_system.system.models import AuditTrail
+from sales_inventory_system.system.models import AuditTrail, Archive
+from sales_inventory_system.sales_inventory.pagination import KeysetPaginator, keyset_pagination_data
+from sales_inventory_system.sales_inventory.search import search_filter
+from sales_inventory_system.sales_inventory.serialization import as_float, format_rows, json_response
+from .thumbnails import CONTENT_TYPES, VARIANT_FORMATS, VARIANT_WIDTHS, ensure_variant
 import json
 from decimal import Decimal
 
 def is_admin(user):
     return user.is_authenticated and user.is_admin
 
+def image_urls(rows, key, default):
+    """Replace image names in values() rows by their URLs, in place"""
+    for row in rows:
+        row[key] = default_storage.url(row[key]) if row[key] else default
+
+def product_list_values(products):
+    """The product list's JSON columns as values() rows (with the keyset ordering fields)"""
+    return products.values(
+        'id', 'name', 'description', 'stock', 'producible_units', 'threshold', 'category', 'image',
+        price_value=as_float('price'),
+    )
+
+def product_list_rows(rows):
+    """Turn product_list_values() rows into the product list's JSON rows, in place"""
+    for row in rows:
+        row['is_low_stock'] = row['stock'] < row['threshold']
+    image_urls(rows, 'image', None)
+    return format_rows(
+        rows,
+        rename={'price_value': 'price', 'producible_units': 'calculated_stock', 'image': 'image_url'},
+        defaults={'description': '', 'category': ''},
+    )
+
 @login_required
 @user_passes_test(is_admin)
 def product_detail(request, pk):
     """Display product details including recipe/BOM"""
-    product = get_object_or_404(Product, pk=pk, is_archived=False)
+    product = get_object_or_404(
+        Product.objects.prefetch_related('recipe__ingredients__ingredient'), pk=pk, is_archived=False
+    )
 
     # Get or create recipe
     recipe_item, _ = RecipeItem.objects.get_or_create(product=product)
@@ -24,7 +56,7 @@ def product_detail(request, pk):
     context = {
         'product': product,
         'recipe_item': recipe_item,
-        'recipe_ingredients': recipe_item.ingredients.all(),
+        'recipe_ingredients': recipe_item.ingredients.select_related('ingredient'),
     }
     return render(request, 'products/detail.html', context)
 
@@ -37,34 +69,30 @@ def product_list(request):
     search = request.GET.get('search', '').strip()
     category = request.GET.get('category', '').strip()
     stock_status = request.GET.get('stock_status', '').strip()
+    sort = request.GET.get('sort', '').strip()
     page_number = request.GET.get('page', 1)
 
-    # Base queryset with optimizations to reduce N+1 queries
-    products = Product.objects.filter(is_archived=False).select_related(
-        'recipe'
-    ).prefetch_related(
-        'recipe__ingredients__ingredient'
-    )
+    # Stock status comes from the stored producible_units, so no recipes are loaded
+    products = Product.objects.filter(is_archived=False)
 
     # Apply search filter
     if search:
-        products = products.filter(
-            Q(name__icontains=search) |
-            Q(description__icontains=search) |
-            Q(category__icontains=search)
-        )
+        products = search_filter(products, search, ['name', 'description', 'category'])
 
     # Apply category filter
     if category:
         products = products.filter(category=category)
 
-    # Apply stock status filter
+    # Apply stock status filter (producible units cover BOM and simple products alike)
     if stock_status == 'low':
-        products = products.filter(stock__lt=F('threshold'), stock__gt=0)
+        products = products.filter(producible_units__lt=F('threshold'), producible_units__gt=0)
     elif stock_status == 'out':
-        products = products.filter(stock=0)
+        products = products.filter(producible_units__lte=0)
     elif stock_status == 'in_stock':
-        products = products.filter(stock__gte=F('threshold'))
+        products = products.filter(producible_units__gte=F('threshold'))
+
+    # Lowest stock first, or by category and name
+    ordering = ('producible_units', 'name', 'id') if sort == 'stock' else ('category', 'name', 'id')
 
     # Get all categories for filter dropdown
     categories = Product.objects.filter(
@@ -73,41 +101,33 @@ def product_list(request):
     categories = [c for c in categories if c]  # Remove empty categories
 
     # Calculate statistics
-    # For low_stock_count, filter products where calculated_stock is below threshold
-    all_active_products = Product.objects.filter(is_archived=False).select_related(
-        'recipe'
-    ).prefetch_related(
-        'recipe__ingredients__ingredient'
-    )
-    low_stock_products = [p for p in all_active_products if p.calculated_stock < p.threshold and p.calculated_stock > 0]
-    total_count = products.count()
-
-    # Pagination
-    paginator = Paginator(products.order_by('category', 'name'), 12)  # 12 products per page
-    page_obj = paginator.get_page(page_number)
+    low_stock_count = Product.objects.filter(
+        is_archived=False, producible_units__lt=F('threshold'), producible_units__gt=0
+    ).count()
+
+    is_ajax = request.headers.get('X-Requested-With') == 'XMLHttpRequest'
+    # Plain rows for the JSON response (sales_inventory.serialization)
+    page_source = product_list_values(products) if is_ajax else products
+
+    # Pagination - AJAX clients can opt into keyset pagination with ?cursor=
+    use_cursor = is_ajax and 'cursor' in request.GET
+    if use_cursor:
+        paginator = KeysetPaginator(page_source, 12, ordering=ordering)
+        page_obj = paginator.get_page(request.GET.get('cursor'), request.GET.get('direction', 'next'))
+    else:
+        total_count = products.count()
+        paginator = Paginator(page_source.order_by(*ordering), 12)  # 12 products per page
+        page_obj = paginator.get_page(page_number)
 
     # Check if AJAX request
-    if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
+    if is_ajax:
         # Return JSON for AJAX requests
-        products_data = []
-        for product in page_obj:
-            products_data.append({
-                'id': product.id,
-                'name': product.name,
-                'description': product.description or '',
-                'price': float(product.price),
-                'stock': product.stock,
-                'calculated_stock': product.calculated_stock,
-                'threshold': product.threshold,
-                'category': product.category or '',
-                'is_low_stock': product.is_low_stock,
-                'image_url': product.image.url if product.image else None,
-            })
+        products_data = product_list_rows(list(page_obj))
 
-        return JsonResponse({
-            'success': True,
-            'products': products_data,
-            'pagination': {
+        if use_cursor:
+            pagination = keyset_pagination_data(page_obj, 12, request.GET.get('count', 'approx'), products)
+        else:
+            pagination = {
                 'current_page': page_obj.number,
                 'total_pages': paginator.num_pages,
                 'total_count': total_count,
@@ -116,6 +136,11 @@ def product_list(request):
                 'previous_page': page_obj.previous_page_number() if page_obj.has_previous() else None,
                 'next_page': page_obj.next_page_number() if page_obj.has_next() else None,
             }
+
+        return json_response({
+            'success': True,
+            'products': products_data,
+            'pagination': pagination,
         })
 
     # Regular page load
@@ -123,11 +148,12 @@ def product_list(request):
         'page_obj': page_obj,
         'products': page_obj,  # For backward compatibility
         'categories': categories,
-        'low_stock_count': len(low_stock_products),
+        'low_stock_count': low_stock_count,
         'total_count': total_count,
         'search': search,
         'selected_category': category,
         'selected_stock_status': stock_status,
+        'selected_sort': sort,
     }
     return render(request, 'products/list.html', context)
 
@@ -346,8 +372,10 @@ def product_edit(request, pk):
 def product_archive(request, pk):
     """Archive a product"""
     product = get_object_or_404(Product, pk=pk)
-    product.is_archived = True
-    product.save()
+    with transaction.atomic():
+        product.is_archived = True
+        product.save(update_fields=['is_archived', 'updated_at'])
+        Archive.record_archiver(product, request.user)
 
     # Create audit log
     AuditTrail.objects.create(
@@ -378,11 +406,7 @@ def archived_products_list(request):
 
     # Apply search filter
     if search:
-        archived_products = archived_products.filter(
-            Q(name__icontains=search) |
-            Q(description__icontains=search) |
-            Q(category__icontains=search)
-        )
+        archived_products = search_filter(archived_products, search, ['name', 'description', 'category'])
 
     # Apply category filter
     if category:
@@ -397,56 +421,40 @@ def archived_products_list(request):
     # Order by name
     archived_products = archived_products.order_by('name')
 
-    # Get archive info from AuditTrail
-    archive_info = {}
-    audit_records = AuditTrail.objects.filter(
-        action='ARCHIVE',
-        model_name='Product'
-    ).order_by('-created_at')
-
-    for record in audit_records:
-        if record.record_id not in archive_info:
-            archive_info[record.record_id] = {
-                'archived_by': record.user.username if record.user else 'Unknown',
-                'archived_at': record.created_at,
-            }
+    is_ajax = request.headers.get('X-Requested-With') == 'XMLHttpRequest'
+    if is_ajax:
+        # Plain rows for the JSON response (sales_inventory.serialization)
+        archived_products = archived_products.values(
+            'id', 'name', 'description', 'category', 'image', price_value=as_float('price'),
+        )
 
     # Pagination
     paginator = Paginator(archived_products, 12)  # 12 products per page
     page_obj = paginator.get_page(page_number)
 
-    # Attach archive info to each product
-    for product in page_obj:
-        if product.id in archive_info:
-            product.archive_info = archive_info[product.id]
-        else:
-            product.archive_info = {
-                'archived_by': 'Unknown',
-                'archived_at': 'Unknown date'
-            }
-
     # AJAX response for async filtering
-    if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
-        products_data = []
-        for product in page_obj:
-            archived_at_val = product.archive_info.get('archived_at')
-            if hasattr(archived_at_val, 'strftime'):
-                archived_at_display = archived_at_val.strftime("%Y-%m-%d %H:%M")
-            else:
-                archived_at_display = archived_at_val or 'Unknown date'
-
-            products_data.append({
-                'id': product.id,
-                'name': product.name,
-                'description': product.description or '',
-                'category': product.category or 'N/A',
-                'price': float(product.price),
-                'archived_by': product.archive_info.get('archived_by', 'Unknown'),
-                'archived_at': archived_at_display,
-                'image_url': product.image.url if product.image else '',
-            })
+    if is_ajax:
+        products_data = list(page_obj)
+        archive_info = {
+            entry['record_id']: entry
+            for entry in Archive.objects.filter(
+                model_name='Product',
+                record_id__in=[row['id'] for row in products_data]
+            ).values('record_id', 'created_at', archived_by_name=F('archived_by__username'))
+        }
+        for row in products_data:
+            entry = archive_info.get(row['id'], {})
+            row['archived_by'] = entry.get('archived_by_name') or 'Unknown'
+            row['archived_at'] = entry.get('created_at')
+        image_urls(products_data, 'image', '')
+        format_rows(
+            products_data,
+            rename={'price_value': 'price', 'image': 'image_url'},
+            datetimes={'archived_at': '%Y-%m-%d %H:%M'},
+            defaults={'description': '', 'category': 'N/A', 'archived_at': 'Unknown date'},
+        )
 
-        return JsonResponse({
+        return json_response({
             'success': True,
             'products': products_data,
             'pagination': {
@@ -466,6 +474,23 @@ def archived_products_list(request):
             }
         })
 
+    # Attach archive info from the archive index (current page only)
+    archive_info = {
+        entry.record_id: {
+            'archived_by': entry.archived_by.username if entry.archived_by else 'Unknown',
+            'archived_at': entry.created_at,
+        }
+        for entry in Archive.objects.filter(
+            model_name='Product',
+            record_id__in=[product.id for product in page_obj]
+        ).select_related('archived_by')
+    }
+    for product in page_obj:
+        product.archive_info = archive_info.get(product.id, {
+            'archived_by': 'Unknown',
+            'archived_at': 'Unknown date'
+        })
+
     # Regular page load
     context = {
         'page_obj': page_obj,
@@ -483,8 +508,9 @@ def archived_products_list(request):
 def product_unarchive(request, pk):
     """Restore an archived product"""
     product = get_object_or_404(Product, pk=pk, is_archived=True)
+    # Saving drops the archive entry (system.signals)
     product.is_archived = False
-    product.save()
+    product.save(update_fields=['is_archived', 'updated_at'])
 
     # Create audit log
     AuditTrail.objects.create(
@@ -880,9 +906,6 @@ def api_search_categories(request):
 @user_passes_test(is_admin)
 def api_search_archives(request):
     """API endpoint for searching all archived items (products, users, orders)"""
-    from accounts.models import User
-    from orders.models import Order
-
     query = request.GET.get('q', '').strip()
     archive_type = request.GET.get('type', 'all').strip().lower()
 
@@ -896,58 +919,38 @@ def api_search_archives(request):
     if not query:
         return JsonResponse(results)
 
-    # Search archived products
-    if archive_type in ['all', 'products']:
-        archived_products = Product.objects.filter(is_archived=True).filter(
-            Q(name__icontains=query) |
-            Q(description__icontains=query) |
-            Q(category__icontains=query)
-        ).order_by('name')[:10]
-
-        for product in archived_products:
-            results['products'].append({
-                'id': product.id,
-                'name': product.name,
-                'category': product.category or 'N/A',
-                'price': float(product.price),
-                'type': 'product'
-            })
-
-    # Search archived users/staff
-    if archive_type in ['all', 'users']:
-        archived_users = User.objects.filter(is_archived=True).filter(
-            Q(username__icontains=query) |
-            Q(email__icontains=query) |
-            Q(first_name__icontains=query) |
-            Q(last_name__icontains=query)
-        ).order_by('username')[:10]
-
-        for user in archived_users:
-            results['users'].append({
-                'id': user.id,
-                'username': user.username,
-                'email': user.email,
-                'full_name': f"{user.first_name} {user.last_name}".strip() or user.username,
-                'role': user.get_role_display(),
-                'type': 'user'
-            })
+    # Archive index model name -> (result key, result type)
+    result_keys = {
+        'Product': ('products', 'product'),
+        'User': ('users', 'user'),
+        'Order': ('orders', 'order'),
+    }
+    model_names = [
+        model_name for model_name, (key, _) in result_keys.items()
+        if archive_type in ['all', key]
+    ]
+    if not model_names:
+        return JsonResponse(results)
 
-    # Search archived orders
-    if archive_type in ['all', 'orders']:
-        archived_orders = Order.objects.filter(is_archived=True).filter(
-            Q(order_number__icontains=query) |
-            Q(customer_name__icontains=query)
-        ).order_by('-created_at')[:10]
-
-        for order in archived_orders:
-            results['orders'].append({
-                'id': order.id,
-                'order_number': order.order_number,
-                'customer_name': order.customer_name or 'N/A',
-                'status': order.get_status_display(),
-                'total_amount': float(order.total_amount),
-                'created_at': order.created_at.strftime("%Y-%m-%d %H:%M"),
-                'type': 'order'
-            })
+    # One ranked query over the archive index, capped at 10 results per type
+    for entry in Archive.search(query, model_names=model_names, limit=10):
+        key, result_type = result_keys[entry.model_name]
+        results[key].append({'id': entry.record_id, **entry.data, 'type': result_type})
 
     return JsonResponse(results)
+
+
+@require_http_methods(["GET", "HEAD"])
+def product_image_variant(request, pk, image_hash, width, fmt):
+    """Resized product image, public for the kiosk (see products.thumbnails)"""
+    product = get_object_or_404(Product.objects.only('image', 'image_hash'), pk=pk)
+    if (not product.image or product.image_hash != image_hash
+            or width not in VARIANT_WIDTHS or fmt not in VARIANT_FORMATS):
+        # Stale hash after a new upload, or a size or format we don't generate
+        raise Http404('No such image variant')
+
+    name = ensure_variant(product, width, fmt)
+    response = FileResponse(default_storage.open(name, 'rb'), content_type=CONTENT_TYPES[fmt])
+    # The URL changes with the image's contents, so it can be cached forever
+    response['Cache-Control'] = 'public, max-age=31536000, immutable'
+    return response
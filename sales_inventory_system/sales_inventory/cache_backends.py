@@ -0,0 +1,207 @@
+"""
+SQLite-file cache backend shared by every worker process on a host.
+
+LocMemCache keeps one copy of the cache per gunicorn worker, so cached
+pages and forecasts are recomputed once per worker and hit rates fall as
+workers are added. SQLiteCache stores entries in a single SQLite database
+file (WAL mode, so readers don't block the writer) and needs no outside
+service. For several hosts, point REDIS_URL at a Redis server instead
+(see settings.CACHES).
+
+MAX_ENTRIES bounds the entry count: every CULL_CHECK_INTERVAL writes,
+expired entries are purged and, when still over the limit, those closest
+to expiry are evicted. MAX_ENTRIES 0 never evicts unexpired entries and
+only purges expired ones, for data that must not disappear early (carts).
+
+    CACHES = {
+        "default": {
+            "BACKEND": "sales_inventory_system.sales_inventory.cache_backends.SQLiteCache",
+            "LOCATION": "/var/tmp/fcj-cache.sqlite3",
+        }
+    }
+"""
+
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+# Writes between two checks of the entry count against MAX_ENTRIES
+CULL_CHECK_INTERVAL = 100
+
+
+class SQLiteCache(BaseCache):
+    """Django cache backend storing pickled values in a shared SQLite file"""
+
+    pickle_protocol = pickle.HIGHEST_PROTOCOL
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        self._path = str(location)
+        self._local = threading.local()
+        self._writes = 0
+
+    # ---- connection ----
+
+    def _connection(self):
+        # One connection per thread, reopened after a fork (gunicorn --preload)
+        connection = getattr(self._local, 'connection', None)
+        if connection is not None and self._local.pid == os.getpid():
+            return connection
+
+        Path(self._path).parent.mkdir(parents=True, exist_ok=True)
+        connection = sqlite3.connect(self._path, timeout=5, isolation_level=None, check_same_thread=False)
+        connection.execute('PRAGMA journal_mode=WAL')
+        connection.execute('PRAGMA synchronous=NORMAL')
+        connection.execute(
+            'CREATE TABLE IF NOT EXISTS cache_entries ('
+            'key TEXT PRIMARY KEY, value BLOB NOT NULL, expires REAL)'
+        )
+        connection.execute('CREATE INDEX IF NOT EXISTS cache_entries_expires ON cache_entries (expires)')
+        self._local.connection = connection
+        self._local.pid = os.getpid()
+        return connection
+
+    def close(self, **kwargs):
+        # Connections are kept open across requests; they are per thread
+        pass
+
+    # ---- helpers ----
+
+    def _dumps(self, value):
+        return sqlite3.Binary(pickle.dumps(value, self.pickle_protocol))
+
+    def _expiry(self, timeout):
+        # None: never expires; past timestamps (timeout <= 0) expire immediately
+        return self.get_backend_timeout(timeout)
+
+    def _after_write(self, connection):
+        self._writes += 1
+        if self._writes % CULL_CHECK_INTERVAL == 0:
+            self._cull(connection)
+
+    def _cull(self, connection):
+        now = time.time()
+        connection.execute('DELETE FROM cache_entries WHERE expires IS NOT NULL AND expires <= ?', (now,))
+        if not self._max_entries:
+            return
+        count = connection.execute('SELECT COUNT(*) FROM cache_entries').fetchone()[0]
+        if count > self._max_entries:
+            to_delete = count // self._cull_frequency if self._cull_frequency else count
+            connection.execute(
+                'DELETE FROM cache_entries WHERE key IN ('
+                'SELECT key FROM cache_entries ORDER BY expires IS NULL, expires LIMIT ?)',
+                (max(to_delete, count - self._max_entries),)
+            )
+
+    # ---- cache API ----
+
+    def get(self, key, default=None, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        row = self._connection().execute(
+            'SELECT value FROM cache_entries WHERE key = ? AND (expires IS NULL OR expires > ?)',
+            (key, time.time())
+        ).fetchone()
+        if row is None:
+            return default
+        return pickle.loads(row[0])
+
+    def get_many(self, keys, version=None):
+        key_map = {self.make_and_validate_key(key, version=version): key for key in keys}
+        if not key_map:
+            return {}
+        placeholders = ', '.join('?' * len(key_map))
+        rows = self._connection().execute(
+            f'SELECT key, value FROM cache_entries WHERE key IN ({placeholders}) '
+            'AND (expires IS NULL OR expires > ?)',
+            (*key_map, time.time())
+        ).fetchall()
+        return {key_map[key]: pickle.loads(value) for key, value in rows}
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        connection = self._connection()
+        connection.execute(
+            'INSERT OR REPLACE INTO cache_entries (key, value, expires) VALUES (?, ?, ?)',
+            (key, self._dumps(value), self._expiry(timeout))
+        )
+        self._after_write(connection)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        expires = self._expiry(timeout)
+        rows = [
+            (self.make_and_validate_key(key, version=version), self._dumps(value), expires)
+            for key, value in data.items()
+        ]
+        connection = self._connection()
+        with connection:
+            connection.execute('BEGIN IMMEDIATE')
+            connection.executemany(
+                'INSERT OR REPLACE INTO cache_entries (key, value, expires) VALUES (?, ?, ?)', rows
+            )
+        self._after_write(connection)
+        return []
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        """Set the key only if it is missing or expired; atomic across processes"""
+        key = self.make_and_validate_key(key, version=version)
+        connection = self._connection()
+        cursor = connection.execute(
+            'INSERT INTO cache_entries (key, value, expires) VALUES (?, ?, ?) '
+            'ON CONFLICT (key) DO UPDATE SET value = excluded.value, expires = excluded.expires '
+            'WHERE cache_entries.expires IS NOT NULL AND cache_entries.expires <= ?',
+            (key, self._dumps(value), self._expiry(timeout), time.time())
+        )
+        if cursor.rowcount:
+            self._after_write(connection)
+        return cursor.rowcount > 0
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        cursor = self._connection().execute(
+            'UPDATE cache_entries SET expires = ? WHERE key = ? AND (expires IS NULL OR expires > ?)',
+            (self._expiry(timeout), key, time.time())
+        )
+        return cursor.rowcount > 0
+
+    def incr(self, key, delta=1, version=None):
+        """Atomically add delta to a stored number; ValueError if the key is missing"""
+        key = self.make_and_validate_key(key, version=version)
+        connection = self._connection()
+        with connection:
+            connection.execute('BEGIN IMMEDIATE')
+            row = connection.execute(
+                'SELECT value FROM cache_entries WHERE key = ? AND (expires IS NULL OR expires > ?)',
+                (key, time.time())
+            ).fetchone()
+            if row is None:
+                raise ValueError(f"Key '{key}' not found")
+            value = pickle.loads(row[0]) + delta
+            connection.execute('UPDATE cache_entries SET value = ? WHERE key = ?', (self._dumps(value), key))
+        return value
+
+    def has_key(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        row = self._connection().execute(
+            'SELECT 1 FROM cache_entries WHERE key = ? AND (expires IS NULL OR expires > ?)',
+            (key, time.time())
+        ).fetchone()
+        return row is not None
+
+    def delete(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        cursor = self._connection().execute('DELETE FROM cache_entries WHERE key = ?', (key,))
+        return cursor.rowcount > 0
+
+    def delete_many(self, keys, version=None):
+        rows = [(self.make_and_validate_key(key, version=version),) for key in keys]
+        connection = self._connection()
+        with connection:
+            connection.execute('BEGIN IMMEDIATE')
+            connection.executemany('DELETE FROM cache_entries WHERE key = ?', rows)
+
+    def clear(self):
+        self._connection().execute('DELETE FROM cache_entries')
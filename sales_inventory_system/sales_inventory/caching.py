@@ -0,0 +1,176 @@
+"""
+Cache helpers: per-family TTLs, stampede protection and hit/miss counters.
+
+Cached values are grouped into key families (e.g. "forecast", "dashboard_revenue")
+whose TTLs come from settings.CACHE_TTLS, falling back to the default cache's
+TIMEOUT.
+
+get_or_compute() protects expensive values against stampedes:
+
+- Probabilistic early refresh (XFetch): each read may decide to recompute
+  shortly before expiry, with a probability that grows as expiry nears and
+  with how long the value took to compute, so one request refreshes it
+  before everyone sees a miss.
+- A short cache lock (cache.add) lets only one process recompute a key;
+  the others keep serving the previous value, or briefly wait for the
+  first computation when there is none.
+
+Outcomes are counted per family in-process and flushed to the shared cache
+every COUNTER_FLUSH_INTERVAL seconds; see cache_stats() and the cache_stats
+management command.
+"""
+
+import math
+import random
+import threading
+import time
+from collections import Counter, defaultdict
+from django.conf import settings
+from django.core.cache import caches
+
+# How long an expired value is kept to be served while it is recomputed
+STALE_GRACE = 60
+
+# Lock lifetime, and how long a caller without any value waits for another's computation
+LOCK_TIMEOUT = 30
+LOCK_WAIT = 5.0
+LOCK_POLL_INTERVAL = 0.05
+
+# XFetch aggressiveness; > 1 refreshes earlier, < 1 later
+EARLY_REFRESH_BETA = 1.0
+
+COUNTER_FLUSH_INTERVAL = 10
+OUTCOMES = ('hit', 'miss', 'stale', 'refresh')
+
+_counters = defaultdict(Counter)
+_counters_lock = threading.Lock()
+_last_flush = time.monotonic()
+
+
+def cache_ttl(family):
+    """TTL in seconds for a key family"""
+    ttls = getattr(settings, 'CACHE_TTLS', {})
+    if family in ttls:
+        return ttls[family]
+    return settings.CACHES['default'].get('TIMEOUT', 300)
+
+
+def family_key(family, key):
+    return f'{family}:{key}'
+
+
+def _record(family, outcome, using):
+    with _counters_lock:
+        _counters[family][outcome] += 1
+        due = time.monotonic() - _last_flush >= COUNTER_FLUSH_INTERVAL
+    if due:
+        flush_counters(using)
+
+
+def flush_counters(using='default'):
+    """Add this process's counters to the shared totals in the cache"""
+    global _last_flush
+    with _counters_lock:
+        pending = {family: counts for family, counts in _counters.items() if counts}
+        _counters.clear()
+        _last_flush = time.monotonic()
+
+    cache = caches[using]
+    for family, counts in pending.items():
+        for outcome, count in counts.items():
+            key = f'cache_stats:{family}:{outcome}'
+            if not cache.add(key, count, None):
+                try:
+                    cache.incr(key, count)
+                except ValueError:
+                    cache.set(key, count, None)
+
+
+def cache_stats(families=None, using='default'):
+    """Shared hit/miss totals per family: {family: {outcome: count, 'hit_rate': float}}"""
+    flush_counters(using)
+    families = families or sorted(getattr(settings, 'CACHE_TTLS', {}))
+    cache = caches[using]
+    stats = {}
+    for family in families:
+        keys = [f'cache_stats:{family}:{outcome}' for outcome in OUTCOMES]
+        values = cache.get_many(keys)
+        counts = {outcome: values.get(key, 0) for outcome, key in zip(OUTCOMES, keys)}
+        served = counts['hit'] + counts['stale']
+        total = served + counts['miss'] + counts['refresh']
+        counts['hit_rate'] = served / total if total else 0.0
+        stats[family] = counts
+    return stats
+
+
+def reset_cache_stats(families=None, using='default'):
+    with _counters_lock:
+        _counters.clear()
+    families = families or sorted(getattr(settings, 'CACHE_TTLS', {}))
+    caches[using].delete_many([
+        f'cache_stats:{family}:{outcome}' for family in families for outcome in OUTCOMES
+    ])
+
+
+def get_or_compute(family, key, compute, ttl=None, using='default'):
+    """
+    Return the cached value of family:key, computing and storing it when needed.
+
+    Args:
+        family: key family, selects the TTL and the counters
+        key: key within the family
+        compute: zero-argument callable producing the value
+        ttl: override the family TTL (seconds)
+        using: cache alias
+
+    Returns:
+        The cached or freshly computed value
+    """
+    cache = caches[using]
+    full_key = family_key(family, key)
+    lock_key = f'{full_key}:lock'
+    ttl = cache_ttl(family) if ttl is None else ttl
+
+    locked = False
+    entry = cache.get(full_key)
+    if entry is not None:
+        value, expires_at, delta = entry
+        # XFetch: -log(U) is >= 0, so this pulls the effective expiry earlier
+        if time.time() - delta * EARLY_REFRESH_BETA * math.log(1.0 - random.random()) < expires_at:
+            _record(family, 'hit', using)
+            return value
+        locked = cache.add(lock_key, True, LOCK_TIMEOUT)
+        if not locked:
+            # Someone else is refreshing it; the previous value is still good enough
+            _record(family, 'stale', using)
+            return value
+        outcome = 'refresh'
+    else:
+        locked = cache.add(lock_key, True, LOCK_TIMEOUT)
+        outcome = 'miss'
+
+    if entry is None and not locked:
+        # Another process is computing the first value; wait for it briefly
+        deadline = time.monotonic() + LOCK_WAIT
+        while time.monotonic() < deadline:
+            time.sleep(LOCK_POLL_INTERVAL)
+            entry = cache.get(full_key)
+            if entry is not None:
+                _record(family, 'hit', using)
+                return entry[0]
+
+    _record(family, outcome, using)
+    try:
+        started = time.time()
+        value = compute()
+        delta = time.time() - started
+        cache.set(full_key, (value, time.time() + ttl, delta), ttl + STALE_GRACE)
+    finally:
+        if locked:
+            cache.delete(lock_key)
+    return value
+
+
+def invalidate(family, key, using='default'):
+    """Drop a cached value so the next read recomputes it"""
+    caches[using].delete(family_key(family, key))
@@ -2,11 +2,14 @@
 Dashboard views for different user roles
 """
 from django.shortcuts import render
+from django.http import JsonResponse
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.db.models import F, Sum, Count, Q
 from django.utils import timezone
 from sales_inventory_system.products.models import Product
 from sales_inventory_system.orders.models import Order, Payment
+from sales_inventory_system.orders.order_board import board as order_board
+from .dates import day_range
 from decimal import Decimal
 
 def is_admin(user):
@@ -23,21 +26,17 @@ def admin_dashboard(request):
     # Get statistics
     total_products = Product.objects.filter(is_archived=False).count()
 
-    # Get low stock products using calculated_stock (accounts for BOM products)
-    all_active_products = Product.objects.filter(is_archived=False).select_related(
-        'recipe'
-    ).prefetch_related(
-        'recipe__ingredients__ingredient'
-    )
-    low_stock_products_list = [p for p in all_active_products if p.calculated_stock < p.threshold]
-    low_stock_count = len(low_stock_products_list)
-    low_stock_products = low_stock_products_list[:5]
+    # Low stock products by producible units (accounts for BOM products)
+    low_stock_products = Product.objects.filter(is_archived=False, producible_units__lt=F('threshold'))
+    low_stock_count = low_stock_products.count()
+    low_stock_products = low_stock_products.order_by('name')[:5]
 
     # Order statistics
     pending_orders = Order.objects.filter(status='PENDING').count()
     in_progress_orders = Order.objects.filter(status='IN_PROGRESS').count()
+    today_start, today_end = day_range(timezone.localdate())
     today_orders = Order.objects.filter(
-        created_at__date=timezone.now().date()
+        created_at__gte=today_start, created_at__lt=today_end
     ).count()
 
     # Revenue statistics
@@ -47,7 +46,8 @@ def admin_dashboard(request):
 
     today_revenue = Payment.objects.filter(
         status='SUCCESS',
-        created_at__date=timezone.now().date()
+        created_at__gte=today_start,
+        created_at__lt=today_end
     ).aggregate(total=Sum('amount'))['total'] or Decimal('0.00')
 
     # Recent orders
@@ -73,25 +73,31 @@ def admin_dashboard(request):
 def cashier_pos(request):
     """Cashier POS interface"""
 
-    # Get orders by status with prefetch for efficiency
-    pending_orders = Order.objects.filter(status='PENDING').select_related('payment').prefetch_related('items__product').order_by('-created_at')
-    in_progress_orders = Order.objects.filter(status='IN_PROGRESS').prefetch_related('items__product').order_by('-created_at')
-    finished_orders = Order.objects.filter(status='FINISHED').prefetch_related('items__product').order_by('-created_at')[:10]  # Last 10 finished
+    # Active orders and today's statistics come from the in-memory order board,
+    # which only touches the database when orders have changed
+    context = order_board.snapshot()
 
-    # Today's statistics
-    today = timezone.now().date()
-    today_orders_count = Order.objects.filter(created_at__date=today).count()
-    today_completed = Order.objects.filter(status='FINISHED', created_at__date=today).count()
-    today_revenue = Payment.objects.filter(status='SUCCESS', created_at__date=today).aggregate(total=Sum('amount'))['total'] or Decimal('0.00')
+    return render(request, 'dashboards/pos.html', context)
+
+
+@login_required
+@user_passes_test(is_cashier)
+def kitchen_display(request):
+    """Kitchen display queue: paid orders to prepare, oldest first"""
+    snapshot = order_board.snapshot()
 
     context = {
-        'pending_orders': pending_orders,
-        'in_progress_orders': in_progress_orders,
-        'finished_orders': finished_orders,
-        'today_orders_count': today_orders_count,
-        'today_completed': today_completed,
-        'today_revenue': today_revenue,
-        'pending_count': pending_orders.count(),
+        'in_progress_orders': list(reversed(snapshot['in_progress_orders'])),
+        'pending_count': snapshot['pending_count'],
+        'finished_orders': snapshot['finished_orders'][:5],
+        'now': timezone.now(),
     }
 
-    return render(request, 'dashboards/pos.html', context)
+    if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
+        return JsonResponse({
+            'in_progress_orders': [order.as_dict() for order in context['in_progress_orders']],
+            'finished_orders': [order.as_dict() for order in context['finished_orders']],
+            'pending_count': context['pending_count'],
+        })
+
+    return render(request, 'dashboards/kitchen.html', context)
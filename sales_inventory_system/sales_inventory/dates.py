@@ -0,0 +1,25 @@
+"""
+Date range helpers for filtering timestamp columns.
+
+A lookup such as created_at__date=day wraps the column in a date function,
+which no index on created_at can serve. Filtering on the equivalent range
+of timestamps keeps the (status, created_at) style indexes usable:
+
+    start, end = day_range(day)
+    Payment.objects.filter(status='SUCCESS', created_at__gte=start, created_at__lt=end)
+
+Days are interpreted in the current time zone, like the __date lookup.
+"""
+
+from datetime import datetime, time, timedelta
+from django.utils import timezone
+
+
+def day_start(day):
+    """Aware datetime of midnight at the start of a date"""
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def day_range(first, last=None):
+    """(start, end) datetimes covering the dates first..last inclusive, end exclusive"""
+    return day_start(first), day_start((last or first) + timedelta(days=1))
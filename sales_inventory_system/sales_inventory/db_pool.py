@@ -0,0 +1,146 @@
+"""
+PostgreSQL connection pool helpers (Django 5.1+ with psycopg 3 and psycopg_pool).
+
+With DB_POOL enabled (see settings), every worker process keeps a pool of
+open connections: a request checks one out on its first query and returns
+it when the request finishes, instead of each thread holding a persistent
+connection or reconnecting per request. Pool sizes come from the DB_POOL_*
+environment variables, which gunicorn.conf.py defaults per worker class.
+
+Pool statistics (checkout wait time, connection setup time, time in use)
+are per process. Each worker publishes its figures to the shared cache
+every STATS_INTERVAL seconds (see post_worker_init in gunicorn.conf.py),
+and `manage.py db_pool_stats` reports them for all workers.
+"""
+
+import logging
+import os
+import socket
+import threading
+from django.core.cache import cache
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+# Seconds between publishing a worker's pool statistics
+STATS_INTERVAL = 10
+
+STATS_KEY = 'dbpool:stats:{}'
+WORKERS_KEY = 'dbpool:workers'
+STATS_TTL = STATS_INTERVAL * 6  # workers that stop publishing drop out of the report
+
+_publisher_thread = None
+_publisher_lock = threading.Lock()
+
+
+def pooled_connections():
+    """Connections configured with a pool, whether or not it has been opened"""
+    return [
+        connection for connection in connections.all()
+        if connection.vendor == 'postgresql' and connection.settings_dict['OPTIONS'].get('pool')
+    ]
+
+
+def _open_pool(connection):
+    # DatabaseWrapper.pool creates the pool on first access; only report pools in use
+    return type(connection)._connection_pools.get(connection.alias)
+
+
+def close_inherited_pools():
+    """
+    Close pools opened before the process forked.
+
+    With preload_app, anything the gunicorn master connected to is inherited
+    by every worker, and a pool's connections and maintenance threads must
+    not be shared between processes. Each worker opens its own on first use.
+    """
+    for connection in pooled_connections():
+        if _open_pool(connection) is not None:
+            connection.close_pool()
+
+
+def pool_stats():
+    """This process's pool figures per database alias"""
+    stats = {}
+    for connection in pooled_connections():
+        pool = _open_pool(connection)
+        if pool is not None:
+            stats[connection.alias] = pool.get_stats()
+    return stats
+
+
+def publish_pool_stats(stats=None, worker_id=None):
+    """Store this process's pool statistics in the shared cache"""
+    stats = pool_stats() if stats is None else stats
+    if not stats:
+        return
+    worker_id = worker_id or f'{socket.gethostname()}:{os.getpid()}'
+    cache.set(STATS_KEY.format(worker_id), stats, STATS_TTL)
+    workers = cache.get(WORKERS_KEY) or []
+    if worker_id not in workers:
+        cache.set(WORKERS_KEY, workers[-99:] + [worker_id], None)
+
+
+def collect_pool_stats():
+    """Published statistics of all live workers, as {worker_id: {alias: stats}}"""
+    workers = cache.get(WORKERS_KEY) or []
+    found = cache.get_many([STATS_KEY.format(worker_id) for worker_id in workers])
+    return {
+        worker_id: found[STATS_KEY.format(worker_id)]
+        for worker_id in workers if STATS_KEY.format(worker_id) in found
+    }
+
+
+def summarize(stats):
+    """Derived figures for one pool's get_stats() counters"""
+    requests = stats.get('requests_num', 0)
+    connections_opened = stats.get('connections_num', 0)
+    return {
+        'size': stats.get('pool_size', 0),
+        'available': stats.get('pool_available', 0),
+        'waiting': stats.get('requests_waiting', 0),
+        'checkouts': requests,
+        'queued': stats.get('requests_queued', 0),
+        'errors': stats.get('requests_errors', 0) + stats.get('connections_errors', 0),
+        'avg_wait_ms': stats.get('requests_wait_ms', 0) / requests if requests else 0.0,
+        'avg_usage_ms': stats.get('usage_ms', 0) / requests if requests else 0.0,
+        'connections_opened': connections_opened,
+        'avg_connect_ms': stats.get('connections_ms', 0) / connections_opened if connections_opened else 0.0,
+    }
+
+
+def _run_forever(interval, stop_event):
+    while not stop_event.wait(interval):
+        try:
+            publish_pool_stats()
+        except Exception as e:
+            logger.error(f"Publishing database pool statistics failed: {str(e)}")
+
+
+def start_stats_publisher(interval=STATS_INTERVAL):
+    """
+    Start the per-process thread publishing pool statistics (once per process).
+
+    Returns:
+        threading.Event that stops the publisher when set, or None if no pool is configured
+    """
+    global _publisher_thread
+
+    if interval <= 0 or not pooled_connections():
+        return None
+
+    with _publisher_lock:
+        if _publisher_thread is not None and _publisher_thread.is_alive():
+            return _publisher_thread.stop_event
+
+        stop_event = threading.Event()
+        thread = threading.Thread(
+            target=_run_forever,
+            args=(interval, stop_event),
+            name='db-pool-stats',
+            daemon=True,
+        )
+        thread.stop_event = stop_event
+        thread.start()
+        _publisher_thread = thread
+        return stop_event
@@ -0,0 +1,201 @@
+"""
+Per-request instrumentation: query count, DB time, latency and response size.
+
+InstrumentationMiddleware measures every request and adds the figures to
+the Server-Timing header. A sample of requests (PERF_SAMPLE_RATE) is kept
+in a per-process buffer and flushed in batches to a ring of slots in the
+shared cache, so `manage.py perf_report` can report p50/p95/p99 per URL
+name across all workers.
+
+Queries are counted by an execute wrapper installed on every database
+connection; it reads the current request's counters from a context
+variable, so queries run from async views (in sync_to_async threads) are
+counted too, and it costs one context lookup outside requests.
+"""
+
+import contextvars
+import logging
+import math
+import random
+import threading
+import time
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from django.db.backends.signals import connection_created
+from .timing import ServerTiming
+
+logger = logging.getLogger(__name__)
+
+# Shared ring: PERF_RING_SLOTS cache keys, each holding one flushed batch of samples
+RING_CURSOR_KEY = 'perf:ring:cursor'
+RING_SLOT_KEY = 'perf:ring:{}'
+RING_TTL = 3600 * 24
+
+# A process flushes its buffer after this many samples or seconds
+FLUSH_BATCH_SIZE = 50
+FLUSH_INTERVAL = 10
+
+# Sample fields, stored as tuples to keep slots small
+SAMPLE_FIELDS = ('timestamp', 'url_name', 'method', 'status', 'total_ms', 'db_ms', 'queries', 'size')
+
+_current = contextvars.ContextVar('perf_request_stats', default=None)
+
+
+class RequestStats:
+    __slots__ = ('queries', 'db_time')
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+
+
+def _record_query(execute, sql, params, many, context):
+    stats = _current.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.db_time += time.perf_counter() - start
+        stats.queries += 1
+
+
+def install_query_wrapper(connection, **kwargs):
+    if _record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_record_query)
+
+
+connection_created.connect(install_query_wrapper, dispatch_uid='perf_install_query_wrapper')
+
+
+class SampleBuffer:
+    """Per-process sample buffer, flushed in batches into the shared ring"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._samples = []
+        self._last_flush = time.monotonic()
+
+    def add(self, sample):
+        with self._lock:
+            self._samples.append(sample)
+            due = (
+                len(self._samples) >= FLUSH_BATCH_SIZE
+                or time.monotonic() - self._last_flush >= FLUSH_INTERVAL
+            )
+        if due:
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            batch, self._samples = self._samples, []
+            self._last_flush = time.monotonic()
+        if not batch:
+            return
+        try:
+            if cache.add(RING_CURSOR_KEY, 0, None):
+                position = 0
+            else:
+                position = cache.incr(RING_CURSOR_KEY)
+            slot = position % getattr(settings, 'PERF_RING_SLOTS', 200)
+            cache.set(RING_SLOT_KEY.format(slot), batch, RING_TTL)
+        except Exception as e:
+            # Instrumentation must never break a request
+            logger.warning(f'Could not flush performance samples: {e}')
+
+
+buffer = SampleBuffer()
+
+
+def load_samples():
+    """All samples currently in the shared ring, as dicts"""
+    buffer.flush()
+    slots = getattr(settings, 'PERF_RING_SLOTS', 200)
+    batches = cache.get_many([RING_SLOT_KEY.format(slot) for slot in range(slots)])
+    return [
+        dict(zip(SAMPLE_FIELDS, sample))
+        for batch in batches.values()
+        for sample in batch
+    ]
+
+
+def clear_samples():
+    slots = getattr(settings, 'PERF_RING_SLOTS', 200)
+    cache.delete_many([RING_SLOT_KEY.format(slot) for slot in range(slots)] + [RING_CURSOR_KEY])
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    rank = math.ceil(fraction * len(sorted_values))
+    return sorted_values[min(max(rank, 1), len(sorted_values)) - 1]
+
+
+class InstrumentationMiddleware:
+    """Measure each request, emit Server-Timing and sample it into the ring buffer"""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.sample_rate = getattr(settings, 'PERF_SAMPLE_RATE', 0.1)
+        self.slow_request_ms = getattr(settings, 'PERF_SLOW_REQUEST_MS', 1000)
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+        # Connections opened before this module was imported missed connection_created
+        for connection in connections.all(initialized_only=True):
+            install_query_wrapper(connection)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        stats, token, started = self._start(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self._finish(request, response, stats, started)
+
+    async def __acall__(self, request):
+        stats, token, started = self._start(request)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self._finish(request, response, stats, started)
+
+    def _start(self, request):
+        stats = RequestStats()
+        request.server_timing = ServerTiming()
+        return stats, _current.set(stats), time.perf_counter()
+
+    def _finish(self, request, response, stats, started):
+        total_ms = (time.perf_counter() - started) * 1000
+        db_ms = stats.db_time * 1000
+        size = None if response.streaming else len(response.content)
+
+        timing = request.server_timing
+        timing.add('db', db_ms, f'{stats.queries} queries')
+        timing.add('app', total_ms)
+        response['Server-Timing'] = timing.header_value(total=False)
+
+        match = getattr(request, 'resolver_match', None)
+        url_name = match.view_name if match else '<unresolved>'
+
+        if total_ms >= self.slow_request_ms:
+            logger.warning(
+                f'Slow request {request.method} {url_name}: {total_ms:.0f} ms, '
+                f'{stats.queries} queries, {db_ms:.0f} ms DB'
+            )
+
+        if random.random() < self.sample_rate:
+            buffer.add((
+                time.time(), url_name, request.method, response.status_code,
+                round(total_ms, 2), round(db_ms, 2), stats.queries, size,
+            ))
+        return response
@@ -0,0 +1,385 @@
+"""
+Load-test scenarios that replay kiosk, POS, cashier and admin traffic.
+
+Every virtual user is a thread with its own cookie jar (session and CSRF
+token) that logs in if its scenario needs a role, then repeats the
+scenario's steps against a running server, with randomized think time,
+until the test ends. Redirects are not followed, so every step is one
+request and a 3xx counts as success.
+
+Scenarios:
+
+- kiosk_browse: menu page and cart refreshes (anonymous)
+- kiosk_checkout: menu, add items, checkout; leaves a PENDING order
+- pos_checkout: cashier rings up a paid order at the POS
+- cashier_payments: cashier confirms payments of pending kiosk orders
+- admin_dashboard: analytics dashboard, chart data and admin overview
+- forecast_refresh: sales forecast and BOM dashboard
+
+Only the standard library is used, so it runs wherever the app does:
+`python manage.py load_test --url http://127.0.0.1:8000` (see the command
+for options). Run it on a different machine or core than the server when
+measuring the server's limits.
+"""
+
+import http.cookiejar
+import json
+import random
+import re
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import defaultdict
+
+from .instrumentation import percentile
+
+
+class NoRedirect(urllib.request.HTTPRedirectHandler):
+    """Report redirects instead of following them"""
+
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        return None
+
+
+class StepResult:
+    __slots__ = ('status', 'elapsed_ms', 'body', 'headers')
+
+    def __init__(self, status, elapsed_ms, body=b'', headers=None):
+        self.status = status
+        self.elapsed_ms = elapsed_ms
+        self.body = body
+        self.headers = headers or {}
+
+    @property
+    def ok(self):
+        return 0 < self.status < 400
+
+    def json(self):
+        try:
+            return json.loads(self.body)
+        except ValueError:
+            return {}
+
+
+class Stats:
+    """Thread-safe latency and error counters per scenario and step"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._samples = defaultdict(list)
+        self._errors = defaultdict(int)
+        self._iterations = defaultdict(int)
+        self.started = time.monotonic()
+        self.finished = None
+
+    def record(self, scenario, step, result):
+        with self._lock:
+            self._samples[(scenario, step)].append(result.elapsed_ms)
+            if not result.ok:
+                self._errors[(scenario, step)] += 1
+
+    def iteration(self, scenario):
+        with self._lock:
+            self._iterations[scenario] += 1
+
+    def _summary(self, latencies, errors, duration):
+        latencies = sorted(latencies)
+        count = len(latencies)
+        return {
+            'requests': count,
+            'rps': round(count / duration, 2) if duration else 0.0,
+            'p50_ms': round(percentile(latencies, 0.50) or 0, 1),
+            'p95_ms': round(percentile(latencies, 0.95) or 0, 1),
+            'p99_ms': round(percentile(latencies, 0.99) or 0, 1),
+            'max_ms': round(latencies[-1], 1) if latencies else 0.0,
+            'errors': errors,
+            'error_rate': round(errors / count, 4) if count else 0.0,
+        }
+
+    def report(self):
+        duration = (self.finished or time.monotonic()) - self.started
+        with self._lock:
+            steps = {key: list(values) for key, values in self._samples.items()}
+            errors = dict(self._errors)
+            iterations = dict(self._iterations)
+
+        scenarios, by_step = {}, {}
+        for scenario in sorted({scenario for scenario, _ in steps}):
+            keys = [key for key in steps if key[0] == scenario]
+            scenarios[scenario] = {
+                **self._summary(
+                    [ms for key in keys for ms in steps[key]],
+                    sum(errors.get(key, 0) for key in keys),
+                    duration,
+                ),
+                'iterations': iterations.get(scenario, 0),
+            }
+            by_step[scenario] = {
+                step: self._summary(steps[(scenario, step)], errors.get((scenario, step), 0), duration)
+                for _, step in sorted(keys)
+            }
+
+        return {
+            'duration_s': round(duration, 1),
+            'total': self._summary([ms for values in steps.values() for ms in values], sum(errors.values()), duration),
+            'scenarios': scenarios,
+            'steps': by_step,
+        }
+
+
+class VirtualUser:
+    """One simulated browser: cookie jar, CSRF token and request timing"""
+
+    def __init__(self, base_url, stats, scenario, timeout=30):
+        self.base_url = base_url.rstrip('/')
+        self.stats = stats
+        self.scenario = scenario
+        self.timeout = timeout
+        self.cookies = http.cookiejar.CookieJar()
+        self.opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(self.cookies), NoRedirect)
+
+    def csrf_token(self):
+        for cookie in self.cookies:
+            if cookie.name == 'csrftoken':
+                return cookie.value
+        return ''
+
+    def request(self, step, method, path, data=None, json_body=None, headers=None, scenario=None):
+        url = self.base_url + path
+        headers = {'Referer': self.base_url + '/', **(headers or {})}
+        body = None
+        if json_body is not None:
+            body = json.dumps(json_body).encode()
+            headers['Content-Type'] = 'application/json'
+        elif data is not None:
+            body = urllib.parse.urlencode(data).encode()
+            headers['Content-Type'] = 'application/x-www-form-urlencoded'
+        if method == 'POST':
+            headers['X-CSRFToken'] = self.csrf_token()
+
+        started = time.perf_counter()
+        try:
+            with self.opener.open(urllib.request.Request(url, body, headers, method=method),
+                                  timeout=self.timeout) as response:
+                result = StepResult(response.status, 0, response.read(), response.headers)
+        except urllib.error.HTTPError as e:
+            result = StepResult(e.code, 0, e.read(), e.headers)
+        except (urllib.error.URLError, OSError):
+            # Connection refused/reset or timeout: counted as an error
+            result = StepResult(0, 0)
+        result.elapsed_ms = (time.perf_counter() - started) * 1000
+
+        self.stats.record(scenario or self.scenario.name, step, result)
+        return result
+
+    def get(self, step, path, **kwargs):
+        return self.request(step, 'GET', path, **kwargs)
+
+    def post(self, step, path, data=None, **kwargs):
+        return self.request(step, 'POST', path, data=data, **kwargs)
+
+    def ajax(self, step, path):
+        return self.get(step, path, headers={'X-Requested-With': 'XMLHttpRequest'})
+
+    def ensure_csrf(self):
+        """Pages without a form do not set the CSRF cookie; the login page does"""
+        if not self.csrf_token():
+            self.get('csrf', '/accounts/login/', scenario='login')
+
+    def login(self, username, password):
+        # Reported as its own scenario so logins don't skew the journeys' latencies
+        self.get('form', '/accounts/login/', scenario='login')
+        result = self.post(
+            'submit', '/accounts/login/', {'username': username, 'password': password}, scenario='login'
+        )
+        # A successful login redirects; a failed one re-renders the form
+        return result.status in (301, 302)
+
+
+PRODUCT_ID_PATTERN = re.compile(rb'addToCart\((\d+)')
+
+
+class Scenario:
+    """A repeatable user journey"""
+
+    name = None
+    role = None  # None (anonymous), 'admin' or 'cashier'
+
+    def __init__(self, shared):
+        # Data discovered by one user and reused by all, e.g. product ids
+        self.shared = shared
+
+    def product_ids(self, user):
+        ids = self.shared.get('product_ids')
+        if not ids:
+            page = user.get('kiosk_home', '/kiosk/')
+            ids = sorted({int(match) for match in PRODUCT_ID_PATTERN.findall(page.body)})
+            self.shared['product_ids'] = ids
+        return ids
+
+    def cart_ops(self, user, count):
+        ids = self.product_ids(user)
+        return [
+            {'op': 'add', 'product_id': product_id, 'quantity': random.randint(1, 2)}
+            for product_id in random.sample(ids, min(len(ids), count))
+        ]
+
+    def run(self, user):
+        raise NotImplementedError
+
+
+class KioskBrowse(Scenario):
+    name = 'kiosk_browse'
+
+    def run(self, user):
+        user.get('kiosk_home', '/kiosk/')
+        user.get('cart_state', '/kiosk/cart/sync/')
+        if random.random() < 0.3:
+            user.get('cart_page', '/kiosk/cart/')
+
+
+class KioskCheckout(Scenario):
+    name = 'kiosk_checkout'
+
+    def run(self, user):
+        user.ensure_csrf()
+        user.get('kiosk_home', '/kiosk/')
+        user.post('cart_sync', '/kiosk/cart/sync/',
+                  json_body={'ops': [{'op': 'clear'}] + self.cart_ops(user, random.randint(1, 3))})
+        user.get('checkout_page', '/kiosk/checkout/')
+        user.post('checkout', '/kiosk/checkout/', {'customer_name': 'Load test', 'payment_method': 'CASH'})
+
+
+class PosCheckout(Scenario):
+    name = 'pos_checkout'
+    role = 'cashier'
+
+    def run(self, user):
+        user.get('pos_home', '/orders/pos/')
+        user.post('cart_sync', '/orders/pos/cart/sync/',
+                  json_body={'ops': [{'op': 'clear'}] + self.cart_ops(user, random.randint(1, 3))})
+        user.post('checkout', '/orders/pos/checkout/', {'customer_name': 'Load test', 'payment_method': 'CASH'})
+
+
+class CashierPayments(Scenario):
+    name = 'cashier_payments'
+    role = 'cashier'
+
+    def run(self, user):
+        user.get('pos_board', '/pos/')
+        pending = user.ajax('pending_orders', '/orders/?status=PENDING').json().get('orders', [])
+        if pending:
+            order = random.choice(pending)
+            user.post('process_payment', f"/orders/{order['id']}/process-payment/")
+
+
+class AdminDashboard(Scenario):
+    name = 'admin_dashboard'
+    role = 'admin'
+
+    def run(self, user):
+        user.get('analytics_dashboard', '/analytics/dashboard/')
+        user.get('sales_data', f"/analytics/api/sales-data/?period={random.choice(['day', 'week', 'month'])}")
+        user.get('admin_dashboard', '/dashboard/')
+
+
+class ForecastRefresh(Scenario):
+    name = 'forecast_refresh'
+    role = 'admin'
+
+    def run(self, user):
+        user.get('forecast', '/analytics/forecast/')
+        user.get('bom_dashboard', '/products/bom/dashboard/')
+
+
+SCENARIOS = {
+    scenario.name: scenario
+    for scenario in (KioskBrowse, KioskCheckout, PosCheckout, CashierPayments, AdminDashboard, ForecastRefresh)
+}
+
+# Default traffic mix (relative number of virtual users per scenario)
+DEFAULT_MIX = {
+    'kiosk_browse': 40,
+    'kiosk_checkout': 20,
+    'pos_checkout': 15,
+    'cashier_payments': 15,
+    'admin_dashboard': 7,
+    'forecast_refresh': 3,
+}
+
+
+def assign_scenarios(users, mix):
+    """
+    Split `users` virtual users over scenarios proportionally to `mix`
+    weights, with at least one user per scenario when there are enough.
+    """
+    if users >= len(mix):
+        base = dict.fromkeys(mix, 1)
+        users -= len(mix)
+    else:
+        base = dict.fromkeys(mix, 0)
+    total = sum(mix.values())
+    counts = {name: base[name] + int(users * weight / total) for name, weight in mix.items()}
+    # Hand out the remainder by largest fractional part
+    remainder = sorted(mix, key=lambda name: users * mix[name] / total - counts[name], reverse=True)
+    for name in remainder[:users + sum(base.values()) - sum(counts.values())]:
+        counts[name] += 1
+    return [name for name, count in counts.items() for _ in range(count)]
+
+
+def run_load_test(base_url, users, duration, mix=None, ramp_up=0.0, think_time=0.5,
+                  credentials=None, timeout=30, on_progress=None):
+    """
+    Run `users` virtual users for `duration` seconds and return the report.
+
+    `credentials` maps a role ('admin', 'cashier') to (username, password).
+    `think_time` is the mean pause between iterations (randomized +-50%).
+    """
+    mix = {name: weight for name, weight in (mix or DEFAULT_MIX).items() if weight > 0}
+    unknown = set(mix) - set(SCENARIOS)
+    if unknown:
+        raise ValueError(f"Unknown scenario(s): {', '.join(sorted(unknown))}")
+
+    stats = Stats()
+    shared = {}
+    login_failures = defaultdict(int)
+    deadline = time.monotonic() + duration
+    assignments = assign_scenarios(users, mix)
+
+    def virtual_user(index, scenario_name):
+        scenario = SCENARIOS[scenario_name](shared)
+        user = VirtualUser(base_url, stats, scenario, timeout=timeout)
+        if ramp_up and users > 1:
+            time.sleep(ramp_up * index / users)
+        if scenario.role:
+            username, password = credentials[scenario.role]
+            if not user.login(username, password):
+                login_failures[scenario.role] += 1
+                return
+        while time.monotonic() < deadline:
+            scenario.run(user)
+            stats.iteration(scenario.name)
+            if think_time:
+                time.sleep(random.uniform(think_time * 0.5, think_time * 1.5))
+
+    threads = [
+        threading.Thread(target=virtual_user, args=(index, name), daemon=True)
+        for index, name in enumerate(random.sample(assignments, len(assignments)))
+    ]
+    stats.started = time.monotonic()
+    for thread in threads:
+        thread.start()
+
+    while any(thread.is_alive() for thread in threads):
+        time.sleep(1)
+        if on_progress and time.monotonic() < deadline:
+            on_progress(stats)
+    stats.finished = time.monotonic()
+
+    report = stats.report()
+    report['users'] = users
+    report['mix'] = mix
+    report['login_failures'] = dict(login_failures)
+    return report
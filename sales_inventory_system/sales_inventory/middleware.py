@@ -0,0 +1,185 @@
+"""
+Project middleware; each class runs natively under both WSGI and ASGI.
+
+AsyncWhiteNoiseMiddleware: WhiteNoise's middleware is sync-only. Under
+ASGI, Django runs a sync-only middleware in a worker thread and the rest
+of the stack, including async views, through async_to_sync from there, so
+every request pays two thread switches. This subclass keeps the stack
+async: static file lookups are dictionary reads, and only a matching
+static file is served through the original sync code.
+
+HeavyRequestMiddleware: forecasts, BOM reports and CSV downloads can take
+seconds and share the same few workers as kiosk and POS checkout. Heavy
+requests (settings.HEAVY_REQUEST_PATHS, or any ?download=) must hold one
+of HEAVY_REQUEST_SLOTS leases in the shared cache, so at most that many
+workers across all processes run them at once and the rest stay free for
+interactive traffic. A heavy request that finds no free slot waits up to
+HEAVY_REQUEST_WAIT seconds (with at most HEAVY_REQUEST_MAX_WAITING waiters
+per process), then gets 503 Service Unavailable with Retry-After.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+import uuid
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse, JsonResponse
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncWhiteNoiseMiddleware(WhiteNoiseMiddleware):
+    """WhiteNoiseMiddleware that also runs as async middleware"""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None, *args, **kwargs):
+        super().__init__(get_response, *args, **kwargs)
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        static_file = self._find_static_file(request)
+        if static_file is not None:
+            return self.serve(static_file, request)
+        return await self.get_response(request)
+
+    def _find_static_file(self, request):
+        if self.autorefresh:
+            return self.find_file(request.path_info)
+        return self.files.get(request.path_info)
+
+
+class HeavyRequestLimiter:
+    """Counting semaphore shared by all worker processes, held as leases in the cache"""
+
+    key_format = 'heavy:slot:{}'
+
+    def __init__(self, slots, lease_timeout, using='default'):
+        self.slots = slots
+        self.lease_timeout = lease_timeout
+        self.using = using
+
+    def acquire(self):
+        """Take a free slot; returns a lease to release, or None when all are taken"""
+        cache = caches[self.using]
+        token = uuid.uuid4().hex
+        for slot in range(self.slots):
+            key = self.key_format.format(slot)
+            if cache.add(key, token, self.lease_timeout):
+                return key, token
+        return None
+
+    def release(self, lease):
+        cache = caches[self.using]
+        key, token = lease
+        # An expired lease may have been taken over by another request since
+        if cache.get(key) == token:
+            cache.delete(key)
+
+    def in_use(self):
+        cache = caches[self.using]
+        return len(cache.get_many([self.key_format.format(slot) for slot in range(self.slots)]))
+
+
+class HeavyRequestMiddleware:
+    """Limit how many heavy requests run at once; reject the excess with 503"""
+
+    sync_capable = True
+    async_capable = True
+
+    poll_interval = 0.1
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.paths = tuple(getattr(settings, 'HEAVY_REQUEST_PATHS', ()))
+        self.wait = getattr(settings, 'HEAVY_REQUEST_WAIT', 0)
+        self.max_waiting = getattr(settings, 'HEAVY_REQUEST_MAX_WAITING', 4)
+        self.retry_after = getattr(settings, 'HEAVY_REQUEST_RETRY_AFTER', 10)
+        self.limiter = HeavyRequestLimiter(
+            getattr(settings, 'HEAVY_REQUEST_SLOTS', 1),
+            getattr(settings, 'HEAVY_REQUEST_LEASE', 150),
+        )
+        self._waiting = 0
+        self._waiting_lock = threading.Lock()
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def is_heavy(self, request):
+        return request.path_info.startswith(self.paths) or 'download' in request.GET
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self.is_heavy(request):
+            return self.get_response(request)
+
+        lease = self.limiter.acquire()
+        if lease is None and self._enter_queue():
+            try:
+                deadline = time.monotonic() + self.wait
+                while lease is None and time.monotonic() < deadline:
+                    time.sleep(self.poll_interval)
+                    lease = self.limiter.acquire()
+            finally:
+                self._leave_queue()
+        if lease is None:
+            return self.busy_response(request)
+        try:
+            return self.get_response(request)
+        finally:
+            self.limiter.release(lease)
+
+    async def __acall__(self, request):
+        if not self.is_heavy(request):
+            return await self.get_response(request)
+
+        lease = await sync_to_async(self.limiter.acquire)()
+        if lease is None and self._enter_queue():
+            try:
+                deadline = time.monotonic() + self.wait
+                while lease is None and time.monotonic() < deadline:
+                    await asyncio.sleep(self.poll_interval)
+                    lease = await sync_to_async(self.limiter.acquire)()
+            finally:
+                self._leave_queue()
+        if lease is None:
+            return self.busy_response(request)
+        try:
+            return await self.get_response(request)
+        finally:
+            await sync_to_async(self.limiter.release)(lease)
+
+    def _enter_queue(self):
+        if self.wait <= 0:
+            return False
+        with self._waiting_lock:
+            if self._waiting >= self.max_waiting:
+                return False
+            self._waiting += 1
+            return True
+
+    def _leave_queue(self):
+        with self._waiting_lock:
+            self._waiting -= 1
+
+    def busy_response(self, request):
+        logger.warning(f'Rejected heavy request {request.method} {request.path}: all {self.limiter.slots} slots busy')
+        message = f'The server is busy with other reports. Please try again in {self.retry_after} seconds.'
+        if request.headers.get('x-requested-with') == 'XMLHttpRequest' or 'json' in request.headers.get('accept', ''):
+            response = JsonResponse({'success': False, 'message': message}, status=503)
+        else:
+            response = HttpResponse(message, status=503, content_type='text/plain; charset=utf-8')
+        response['Retry-After'] = str(self.retry_after)
+        response._has_been_logged = True  # expected back-pressure, already logged above
+        return response
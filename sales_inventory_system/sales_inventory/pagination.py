@@ -0,0 +1,205 @@
+"""
+Keyset (cursor) pagination helpers shared by the list views.
+
+Django's Paginator runs COUNT(*) over the filtered queryset and then an
+OFFSET scan, both of which get slower the deeper the page. KeysetPaginator
+instead seeks directly past the last row of the previous page using an
+indexed ordering such as (created_at, id), so every page costs the same.
+"""
+
+import base64
+import json
+from django.db import connection
+from django.db.models import Q
+
+
+class InvalidCursor(ValueError):
+    """Raised when a pagination cursor cannot be decoded"""
+    pass
+
+
+def encode_cursor(values):
+    """Encode ordering key values into an opaque URL-safe cursor string"""
+    payload = json.dumps([
+        value.isoformat() if hasattr(value, 'isoformat') else value
+        for value in values
+    ], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Decode a cursor produced by encode_cursor back into raw values"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')).decode('utf-8'))
+    except (ValueError, TypeError, UnicodeError):
+        raise InvalidCursor(f'Invalid cursor: {cursor!r}')
+    if not isinstance(values, list):
+        raise InvalidCursor(f'Invalid cursor: {cursor!r}')
+    return values
+
+
+class KeysetPage:
+    """One page of keyset-paginated results"""
+
+    def __init__(self, object_list, has_next, has_previous, next_cursor, previous_cursor):
+        self.object_list = object_list
+        self.has_next_page = has_next
+        self.has_previous_page = has_previous
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self.has_next_page
+
+    def has_previous(self):
+        return self.has_previous_page
+
+
+class KeysetPaginator:
+    """
+    Paginate a queryset by seeking on a unique ordering.
+
+    Args:
+        queryset: Filtered queryset to paginate
+        per_page: Number of rows per page
+        ordering: Field names, optionally prefixed with '-', ending with a
+            unique column (normally 'id'). Fields must be non-nullable.
+
+    Usage:
+        paginator = KeysetPaginator(orders, 20, ordering=('-created_at', '-id'))
+        page = paginator.get_page(request.GET.get('cursor'), request.GET.get('direction'))
+    """
+
+    def __init__(self, queryset, per_page, ordering=('-created_at', '-id')):
+        self.queryset = queryset
+        self.per_page = int(per_page)
+        self.ordering = [
+            (name.lstrip('-'), name.startswith('-'))
+            for name in ordering
+        ]
+        self.model_fields = [
+            queryset.model._meta.get_field(name)
+            for name, _ in self.ordering
+        ]
+
+    def _order_by(self, reverse=False):
+        return [
+            f"{'-' if descending != reverse else ''}{name}"
+            for name, descending in self.ordering
+        ]
+
+    def _seek_filter(self, values, reverse=False):
+        """Build the lexicographic "row comes after the cursor" condition"""
+        condition = Q()
+        equal_prefix = Q()
+        for (name, descending), value in zip(self.ordering, values):
+            lookup = 'lt' if descending != reverse else 'gt'
+            condition |= equal_prefix & Q(**{f'{name}__{lookup}': value})
+            equal_prefix &= Q(**{name: value})
+        return condition
+
+    def _cursor_values(self, cursor):
+        values = decode_cursor(cursor)
+        if len(values) != len(self.ordering):
+            raise InvalidCursor(f'Invalid cursor: {cursor!r}')
+        try:
+            return [field.to_python(value) for field, value in zip(self.model_fields, values)]
+        except Exception:
+            raise InvalidCursor(f'Invalid cursor: {cursor!r}')
+
+    def _cursor_for(self, obj):
+        if isinstance(obj, dict):
+            # values() rows, e.g. for sales_inventory.serialization
+            return encode_cursor([obj[field.name] for field in self.model_fields])
+        return encode_cursor([getattr(obj, field.attname) for field in self.model_fields])
+
+    def get_page(self, cursor=None, direction='next'):
+        """
+        Return the page after (or before, with direction='previous') the cursor.
+        An empty or invalid cursor returns the first page.
+        """
+        backwards = direction == 'previous' and bool(cursor)
+        queryset = self.queryset.order_by(*self._order_by(reverse=backwards))
+
+        seeking = False
+        if cursor:
+            try:
+                values = self._cursor_values(cursor)
+            except InvalidCursor:
+                backwards = False
+                queryset = self.queryset.order_by(*self._order_by())
+            else:
+                queryset = queryset.filter(self._seek_filter(values, reverse=backwards))
+                seeking = True
+
+        rows = list(queryset[:self.per_page + 1])
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+
+        if backwards:
+            rows.reverse()
+            has_next, has_previous = seeking, has_more
+        else:
+            has_next, has_previous = has_more, seeking
+
+        return KeysetPage(
+            rows,
+            has_next=has_next,
+            has_previous=has_previous,
+            next_cursor=self._cursor_for(rows[-1]) if rows and has_next else None,
+            previous_cursor=self._cursor_for(rows[0]) if rows and has_previous else None,
+        )
+
+
+def approximate_count(queryset, cap=1000):
+    """
+    Count rows without scanning an unbounded result set.
+
+    Returns a (count, is_exact) tuple. Unfiltered tables on PostgreSQL use the
+    planner's row estimate; everything else is counted up to `cap` rows.
+    """
+    if connection.vendor == 'postgresql' and not queryset.query.where:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+                [queryset.model._meta.db_table]
+            )
+            row = cursor.fetchone()
+        if row and row[0] >= 0:
+            return int(row[0]), False
+
+    count = queryset.order_by()[:cap + 1].count()
+    if count > cap:
+        return cap, False
+    return count, True
+
+
+def keyset_pagination_data(page, per_page, count_mode, queryset):
+    """
+    Pagination block for AJAX JSON responses in cursor mode.
+
+    count_mode is 'approx' (default), 'exact' or 'none'.
+    """
+    data = {
+        'mode': 'cursor',
+        'per_page': per_page,
+        'has_next': page.has_next(),
+        'has_previous': page.has_previous(),
+        'next_cursor': page.next_cursor,
+        'previous_cursor': page.previous_cursor,
+        'total_count': None,
+        'total_count_exact': False,
+    }
+    if count_mode == 'exact':
+        data['total_count'] = queryset.count()
+        data['total_count_exact'] = True
+    elif count_mode != 'none':
+        data['total_count'], data['total_count_exact'] = approximate_count(queryset)
+    return data
@@ -0,0 +1,167 @@
+"""
+Substring search helpers backed by database text indexes.
+
+The list views used to search with chains of `icontains` lookups, which
+scan the whole table on every keystroke. search_filter() keeps the same
+"contains, case-insensitive" semantics but lets the database use an index:
+
+- PostgreSQL: pg_trgm GIN indexes on UPPER(column::text), which is exactly
+  the expression Django emits for `icontains`, so the lookups stay as-is.
+- SQLite: an external-content FTS5 table with the trigram tokenizer, kept in
+  sync by triggers and matched through a rowid subquery. Queries shorter
+  than three characters cannot use trigrams and fall back to `icontains`.
+
+Index objects are (re)installed idempotently after every migrate run, since
+SQLite table rebuilds during migrations drop the triggers.
+"""
+
+import logging
+import sqlite3
+from django.db import connections
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+logger = logging.getLogger(__name__)
+
+# Searchable text columns per table
+SEARCH_INDEXES = {
+    'orders_order': ['order_number', 'customer_name', 'table_number'],
+    'products_product': ['name', 'description', 'category'],
+    'system_archive': ['search_text'],
+}
+
+# Aliases whose SQLite database has the FTS tables installed
+_fts_ready = {}
+
+
+def fts_table_name(table):
+    return f'{table}_fts'
+
+
+def icontains_filter(fields, query):
+    """Plain OR-ed icontains condition over the given fields"""
+    condition = Q()
+    for field in fields:
+        condition |= Q(**{f'{field}__icontains': query})
+    return condition
+
+
+def _fts_available(alias):
+    if alias not in _fts_ready:
+        connection = connections[alias]
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'table' AND name LIKE %s",
+                ['%_fts']
+            )
+            _fts_ready[alias] = {row[0] for row in cursor.fetchall()}
+    return _fts_ready[alias]
+
+
+def search_filter(queryset, query, fields):
+    """
+    Filter a queryset to rows where any of `fields` contains `query`
+    (case-insensitive), using the table's search index when available.
+    """
+    query = (query or '').strip()
+    if not query:
+        return queryset
+
+    table = queryset.model._meta.db_table
+    indexed_columns = SEARCH_INDEXES.get(table, [])
+    connection = connections[queryset.db]
+
+    if (
+        connection.vendor == 'sqlite'
+        and len(query) >= 3
+        and fields
+        and all(field in indexed_columns for field in fields)
+        and fts_table_name(table) in _fts_available(queryset.db)
+    ):
+        fts_table = fts_table_name(table)
+        phrase = '"' + query.replace('"', '""') + '"'
+        match = '{' + ' '.join(fields) + '}: ' + phrase
+        return queryset.filter(
+            pk__in=RawSQL(f'SELECT rowid FROM "{fts_table}" WHERE "{fts_table}" MATCH %s', [match])
+        )
+
+    return queryset.filter(icontains_filter(fields, query))
+
+
+def _install_postgresql(connection, table, columns):
+    with connection.cursor() as cursor:
+        cursor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        for column in columns:
+            cursor.execute(
+                f'CREATE INDEX IF NOT EXISTS "{table}_{column}_trgm" '
+                f'ON "{table}" USING gin ((UPPER("{column}"::text)) gin_trgm_ops)'
+            )
+
+
+def _install_sqlite(connection, table, columns):
+    fts_table = fts_table_name(table)
+    column_list = ', '.join(columns)
+    new_values = ', '.join(f'new.{column}' for column in columns)
+    old_values = ', '.join(f'old.{column}' for column in columns)
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'trigger' AND name LIKE %s",
+            [f'{fts_table}_a_']
+        )
+        existing_triggers = {row[0] for row in cursor.fetchall()}
+
+        cursor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts_table} USING fts5("
+            f"{column_list}, content='{table}', content_rowid='id', tokenize='trigram')"
+        )
+        cursor.execute(
+            f"CREATE TRIGGER IF NOT EXISTS {fts_table}_ai AFTER INSERT ON {table} BEGIN "
+            f"INSERT INTO {fts_table}(rowid, {column_list}) VALUES (new.id, {new_values}); END"
+        )
+        cursor.execute(
+            f"CREATE TRIGGER IF NOT EXISTS {fts_table}_ad AFTER DELETE ON {table} BEGIN "
+            f"INSERT INTO {fts_table}({fts_table}, rowid, {column_list}) VALUES ('delete', old.id, {old_values}); END"
+        )
+        cursor.execute(
+            f"CREATE TRIGGER IF NOT EXISTS {fts_table}_au AFTER UPDATE OF {column_list} ON {table} BEGIN "
+            f"INSERT INTO {fts_table}({fts_table}, rowid, {column_list}) VALUES ('delete', old.id, {old_values}); "
+            f"INSERT INTO {fts_table}(rowid, {column_list}) VALUES (new.id, {new_values}); END"
+        )
+
+        # Triggers were missing (fresh install or table rebuilt by a migration),
+        # so the index may be stale - rebuild it from the content table
+        if len(existing_triggers) < 3:
+            cursor.execute(f"INSERT INTO {fts_table}({fts_table}) VALUES ('rebuild')")
+
+
+def install_search_indexes(using='default', rebuild=False):
+    """Create (or repair) the search indexes for every table in SEARCH_INDEXES"""
+    connection = connections[using]
+
+    for table, columns in SEARCH_INDEXES.items():
+        if table not in connection.introspection.table_names():
+            continue
+
+        if connection.vendor == 'postgresql':
+            _install_postgresql(connection, table, columns)
+        elif connection.vendor == 'sqlite':
+            if sqlite3.sqlite_version_info < (3, 34, 0):
+                logger.warning('SQLite %s has no FTS5 trigram tokenizer; search uses icontains', sqlite3.sqlite_version)
+                return
+            _install_sqlite(connection, table, columns)
+            if rebuild:
+                fts_table = fts_table_name(table)
+                with connection.cursor() as cursor:
+                    cursor.execute(f"INSERT INTO {fts_table}({fts_table}) VALUES ('rebuild')")
+
+    _fts_ready.pop(using, None)
+
+
+def install_search_indexes_after_migrate(sender, using='default', **kwargs):
+    """post_migrate receiver - see SystemConfig.ready()"""
+    try:
+        install_search_indexes(using)
+    except Exception as e:
+        # Search still works through icontains without the indexes
+        logger.warning(f'Could not install search indexes: {str(e)}')
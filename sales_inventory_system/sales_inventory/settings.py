@@ -82,7 +82,9 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
-    "whitenoise.middleware.WhiteNoiseMiddleware",  # must be above others
+    "sales_inventory_system.sales_inventory.middleware.AsyncWhiteNoiseMiddleware",  # must be above others
+    "sales_inventory_system.sales_inventory.instrumentation.InstrumentationMiddleware",
+    "sales_inventory_system.sales_inventory.middleware.HeavyRequestMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -125,14 +127,56 @@ if os.getenv("DATABASE_URL"):
             conn_health_checks=True,
         )
     }
+    if DATABASES["default"]["ENGINE"] == "django.db.backends.postgresql":
+        _db_options = DATABASES["default"].setdefault("OPTIONS", {})
+        # Connection pool per worker process (psycopg 3 + psycopg_pool; sales_inventory.db_pool).
+        # gunicorn.conf.py sizes it for the worker class. Set DB_POOL=false when a pgbouncer in
+        # front of the database does the pooling.
+        if os.getenv("DB_POOL", "true").lower() == "true":
+            DATABASES["default"]["CONN_MAX_AGE"] = 0  # connections go back to the pool instead
+            _db_options["pool"] = {
+                "min_size": int(os.getenv("DB_POOL_MIN_SIZE", "1")),
+                "max_size": int(os.getenv("DB_POOL_MAX_SIZE", "4")),
+                "timeout": float(os.getenv("DB_POOL_TIMEOUT", "10")),  # max wait for a free connection
+                "max_idle": float(os.getenv("DB_POOL_MAX_IDLE", "300")),  # close extra idle connections
+            }
+        # Server-side parameter binding lets psycopg prepare a statement once it has run
+        # DB_PREPARE_THRESHOLD times on a connection, then reuse the plan; pooled and persistent
+        # connections keep their prepared statements. Off by default: PostgreSQL rejects some ORM
+        # queries under it (a parameter repeated in SELECT and GROUP BY, e.g. TruncDate with a
+        # time zone), and pgbouncer in transaction mode needs 1.21+ for prepared statements.
+        if os.getenv("DB_SERVER_SIDE_BINDING", "false").lower() == "true":
+            _db_options["server_side_binding"] = True
+            _db_options["prepare_threshold"] = int(os.getenv("DB_PREPARE_THRESHOLD", "5"))
 else:
     # Default to SQLite for local development as requested
     DATABASES = {
         "default": {
             "ENGINE": "django.db.backends.sqlite3",
-            "NAME": BASE_DIR / "db.sqlite3",
+            "NAME": os.getenv("SQLITE_PATH", str(BASE_DIR / "db.sqlite3")),
         }
     }
+    # SQLite profile for branch deployments ("tuned", or "off" for SQLite defaults)
+    if os.getenv("SQLITE_PROFILE", "tuned") == "tuned":
+        DATABASES["default"]["OPTIONS"] = {
+            # Writers take the write lock at BEGIN instead of failing with "database is
+            # locked" when a read transaction later needs to write
+            "transaction_mode": "IMMEDIATE",
+            # Busy timeout: seconds a writer waits for the lock before giving up
+            "timeout": float(os.getenv("SQLITE_BUSY_TIMEOUT", "20")),
+            "init_command": ";".join([
+                "PRAGMA journal_mode=WAL",  # readers and the writer don't block each other
+                "PRAGMA synchronous=NORMAL",  # fsync at checkpoints only; durable with WAL
+                f"PRAGMA mmap_size={int(os.getenv('SQLITE_MMAP_SIZE', str(256 * 1024 * 1024)))}",
+                f"PRAGMA cache_size=-{int(os.getenv('SQLITE_CACHE_SIZE_KB', str(64 * 1024)))}",  # negative: KiB
+                "PRAGMA temp_store=MEMORY",
+            ]),
+        }
+
+# Queue checkout/payment writers per host before they open a transaction, so SQLite
+# sees one writer at a time (sales_inventory.write_queue); no effect on PostgreSQL
+SQLITE_WRITE_QUEUE = os.getenv("SQLITE_WRITE_QUEUE", "true").lower() == "true"
+SQLITE_WRITE_QUEUE_TIMEOUT = float(os.getenv("SQLITE_WRITE_QUEUE_TIMEOUT", "15"))
 
 
 # Password validation
@@ -181,6 +225,9 @@ else:
 # Media files
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media"
+# Resize product image uploads into WebP/AVIF variants at once (products.thumbnails);
+# when False they are generated on their first request
+PRODUCT_IMAGE_VARIANTS_ON_UPLOAD = os.getenv("PRODUCT_IMAGE_VARIANTS_ON_UPLOAD", "true").lower() == "true"
 
 # Custom user model
 AUTH_USER_MODEL = "accounts.User"
@@ -196,15 +243,55 @@ LOGIN_REDIRECT_URL = "/"
 LOGOUT_REDIRECT_URL = "accounts:login"
 
 # Caching configuration
+# The default cache is shared by all workers: Redis when REDIS_URL is set (needs the
+# "redis" package), otherwise a SQLite file on local disk (sales_inventory.cache_backends).
+if os.getenv("REDIS_URL"):
+    _default_cache = {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": os.getenv("REDIS_URL"),
+    }
+else:
+    _default_cache = {
+        "BACKEND": os.getenv("CACHE_BACKEND", "sales_inventory_system.sales_inventory.cache_backends.SQLiteCache"),
+        "LOCATION": os.getenv("CACHE_LOCATION", str(BASE_DIR / ".cache" / "shared.sqlite3")),
+        "OPTIONS": {
+            "MAX_ENTRIES": int(os.getenv("CACHE_MAX_ENTRIES", "5000")),
+        },
+    }
+
 CACHES = {
     "default": {
-        "BACKEND": os.getenv("CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"),
-        "LOCATION": os.getenv("CACHE_LOCATION", "fcp-cache"),
+        **_default_cache,
         "TIMEOUT": int(os.getenv("CACHE_TIMEOUT", "300")),  # 5 minutes default
+    },
+    # Kiosk/POS carts (orders.cart_store) - a SQLite file every worker on the host shares.
+    # Its own file with MAX_ENTRIES 0: live carts are never evicted, expired ones are purged.
+    "carts": {
+        "BACKEND": os.getenv("CART_CACHE_BACKEND", "sales_inventory_system.sales_inventory.cache_backends.SQLiteCache"),
+        "LOCATION": os.getenv("CART_CACHE_LOCATION", str(BASE_DIR / ".cache" / "carts.sqlite3")),
+        "TIMEOUT": int(os.getenv("CART_CACHE_TIMEOUT", str(3600 * 24))),  # idle carts expire after a day
         "OPTIONS": {
-            "MAX_ENTRIES": int(os.getenv("CACHE_MAX_ENTRIES", "1000")),
+            "MAX_ENTRIES": 0,
         }
-    }
+    },
+}
+
+# Tests run on in-memory copies of CACHES (see sales_inventory.testing.TestRunner)
+TEST_RUNNER = "sales_inventory_system.sales_inventory.testing.TestRunner"
+
+# Per key family TTLs (seconds) for sales_inventory.caching; unset families use the default cache TIMEOUT
+CACHE_TTLS = {
+    # Analytics dashboard panels (analytics.panels); also dropped by signals on change
+    "dashboard_revenue": int(os.getenv("CACHE_TTL_DASHBOARD", "300")),
+    "dashboard_orders": int(os.getenv("CACHE_TTL_DASHBOARD", "300")),
+    "dashboard_top_products": int(os.getenv("CACHE_TTL_DASHBOARD_TOP_PRODUCTS", "900")),
+    "dashboard_low_stock": int(os.getenv("CACHE_TTL_DASHBOARD", "300")),
+    "dashboard_recent_orders": int(os.getenv("CACHE_TTL_DASHBOARD_RECENT_ORDERS", "120")),
+    "sales_data": int(os.getenv("CACHE_TTL_SALES_DATA", "60")),
+    "forecast": int(os.getenv("CACHE_TTL_FORECAST", "900")),
+    # Kiosk menu snapshots (orders.menu_snapshot) are versioned; the TTL bounds
+    # staleness after catalog writes that bypass model signals
+    "kiosk_menu": int(os.getenv("CACHE_TTL_KIOSK_MENU", "3600")),
 }
 
 # Logging configuration for performance monitoring
@@ -243,6 +330,24 @@ LOGGING = {
     },
 }
 
+# Request instrumentation (sales_inventory.instrumentation, report with `manage.py perf_report`)
+# Share of requests sampled into the ring buffer; every request gets a Server-Timing header
+PERF_SAMPLE_RATE = float(os.getenv("PERF_SAMPLE_RATE", "1.0" if DEBUG else "0.1"))
+PERF_RING_SLOTS = int(os.getenv("PERF_RING_SLOTS", "200"))  # batches of up to 50 samples each
+PERF_SLOW_REQUEST_MS = int(os.getenv("PERF_SLOW_REQUEST_MS", "1000"))  # logged as warnings
+
+# Heavy requests (sales_inventory.middleware.HeavyRequestMiddleware)
+# Forecasts, BOM reports and ?download= requests may occupy at most HEAVY_REQUEST_SLOTS
+# workers at once across all processes; keep it below GUNICORN_WORKERS (x threads) so
+# kiosk/POS requests always find a free worker. Excess heavy requests get 503 + Retry-After.
+HEAVY_REQUEST_PATHS = ["/analytics/forecast/", "/products/bom/"]
+HEAVY_REQUEST_SLOTS = int(os.getenv("HEAVY_REQUEST_SLOTS", "1"))
+# Seconds a heavy request may wait for a slot; this holds its worker, so keep 0 for sync workers
+HEAVY_REQUEST_WAIT = float(os.getenv("HEAVY_REQUEST_WAIT", "0"))
+HEAVY_REQUEST_MAX_WAITING = int(os.getenv("HEAVY_REQUEST_MAX_WAITING", "4"))  # waiters per process
+HEAVY_REQUEST_LEASE = 150  # seconds; frees a slot held by a killed worker (gunicorn timeout is 120)
+HEAVY_REQUEST_RETRY_AFTER = 10
+
 # Performance optimizations
 # Session timeout (in seconds)
 SESSION_COOKIE_AGE = 3600 * 24 * 7  # 1 week
@@ -0,0 +1,160 @@
+"""
+Test support: the project test runner and query-count regression testing.
+
+TestRunner swaps every configured cache for an in-memory one while tests
+run, so a test run (manage.py test, python -m django test) neither writes
+to nor reads leftovers from the developer's shared caches.
+
+QueryBudgetTestCase requests an endpoint against fixtures of growing size
+and fails if the number of queries grows with the number of rows (an N+1)
+or exceeds the endpoint's budget. Each app's tests.py pins a budget per
+view; when a change legitimately adds a query, raise the budget in the
+same commit.
+"""
+
+from decimal import Decimal
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.runner import DiscoverRunner
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from sales_inventory_system.accounts.models import User
+from sales_inventory_system.orders.models import Order, OrderItem, Payment
+from sales_inventory_system.products.models import (
+    Ingredient, PhysicalCount, PrepBatch, Product, RecipeIngredient, RecipeItem,
+    StockTransaction, VarianceRecord, WasteLog,
+)
+from sales_inventory_system.system.models import Archive, AuditTrail
+
+TEST_CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'query-budget'},
+    'carts': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'query-budget-carts'},
+}
+
+
+def in_memory_caches(caches):
+    """Each cache alias as a LocMemCache of its own, keeping its TIMEOUT"""
+    return {
+        alias: {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': f'test-{alias}',
+            **({'TIMEOUT': config['TIMEOUT']} if 'TIMEOUT' in config else {}),
+        }
+        for alias, config in caches.items()
+    }
+
+
+class TestRunner(DiscoverRunner):
+    """DiscoverRunner that runs the tests on in-memory caches"""
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self._caches = override_settings(CACHES=in_memory_caches(settings.CACHES))
+        self._caches.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self._caches.disable()
+        super().teardown_test_environment(**kwargs)
+
+
+def create_rows(index, admin, cashier):
+    """One product with a two-ingredient recipe and stock history, a paid and an archived order, a user and an audit log"""
+    ingredients = [
+        Ingredient.objects.create(
+            name=f'Ingredient {index}-{n}', current_stock=Decimal('1000'), min_stock=Decimal('2000') if n else 0,
+        )
+        for n in range(2)
+    ]
+    product = Product.objects.create(
+        name=f'Product {index}', price=Decimal('100'), stock=50, category=f'Category {index % 3}',
+        requires_bom=True,
+    )
+    recipe = RecipeItem.objects.create(product=product, created_by=admin)
+    for ingredient in ingredients:
+        RecipeIngredient.objects.create(recipe=recipe, ingredient=ingredient, quantity=Decimal('10'))
+        StockTransaction.objects.create(
+            ingredient=ingredient, transaction_type='DEDUCTION', quantity=Decimal('-10'),
+            reference_type='order', recorded_by=cashier,
+        )
+        WasteLog.objects.create(ingredient=ingredient, waste_type='SPOILAGE', quantity=Decimal('1'),
+                                reason='Test', reported_by=cashier)
+        PhysicalCount.objects.create(ingredient=ingredient, counted_by=admin,
+                                     physical_quantity=Decimal('990'), theoretical_quantity=Decimal('1000'))
+        VarianceRecord.objects.create(
+            ingredient=ingredient, period_start=timezone.now(), period_end=timezone.now(),
+            theoretical_used=Decimal('10'), actual_used=Decimal('11'), variance_quantity=Decimal('1'),
+            variance_percentage=Decimal('10'),
+        )
+    PrepBatch.objects.create(name=f'Batch {index}', recipe=recipe, quantity_produced=5, prepared_by=admin)
+
+    order = Order.objects.create(
+        customer_name=f'Customer {index}', status='FINISHED', total_amount=Decimal('200'), processed_by=cashier,
+    )
+    OrderItem.objects.create(order=order, product=product, quantity=2)
+    Payment.objects.create(order=order, method='CASH', status='SUCCESS', amount=order.total_amount,
+                           processed_by=cashier)
+
+    archived = Order.objects.create(customer_name=f'Archived {index}', status='CANCELLED', is_archived=True)
+    OrderItem.objects.create(order=archived, product=product, quantity=1)
+    Archive.index_record(archived, user=admin)
+
+    User.objects.create_user(username=f'user{index}', role='CASHIER')
+    AuditTrail.objects.create(user=admin, action='CREATE', model_name='Product', record_id=product.pk,
+                              description=f'Created {product.name}')
+    return product
+
+
+@override_settings(CACHES=TEST_CACHES, PERF_SAMPLE_RATE=0)
+class QueryBudgetTestCase(TestCase):
+    """Base class for endpoint query budgets"""
+
+    # Fixture sizes each endpoint is measured at; counts must not change between them
+    sizes = (2, 6)
+
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_user(username='admin', role='ADMIN')
+        self.cashier = User.objects.create_user(username='cashier', role='CASHIER')
+        self.products = []
+
+    def grow(self, size):
+        """Add rows until there are `size` of each"""
+        while len(self.products) < size:
+            self.products.append(create_rows(len(self.products), self.admin, self.cashier))
+
+    def login(self, user):
+        self.client.force_login(user)
+
+    def assertQueryBudget(self, budget, request, setup=None, status=200):
+        """
+        Call `request()` once per fixture size and check its query count.
+
+        The cache is cleared before each request so cached views are measured
+        cold; `setup(size)` then runs (unmeasured), e.g. to fill a cart.
+        """
+        counts = {}
+        for size in self.sizes:
+            self.grow(size)
+            cache.clear()
+            if setup:
+                setup(size)
+            with CaptureQueriesContext(connection) as captured:
+                response = request()
+                if response.streaming:
+                    b''.join(response.streaming_content)
+            self.assertEqual(response.status_code, status, f'unexpected status at {size} rows')
+            counts[size] = len(captured.captured_queries)
+
+        queries = '\n'.join(query['sql'] for query in captured.captured_queries)
+        self.assertEqual(
+            len(set(counts.values())), 1,
+            f'query count depends on the number of rows {counts}; queries at {size} rows:\n{queries}'
+        )
+        self.assertLessEqual(
+            counts[size], budget,
+            f'{counts[size]} queries, over the budget of {budget}:\n{queries}'
+        )
+        return response
@@ -0,0 +1,52 @@
+"""
+Server-Timing header helper.
+
+Collects named durations while a view runs and renders them as a
+Server-Timing header, so the browser's network panel shows where the
+time of a request went (e.g. "db;dur=3.1, store;dur=0.4").
+"""
+
+import time
+from contextlib import contextmanager
+
+
+class ServerTiming:
+    """Named durations for one response"""
+
+    def __init__(self):
+        self._metrics = []
+        self._started = time.perf_counter()
+
+    @classmethod
+    def for_request(cls, request):
+        """The request's timing set up by InstrumentationMiddleware, or a new one"""
+        timing = getattr(request, 'server_timing', None)
+        return timing if timing is not None else cls()
+
+    @contextmanager
+    def measure(self, name, description=None):
+        """Time the enclosed block as metric `name`"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, (time.perf_counter() - start) * 1000, description)
+
+    def add(self, name, duration_ms, description=None):
+        self._metrics.append((name, duration_ms, description))
+
+    def header_value(self, total=True):
+        parts = []
+        for name, duration_ms, description in self._metrics:
+            part = f'{name};dur={duration_ms:.1f}'
+            if description:
+                part += f';desc="{description}"'
+            parts.append(part)
+        if total:
+            parts.append(f'total;dur={(time.perf_counter() - self._started) * 1000:.1f}')
+        return ', '.join(parts)
+
+    def apply(self, response):
+        """Set the Server-Timing header on a response and return it"""
+        response['Server-Timing'] = self.header_value()
+        return response
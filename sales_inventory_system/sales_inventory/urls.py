@@ -8,7 +8,7 @@ from django.conf import settings
 from django.conf.urls.static import static
 from django.shortcuts import redirect
 from django.contrib.auth.decorators import login_required
-from .dashboards import admin_dashboard, cashier_pos
+from .dashboards import admin_dashboard, cashier_pos, kitchen_display
 
 @login_required
 def home_redirect(request):
@@ -24,6 +24,7 @@ urlpatterns = [
     path('', home_redirect, name='home'),
     path('dashboard/', admin_dashboard, name='admin_dashboard'),
     path('pos/', cashier_pos, name='cashier_pos'),
+    path('kitchen/', kitchen_display, name='kitchen_display'),
     path('accounts/', include('sales_inventory_system.accounts.urls')),
     path('products/', include('sales_inventory_system.products.urls')),
     path('orders/', include('sales_inventory_system.orders.urls')),
@@ -0,0 +1,110 @@
+"""
+Write serialization for SQLite deployments.
+
+SQLite allows one writer at a time. With the tuned profile (settings,
+SQLITE_PROFILE) every transaction starts with BEGIN IMMEDIATE and waits in
+SQLite's busy handler for the write lock, but the busy handler backs off
+with growing sleeps, so under a burst of checkouts writers wake late, queue
+unfairly and can still hit the busy timeout ("database is locked").
+
+serialized_writes() queues writers before they open their transaction:
+threads of one process wait on a lock, and processes on the same host (the
+gunicorn workers) wait on an flock() of a lock file next to the database.
+Writers then reach SQLite one at a time and never wait inside it. Reads are
+not queued; in WAL mode they run alongside the writer.
+
+    with serialized_writes(timing=ServerTiming.for_request(request)), transaction.atomic():
+        ...
+
+It does nothing on other databases, or with SQLITE_WRITE_QUEUE=false. A
+writer that waits longer than SQLITE_WRITE_QUEUE_TIMEOUT proceeds without
+its turn and relies on the busy timeout, as before.
+"""
+
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+try:
+    import fcntl
+except ImportError:  # Windows: threads are still queued, processes are not
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+POLL_INTERVAL = 0.005
+
+_lock = threading.Lock()
+_local = threading.local()
+_lock_files = {}
+
+
+def _lock_file(path):
+    lock_file = _lock_files.get(path)
+    if lock_file is None:
+        lock_file = _lock_files[path] = open(path, 'a+b')
+    return lock_file
+
+
+def _queue_path(using):
+    connection = connections[using]
+    if connection.vendor != 'sqlite' or not getattr(settings, 'SQLITE_WRITE_QUEUE', False):
+        return None
+    if connection.is_in_memory_db():
+        return ''  # one process only; the thread lock is enough
+    return f"{connection.settings_dict['NAME']}.write-lock"
+
+
+def _acquire(path, timeout):
+    deadline = time.monotonic() + timeout
+    if not _lock.acquire(timeout=timeout):
+        return False
+    if not path or fcntl is None:
+        return True
+    lock_file = _lock_file(path)
+    while True:
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return True
+        except BlockingIOError:
+            if time.monotonic() >= deadline:
+                _lock.release()
+                return False
+            time.sleep(POLL_INTERVAL)
+
+
+def _release(path):
+    if path and fcntl is not None:
+        fcntl.flock(_lock_file(path), fcntl.LOCK_UN)
+    _lock.release()
+
+
+@contextmanager
+def serialized_writes(using=DEFAULT_DB_ALIAS, timing=None):
+    """Wait for this process's and host's turn to write before running the block"""
+    path = _queue_path(using)
+    if path is None or getattr(_local, 'holding', False):
+        # Not SQLite, or this thread already has its turn further up the stack
+        yield
+        return
+
+    timeout = getattr(settings, 'SQLITE_WRITE_QUEUE_TIMEOUT', 15)
+    started = time.perf_counter()
+    acquired = _acquire(path, timeout)
+    if timing is not None:
+        timing.add('writeq', (time.perf_counter() - started) * 1000)
+    if not acquired:
+        logger.warning(f'Write queue wait exceeded {timeout}s (pid {os.getpid()}); writing without a turn')
+        yield
+        return
+
+    _local.holding = True
+    try:
+        yield
+    finally:
+        _local.holding = False
+        _release(path)
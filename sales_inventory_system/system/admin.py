@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import AuditTrail, Archive
+from .models import AuditTrail, AuditTrailArchive, Archive
 
 @admin.register(AuditTrail)
 class AuditTrailAdmin(admin.ModelAdmin):
@@ -31,3 +31,12 @@ class ArchiveAdmin(admin.ModelAdmin):
 
     def has_add_permission(self, request):
         return False
+
+@admin.register(AuditTrailArchive)
+class AuditTrailArchiveAdmin(admin.ModelAdmin):
+    list_display = ['period', 'row_count', 'first_created_at', 'last_created_at', 'updated_at']
+    readonly_fields = ['period', 'row_count', 'first_created_at', 'last_created_at', 'created_at', 'updated_at']
+    exclude = ['data']
+
+    def has_add_permission(self, request):
+        return False
@@ -1,6 +1,19 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class SystemConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "sales_inventory_system.system"
+
+    def ready(self):
+        """Register signals when app is ready"""
+        import sales_inventory_system.system.signals  # noqa
+        from sales_inventory_system.sales_inventory.search import install_search_indexes_after_migrate
+
+        # Search indexes live outside the migration graph (see sales_inventory.search)
+        post_migrate.connect(
+            install_search_indexes_after_migrate,
+            sender=self,
+            dispatch_uid='install_search_indexes'
+        )
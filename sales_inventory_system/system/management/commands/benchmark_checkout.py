@@ -0,0 +1,210 @@
+"""
+Management command to benchmark concurrent POS checkouts on SQLite
+Run with: python manage.py benchmark_checkout --processes 4 --checkouts 50 --readers 2 [--output benchmarks/checkout.json]
+
+Writer processes (like gunicorn workers) each place --checkouts POS orders
+through the checkout view while reader processes list orders, all against
+the same SQLite file. This runs once per configuration, each on a fresh copy
+of a database seeded by seed_benchmark_data:
+
+    default       SQLite defaults: rollback journal, deferred transactions, 5 s busy timeout
+    tuned         SQLITE_PROFILE=tuned: WAL, synchronous=NORMAL, mmap, cache, IMMEDIATE, 20 s timeout
+    tuned_queue   tuned plus the checkout write queue (sales_inventory.write_queue)
+
+Reported per configuration: checkout throughput, latency, failures (with
+"database is locked" counted separately) and reader latency. The databases
+live in .cache/checkout-benchmark; DATABASE_URL is ignored.
+"""
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from sales_inventory_system.accounts.models import User
+from sales_inventory_system.orders.models import Order
+from sales_inventory_system.products.models import Product
+from .run_benchmarks import BENCHMARK_CACHES, git_commit, summarize
+
+CONFIGS = {
+    'default': {'SQLITE_PROFILE': 'off', 'SQLITE_WRITE_QUEUE': 'false'},
+    'tuned': {'SQLITE_PROFILE': 'tuned', 'SQLITE_WRITE_QUEUE': 'false'},
+    'tuned_queue': {'SQLITE_PROFILE': 'tuned', 'SQLITE_WRITE_QUEUE': 'true'},
+}
+
+
+class Command(BaseCommand):
+    help = 'Benchmark concurrent checkouts and reads on SQLite with and without the tuning profile and write queue'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=4, help='Concurrent writer processes (default: 4)')
+        parser.add_argument('--checkouts', type=int, default=50, help='Checkouts per writer (default: 50)')
+        parser.add_argument('--readers', type=int, default=1, help='Concurrent reader processes (default: 1)')
+        parser.add_argument('--orders', type=int, default=2000, help='Seeded orders (default: 2000)')
+        parser.add_argument('--config', action='append', choices=list(CONFIGS),
+                            help='Configurations to run (default: all)')
+        parser.add_argument('--output', help='Write results as JSON to this file')
+        # Internal: run as one writer/reader process of a benchmark
+        parser.add_argument('--worker', choices=['writer', 'reader'], help=None)
+        parser.add_argument('--result-file', help=None)
+        parser.add_argument('--stop-file', help=None)
+
+    def handle(self, *args, **options):
+        if options['worker']:
+            with override_settings(
+                CACHES=BENCHMARK_CACHES, PERF_SAMPLE_RATE=0, ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver'],
+            ):
+                run = self.run_writer if options['worker'] == 'writer' else self.run_reader
+                result = run(options)
+            Path(options['result_file']).write_text(json.dumps(result))
+            return
+
+        workdir = Path(settings.BASE_DIR) / '.cache' / 'checkout-benchmark'
+        workdir.mkdir(parents=True, exist_ok=True)
+        template = workdir / 'template.sqlite3'
+        self.stdout.write(f"Seeding {options['orders']} orders into {template}...")
+        for path in workdir.glob('*.sqlite3*'):
+            path.unlink()
+        env = self.environ(template, CONFIGS['default'])
+        for command in (['migrate', '--verbosity', '0'], ['seed_benchmark_data', '--orders', str(options['orders'])]):
+            subprocess.run([sys.executable, 'manage.py', *command], cwd=settings.BASE_DIR, env=env,
+                           check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+        self.stdout.write(
+            f"{options['processes']} writers x {options['checkouts']} checkouts, {options['readers']} readers"
+        )
+        self.stdout.write(
+            f"{'config':<14}{'orders/s':>9}{'median ms':>11}{'p95 ms':>9}{'max ms':>9}"
+            f"{'failed':>8}{'locked':>8}{'read p95 ms':>13}"
+        )
+        results = {}
+        for name in options['config'] or list(CONFIGS):
+            database = workdir / f'{name}.sqlite3'
+            shutil.copyfile(template, database)
+            results[name] = row = self.run_config(name, database, workdir, options)
+            self.stdout.write(
+                f"{name:<14}{row['orders_per_s']:>9.1f}{row['checkout']['median_ms']:>11.1f}"
+                f"{row['checkout']['p95_ms']:>9.1f}{row['checkout']['max_ms']:>9.1f}{row['failed']:>8}"
+                f"{row['locked']:>8}{row['reads']['p95_ms']:>13.1f}"
+            )
+
+        if options['output']:
+            output = Path(options['output'])
+            output.parent.mkdir(parents=True, exist_ok=True)
+            output.write_text(json.dumps({
+                'meta': {
+                    'commit': git_commit(),
+                    'processes': options['processes'],
+                    'checkouts': options['checkouts'],
+                    'readers': options['readers'],
+                    'orders': options['orders'],
+                },
+                'results': results,
+            }, indent=2))
+            self.stdout.write(self.style.SUCCESS(f'Results written to {output}'))
+
+    def environ(self, database, config):
+        env = {**os.environ, **config, 'SQLITE_PATH': str(database)}
+        env.pop('DATABASE_URL', None)
+        return env
+
+    def run_config(self, name, database, workdir, options):
+        env = self.environ(database, CONFIGS[name])
+        stop_file = workdir / f'{name}.stop'
+        stop_file.unlink(missing_ok=True)
+
+        def spawn(kind, index):
+            result_file = workdir / f'{name}-{kind}-{index}.json'
+            result_file.unlink(missing_ok=True)
+            process = subprocess.Popen(
+                [sys.executable, 'manage.py', 'benchmark_checkout', '--worker', kind,
+                 '--checkouts', str(options['checkouts']), '--result-file', str(result_file),
+                 '--stop-file', str(stop_file)],
+                cwd=settings.BASE_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+            )
+            return process, result_file
+
+        readers = [spawn('reader', i) for i in range(options['readers'])]
+        started = time.perf_counter()
+        writers = [spawn('writer', i) for i in range(options['processes'])]
+        for process, _ in writers:
+            process.wait()
+        elapsed = time.perf_counter() - started
+        stop_file.touch()
+        for process, _ in readers:
+            process.wait()
+
+        def load(workers):
+            results = []
+            for process, result_file in workers:
+                if process.returncode != 0 or not result_file.exists():
+                    raise CommandError(f'{name}: a benchmark process failed (exit code {process.returncode})')
+                results.append(json.loads(result_file.read_text()))
+            return results
+
+        writer_results = load(writers)
+        reader_results = load(readers)
+        timings = [t for result in writer_results for t in result['timings']]
+        reads = [t for result in reader_results for t in result['timings']] or [0.0]
+        succeeded = sum(result['succeeded'] for result in writer_results)
+        return {
+            'orders_per_s': round(succeeded / elapsed, 2),
+            'succeeded': succeeded,
+            'failed': sum(result['failed'] for result in writer_results),
+            'locked': sum(result['locked'] for result in writer_results),
+            'errors': sorted({error for result in writer_results for error in result['errors']})[:5],
+            'checkout': summarize(timings, [0], 0),
+            'reads': summarize(reads, [0], 0),
+        }
+
+    def run_writer(self, options):
+        client = Client()
+        client.force_login(User.objects.filter(role='CASHIER').first())
+        product_ids = list(
+            Product.objects.filter(is_archived=False, recipe__isnull=False).values_list('id', flat=True)
+        )
+        result = {'timings': [], 'succeeded': 0, 'failed': 0, 'locked': 0, 'errors': []}
+        for _ in range(options['checkouts']):
+            ops = [{'op': 'clear'}] + [
+                {'op': 'add', 'product_id': product_id, 'quantity': 1}
+                for product_id in random.sample(product_ids, min(2, len(product_ids)))
+            ]
+            client.post(reverse('orders:pos_cart_sync'), json.dumps({'ops': ops}), content_type='application/json')
+
+            started = time.perf_counter()
+            response = client.post(
+                reverse('orders:pos_checkout'), {'customer_name': 'Benchmark', 'payment_method': 'CASH'}
+            )
+            result['timings'].append((time.perf_counter() - started) * 1000)
+            errors = [
+                str(message) for message in get_messages(response.wsgi_request) if message.level_tag == 'error'
+            ]
+            if response.status_code == 302 and not errors:
+                result['succeeded'] += 1
+                continue
+
+            result['failed'] += 1
+            if any('locked' in error for error in errors):
+                result['locked'] += 1
+            result['errors'].extend(error[:120] for error in errors)
+        return result
+
+    def run_reader(self, options):
+        stop_file = Path(options['stop_file'])
+        result = {'timings': []}
+        while not stop_file.exists():
+            started = time.perf_counter()
+            list(Order.objects.select_related('payment').order_by('-created_at')[:50])
+            Order.objects.filter(status='IN_PROGRESS').count()
+            result['timings'].append((time.perf_counter() - started) * 1000)
+            time.sleep(0.01)
+        return result
@@ -0,0 +1,201 @@
+"""
+Management command to compare database connection handling per request
+Run with: python manage.py benchmark_connections --requests 1000 --threads 4 [--output benchmarks/connections.json]
+
+Requests are simulated the way a worker serves them: request_started, a
+kiosk-like set of reads, then request_finished, which closes the connection
+or returns it to the pool according to the mode. Each mode gets its own
+connection alias copied from the default database:
+
+    direct          CONN_MAX_AGE=0, connect and disconnect per request
+    persistent      CONN_MAX_AGE=600, one connection per thread, reused
+    pool            psycopg_pool with --pool-size connections (PostgreSQL, psycopg 3)
+    pool_prepared   pool plus server-side binding, so repeated queries are prepared
+
+Per mode it reports new database connections per request, the time spent
+obtaining a connection, request latency and, for pools, checkout waits.
+Point DATABASE_URL at the database to measure; the benchmark only reads.
+"""
+import copy
+import importlib.util
+import json
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+
+from django.core.management.base import BaseCommand
+from django.core.signals import request_finished, request_started
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.backends.signals import connection_created
+
+from sales_inventory_system.orders.models import Order
+from sales_inventory_system.products.models import Product
+from sales_inventory_system.sales_inventory.db_pool import summarize as summarize_pool
+from .run_benchmarks import git_commit, summarize
+
+MODES = ('direct', 'persistent', 'pool', 'pool_prepared')
+POOL_MODES = ('pool', 'pool_prepared')
+
+
+def pooling_available(connection):
+    if connection.vendor != 'postgresql':
+        return False
+    from django.db.backends.postgresql.psycopg_any import is_psycopg3
+    return is_psycopg3 and importlib.util.find_spec('psycopg_pool') is not None
+
+
+def mode_settings(base, mode, pool_size, prepare_threshold):
+    settings_dict = copy.deepcopy(base)
+    options = settings_dict['OPTIONS']
+    for key in ('pool', 'server_side_binding', 'prepare_threshold'):
+        options.pop(key, None)
+    settings_dict['CONN_MAX_AGE'] = 600 if mode == 'persistent' else 0
+    if mode in POOL_MODES:
+        options['pool'] = {'min_size': 1, 'max_size': pool_size, 'timeout': 30}
+    if mode == 'pool_prepared':
+        options['server_side_binding'] = True
+        options['prepare_threshold'] = prepare_threshold
+    return settings_dict
+
+
+def kiosk_reads(alias):
+    """The reads behind a kiosk home and order status page"""
+    products = list(Product.objects.using(alias).filter(is_archived=False).order_by('category', 'name')[:50])
+    pending = Order.objects.using(alias).filter(status='PENDING').count()
+    order = Order.objects.using(alias).order_by('-created_at').first()
+    if order is not None:
+        list(order.items.all())
+    return len(products), pending
+
+
+class Command(BaseCommand):
+    help = 'Compare connections per request and connection latency: direct, persistent and pooled connections'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=500, help='Requests per mode (default: 500)')
+        parser.add_argument('--threads', type=int, default=4, help='Concurrent request threads (default: 4)')
+        parser.add_argument('--pool-size', type=int, default=None, help='Pool max size (default: --threads)')
+        parser.add_argument('--prepare-threshold', type=int, default=5,
+                            help='Executions before a query is prepared in pool_prepared (default: 5)')
+        parser.add_argument('--mode', action='append', choices=MODES, help='Modes to run (default: all available)')
+        parser.add_argument('--output', help='Write results as JSON to this file')
+
+    def handle(self, *args, **options):
+        base = connections[DEFAULT_DB_ALIAS]
+        modes = options['mode'] or list(MODES)
+        if not pooling_available(base):
+            skipped = [mode for mode in modes if mode in POOL_MODES]
+            if skipped:
+                self.stdout.write(self.style.WARNING(
+                    f"Skipping {', '.join(skipped)}: pooling needs PostgreSQL with psycopg 3 and psycopg_pool"
+                ))
+            modes = [mode for mode in modes if mode not in POOL_MODES]
+
+        pool_size = options['pool_size'] or options['threads']
+        self.stdout.write(
+            f"{options['requests']} requests x {len(modes)} modes on {base.vendor}, {options['threads']} threads"
+        )
+        self.stdout.write(
+            f"{'mode':<16}{'req/s':>8}{'median ms':>11}{'p95 ms':>9}{'conn/req':>10}{'acquire ms':>12}{'pool wait ms':>14}"
+        )
+
+        results = {}
+        for mode in modes:
+            row = self.run_mode(mode, base, options, pool_size)
+            results[mode] = row
+            self.stdout.write(
+                f"{mode:<16}{row['requests_per_s']:>8.0f}{row['median_ms']:>11.2f}{row['p95_ms']:>9.2f}"
+                f"{row['connections_per_request']:>10.3f}{row['acquire_ms']:>12.3f}"
+                + (f"{row['pool']['avg_wait_ms']:>14.3f}" if 'pool' in row else f"{'-':>14}")
+            )
+
+        if options['output']:
+            output = Path(options['output'])
+            output.parent.mkdir(parents=True, exist_ok=True)
+            output.write_text(json.dumps({
+                'meta': {
+                    'commit': git_commit(),
+                    'database': base.vendor,
+                    'requests': options['requests'],
+                    'threads': options['threads'],
+                    'pool_size': pool_size,
+                },
+                'results': results,
+            }, indent=2))
+            self.stdout.write(self.style.SUCCESS(f'Results written to {output}'))
+
+    def run_mode(self, mode, base, options, pool_size):
+        alias = f'benchmark_{mode}'
+        connections.settings[alias] = mode_settings(
+            base.settings_dict, mode, pool_size, options['prepare_threshold']
+        )
+        opened = Counter()
+        lock = threading.Lock()
+
+        def count_connection(sender, connection, **kwargs):
+            if connection.alias == alias:
+                with lock:
+                    opened['connections'] += 1
+
+        timings, acquire, errors = [], [], []
+        per_thread = -(-options['requests'] // options['threads'])
+
+        def worker():
+            try:
+                for _ in range(per_thread):
+                    request_started.send(sender=self.__class__, environ={})
+                    started = time.perf_counter()
+                    try:
+                        connections[alias].ensure_connection()
+                        connected = time.perf_counter()
+                        kiosk_reads(alias)
+                    except Exception as e:
+                        errors.append(str(e))
+                        continue
+                    finally:
+                        request_finished.send(sender=self.__class__)
+                    ended = time.perf_counter()
+                    with lock:
+                        timings.append((ended - started) * 1000)
+                        acquire.append((connected - started) * 1000)
+            finally:
+                connections[alias].close()
+
+        connection_created.connect(count_connection)
+        try:
+            threads = [threading.Thread(target=worker) for _ in range(options['threads'])]
+            started = time.perf_counter()
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            elapsed = time.perf_counter() - started
+
+            pool_stats = None
+            if mode in POOL_MODES:
+                pool = type(base)._connection_pools.get(alias)
+                if pool is not None:
+                    pool_stats = pool.get_stats()
+                    connections[alias].close_pool()
+        finally:
+            connection_created.disconnect(count_connection)
+            del connections.settings[alias]
+
+        if errors:
+            self.stdout.write(self.style.ERROR(f'{mode}: {len(errors)} failed requests, e.g. {errors[0]}'))
+        if not timings:
+            timings = [0.0]
+
+        row = summarize(timings, [0], len(errors))
+        del row['queries']
+        # Under a pool, connection_created fires on every checkout; only the pool knows real connects
+        new_connections = pool_stats.get('connections_num', 0) if pool_stats is not None else opened['connections']
+        row.update({
+            'requests_per_s': round(len(timings) / elapsed, 1) if elapsed else 0.0,
+            'connections_per_request': round(new_connections / max(len(timings), 1), 4),
+            'acquire_ms': round(sum(acquire) / max(len(acquire), 1), 4),
+        })
+        if pool_stats is not None:
+            row['pool'] = {key: round(value, 4) for key, value in summarize_pool(pool_stats).items()}
+        return row
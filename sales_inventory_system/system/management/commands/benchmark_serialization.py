@@ -0,0 +1,160 @@
+"""
+Management command to compare JSON serialization paths of the list endpoints
+Run with: python manage.py benchmark_serialization --rows 1000 --repeat 20
+
+Builds one page of --rows orders and audit log entries the way the AJAX
+list endpoints used to (model instances, float()/strftime() per row,
+JsonResponse's encoder) and the way they do now (values() rows with SQL
+float casts, format_rows(), sales_inventory.serialization.dumps()), and
+reports the median milliseconds of each stage:
+
+    fetch    query and build the rows (instances or values() dicts)
+    format   turn them into the JSON-ready dicts (the values() path of
+             the order list queries the order items here)
+    encode   encode the payload with JsonResponse's encoder and with
+             dumps() (orjson when installed, else the json module)
+
+Both paths must produce the same payload; the command fails otherwise.
+Reads the configured database, so seed it first (seed_benchmark_data).
+"""
+import json
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.core.serializers.json import DjangoJSONEncoder
+
+from sales_inventory_system.orders.models import Order
+from sales_inventory_system.orders.views import order_list_rows, order_list_values
+from sales_inventory_system.sales_inventory import serialization
+from sales_inventory_system.system.models import AuditTrail
+from sales_inventory_system.system.views import audit_trail_rows, audit_trail_values
+
+
+def instance_orders(rows):
+    """The order list page as built from instances before serialization.py"""
+    return list(
+        Order.objects.select_related('payment').prefetch_related('items').order_by('-created_at', '-id')[:rows]
+    )
+
+
+def format_instance_orders(orders):
+    orders_data = []
+    for order in orders:
+        items_list = [f"{item.quantity}x {item.product_name}" for item in order.items.all()]
+        items_summary = ", ".join(items_list[:2])
+        if len(items_list) > 2:
+            items_summary += f", +{len(items_list) - 2} more"
+        orders_data.append({
+            'id': order.id,
+            'order_number': order.order_number,
+            'customer_name': order.customer_name,
+            'table_number': order.table_number or '-',
+            'items_summary': items_summary,
+            'total_amount': float(order.total_amount),
+            'status': order.status,
+            'status_display': order.get_status_display(),
+            'created_at': order.created_at.strftime('%b %d, %Y %I:%M %p'),
+            'payment_status': order.payment.status if hasattr(order, 'payment') else 'PENDING',
+        })
+    return orders_data
+
+
+def instance_audit_logs(rows):
+    """The audit trail page as built from instances before serialization.py"""
+    return list(AuditTrail.objects.select_related('user').order_by('-created_at', '-id')[:rows])
+
+
+def format_instance_audit_logs(logs):
+    return [
+        {
+            'id': log.id,
+            'timestamp': log.created_at.isoformat(),
+            'user': log.user.username if log.user else 'System',
+            'action': log.action,
+            'model_name': log.model_name,
+            'record_id': log.record_id,
+            'description': log.description,
+            'ip_address': log.ip_address or 'N/A',
+        }
+        for log in logs
+    ]
+
+
+def json_encode(data):
+    return json.dumps(data, cls=DjangoJSONEncoder).encode()
+
+
+class Command(BaseCommand):
+    help = 'Compare instance + JsonResponse serialization with values() rows + orjson on large list pages'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1000, help='Rows per page (default: 1000)')
+        parser.add_argument('--repeat', type=int, default=20, help='Timed runs per stage (default: 20)')
+
+    def handle(self, *args, **options):
+        rows, repeat = options['rows'], options['repeat']
+        endpoints = [
+            ('orders', Order, instance_orders, format_instance_orders,
+             lambda: list(order_list_values(Order.objects.order_by('-created_at', '-id'))[:rows]), order_list_rows),
+            ('audit_trail', AuditTrail, instance_audit_logs, format_instance_audit_logs,
+             lambda: list(audit_trail_values(AuditTrail.objects.order_by('-created_at', '-id'))[:rows]), audit_trail_rows),
+        ]
+        encoders = [('json', json_encode), ('dumps()', serialization.dumps)]
+        if serialization.orjson is None:
+            self.stdout.write(self.style.WARNING('orjson is not installed; dumps() uses the json module'))
+
+        for name, model, fetch_old, format_old, fetch_new, format_new in endpoints:
+            available = model.objects.count()
+            if available < rows:
+                raise CommandError(
+                    f'{name}: {available} rows, {rows} needed - run seed_benchmark_data or lower --rows'
+                )
+
+            old = self.time_path(repeat, lambda: fetch_old(rows), format_old)
+            new = self.time_path(repeat, fetch_new, format_new)
+            if old['payload'] != new['payload']:
+                raise CommandError(f'{name}: the instance and values() paths built different payloads')
+
+            self.stdout.write(self.style.MIGRATE_HEADING(f'{name} ({rows} rows, median of {repeat} runs)'))
+            self.stdout.write(f"  {'':<12}{'fetch':>10}{'format':>10}" + ''.join(
+                f'{encoder + " enc":>14}' for encoder, _ in encoders
+            ))
+            for label, path in (('instances', old), ('values()', new)):
+                encode_ms = [self.median_ms(repeat, lambda: encode(path['payload'])) for _, encode in encoders]
+                self.stdout.write(
+                    f"  {label:<12}{path['fetch_ms']:>10.2f}{path['format_ms']:>10.2f}"
+                    + ''.join(f'{ms:>14.2f}' for ms in encode_ms)
+                )
+
+            old_total = old['fetch_ms'] + old['format_ms'] + self.median_ms(repeat, lambda: json_encode(old['payload']))
+            new_total = new['fetch_ms'] + new['format_ms'] + self.median_ms(
+                repeat, lambda: serialization.dumps(new['payload'])
+            )
+            self.stdout.write(self.style.SUCCESS(
+                f'  before {old_total:.2f} ms, after {new_total:.2f} ms ({old_total / new_total:.1f}x)'
+            ))
+
+    def time_path(self, repeat, fetch, format_rows):
+        """Median fetch and format times of one path, and the payload it built"""
+        fetch_times, format_times = [], []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            fetched = fetch()
+            fetch_times.append((time.perf_counter() - start) * 1000)
+            start = time.perf_counter()
+            payload = format_rows(fetched)
+            format_times.append((time.perf_counter() - start) * 1000)
+        return {
+            'fetch_ms': statistics.median(fetch_times),
+            'format_ms': statistics.median(format_times),
+            'payload': payload,
+        }
+
+    def median_ms(self, repeat, func):
+        times = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            times.append((time.perf_counter() - start) * 1000)
+        return statistics.median(times)
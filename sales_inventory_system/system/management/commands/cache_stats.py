@@ -0,0 +1,31 @@
+"""
+Management command to show shared cache hit/miss counters per key family
+Run with: python manage.py cache_stats [--reset]
+"""
+from django.core.management.base import BaseCommand
+from sales_inventory_system.sales_inventory.caching import cache_stats, cache_ttl, reset_cache_stats
+
+
+class Command(BaseCommand):
+    help = 'Show hit/miss counters of the cached key families (sales_inventory.caching)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--reset',
+            action='store_true',
+            help='Reset the counters after printing them'
+        )
+
+    def handle(self, *args, **options):
+        stats = cache_stats()
+
+        self.stdout.write(f"{'family':<14}{'ttl':>6}{'hit':>8}{'stale':>8}{'miss':>8}{'refresh':>9}{'hit rate':>10}")
+        for family, counts in stats.items():
+            self.stdout.write(
+                f"{family:<14}{cache_ttl(family):>6}{counts['hit']:>8}{counts['stale']:>8}"
+                f"{counts['miss']:>8}{counts['refresh']:>9}{counts['hit_rate']:>10.1%}"
+            )
+
+        if options['reset']:
+            reset_cache_stats()
+            self.stdout.write(self.style.SUCCESS('Cache counters reset'))
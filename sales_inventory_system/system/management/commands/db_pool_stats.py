@@ -0,0 +1,39 @@
+"""
+Management command to show the database connection pool figures of every worker
+Run with: python manage.py db_pool_stats
+
+Workers publish their pool statistics every few seconds (sales_inventory.db_pool);
+counters are cumulative since each worker's pool opened.
+"""
+from django.core.management.base import BaseCommand
+from sales_inventory_system.sales_inventory.db_pool import collect_pool_stats, pooled_connections, summarize
+
+
+class Command(BaseCommand):
+    help = 'Show connection pool size, checkout wait and connection setup times per worker'
+
+    def handle(self, *args, **options):
+        if not pooled_connections():
+            self.stdout.write(self.style.WARNING(
+                'No database uses a connection pool (needs PostgreSQL, psycopg 3 and DB_POOL=true)'
+            ))
+            return
+
+        workers = collect_pool_stats()
+        if not workers:
+            self.stdout.write(self.style.WARNING('No worker has published pool statistics yet'))
+            return
+
+        self.stdout.write(
+            f"{'worker':<28}{'db':<10}{'size':>5}{'idle':>5}{'wait':>5}{'checkouts':>10}{'queued':>8}"
+            f"{'wait ms':>9}{'use ms':>9}{'opened':>8}{'conn ms':>9}{'errors':>7}"
+        )
+        for worker_id, pools in sorted(workers.items()):
+            for alias, stats in pools.items():
+                row = summarize(stats)
+                line = (
+                    f"{worker_id[:27]:<28}{alias[:9]:<10}{row['size']:>5}{row['available']:>5}{row['waiting']:>5}"
+                    f"{row['checkouts']:>10}{row['queued']:>8}{row['avg_wait_ms']:>9.2f}{row['avg_usage_ms']:>9.1f}"
+                    f"{row['connections_opened']:>8}{row['avg_connect_ms']:>9.1f}{row['errors']:>7}"
+                )
+                self.stdout.write(self.style.ERROR(line) if row['errors'] or row['waiting'] else line)
@@ -0,0 +1,122 @@
+"""
+Management command to load test a running server with kiosk/POS/admin traffic
+Run with: python manage.py load_test --url http://127.0.0.1:8000 --users 50 --duration 60
+
+Start the server the way it runs in production, e.g.
+    GUNICORN_WORKERS=4 gunicorn -c ../gunicorn.conf.py sales_inventory_system.sales_inventory.wsgi
+and run the same load against each configuration with a --label, writing
+--output files to compare throughput, tail latency and error rates per
+scenario. Seed users first (seed_users) and enough data to be realistic
+(seed_benchmark_data). The scenarios create real orders and payments.
+"""
+import json
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from sales_inventory_system.sales_inventory.loadtest import DEFAULT_MIX, SCENARIOS, run_load_test
+
+
+class Command(BaseCommand):
+    help = 'Replay kiosk, POS, cashier and admin traffic against a running server and report per scenario'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://127.0.0.1:8000', help='Server base URL')
+        parser.add_argument('--users', type=int, default=20, help='Concurrent virtual users (default: 20)')
+        parser.add_argument('--duration', type=int, default=60, help='Test length in seconds (default: 60)')
+        parser.add_argument('--ramp-up', type=float, default=5, help='Seconds to start all users over (default: 5)')
+        parser.add_argument(
+            '--think-time',
+            type=float,
+            default=0.5,
+            help='Mean pause between iterations per user, in seconds (default: 0.5; 0 for closed-loop max load)'
+        )
+        parser.add_argument(
+            '--scenario',
+            action='append',
+            metavar='NAME[=WEIGHT]',
+            help=f"Scenario mix, may be repeated (default: {', '.join(f'{k}={v}' for k, v in DEFAULT_MIX.items())})"
+        )
+        parser.add_argument('--admin', default='admin:admin123', help='Admin credentials as user:password')
+        parser.add_argument('--cashier', default='cashier:cashier123', help='Cashier credentials as user:password')
+        parser.add_argument('--timeout', type=float, default=30, help='Per-request timeout in seconds (default: 30)')
+        parser.add_argument('--label', default='', help='Name of the server configuration under test')
+        parser.add_argument('--steps', action='store_true', help='Also print the breakdown per request step')
+        parser.add_argument('--output', help='Write the report as JSON to this file')
+
+    def parse_mix(self, values):
+        if not values:
+            return DEFAULT_MIX
+        mix = {}
+        for value in values:
+            name, _, weight = value.partition('=')
+            if name not in SCENARIOS:
+                raise CommandError(f"Unknown scenario '{name}' (choose from {', '.join(SCENARIOS)})")
+            try:
+                mix[name] = int(weight) if weight else 1
+            except ValueError:
+                raise CommandError(f"Invalid weight in '{value}'")
+        return mix
+
+    def parse_credentials(self, value, option):
+        username, sep, password = value.partition(':')
+        if not sep:
+            raise CommandError(f'{option} must be given as user:password')
+        return username, password
+
+    def handle(self, *args, **options):
+        mix = self.parse_mix(options['scenario'])
+        credentials = {
+            'admin': self.parse_credentials(options['admin'], '--admin'),
+            'cashier': self.parse_credentials(options['cashier'], '--cashier'),
+        }
+
+        self.stdout.write(
+            f"Load testing {options['url']} with {options['users']} users for {options['duration']}s "
+            f"({', '.join(f'{k}={v}' for k, v in mix.items())})"
+        )
+
+        def progress(stats):
+            total = stats.report()['total']
+            self.stdout.write(
+                f"  {total['requests']} requests, {total['rps']:.1f} req/s, "
+                f"p95 {total['p95_ms']:.0f} ms, {total['errors']} errors",
+            )
+
+        report = run_load_test(
+            options['url'], options['users'], options['duration'], mix=mix, ramp_up=options['ramp_up'],
+            think_time=options['think_time'], credentials=credentials, timeout=options['timeout'],
+            on_progress=progress if options['verbosity'] > 1 else None,
+        )
+        report['label'] = options['label']
+        report['url'] = options['url']
+
+        for role, failures in report['login_failures'].items():
+            self.stdout.write(self.style.WARNING(
+                f'{failures} {role} user(s) could not log in; check --{role} credentials (see seed_users)'
+            ))
+
+        header = f"{'scenario':<30}{'req':>8}{'req/s':>8}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'max ms':>9}{'err %':>7}"
+        self.stdout.write(header)
+        for name, row in report['scenarios'].items():
+            self.write_row(name, row)
+            if options['steps']:
+                for step, step_row in report['steps'][name].items():
+                    self.write_row(f'  {step}', step_row)
+        self.write_row('total', report['total'])
+
+        if options['output']:
+            output = Path(options['output'])
+            output.parent.mkdir(parents=True, exist_ok=True)
+            output.write_text(json.dumps(report, indent=2))
+            self.stdout.write(self.style.SUCCESS(f'Report written to {output}'))
+
+        if report['total']['requests'] == report['total']['errors']:
+            raise CommandError(f"No requests succeeded; is the server running at {options['url']}?")
+
+    def write_row(self, name, row):
+        line = (
+            f"{name[:29]:<30}{row['requests']:>8}{row['rps']:>8.1f}{row['p50_ms']:>9.0f}"
+            f"{row['p95_ms']:>9.0f}{row['p99_ms']:>9.0f}{row['max_ms']:>9.0f}{row['error_rate'] * 100:>7.1f}"
+        )
+        self.stdout.write(self.style.ERROR(line) if row['error_rate'] > 0.01 else line)
@@ -0,0 +1,107 @@
+"""
+Management command to report request latency and query budgets per URL name
+Run with: python manage.py perf_report [--url-name kiosk:home] [--sort p95]
+"""
+import json
+import time
+from django.core.management.base import BaseCommand
+from sales_inventory_system.sales_inventory.instrumentation import clear_samples, load_samples, percentile
+
+SORT_KEYS = ('p50', 'p95', 'p99', 'count', 'queries', 'db')
+
+
+def summarize(samples):
+    """Group samples by URL name: request count, latency percentiles, queries, DB time, size"""
+    groups = {}
+    for sample in samples:
+        groups.setdefault(sample['url_name'], []).append(sample)
+
+    rows = []
+    for url_name, group in groups.items():
+        latencies = sorted(sample['total_ms'] for sample in group)
+        queries = sorted(sample['queries'] for sample in group)
+        sizes = [sample['size'] for sample in group if sample['size'] is not None]
+        rows.append({
+            'url_name': url_name,
+            'count': len(group),
+            'p50': percentile(latencies, 0.50),
+            'p95': percentile(latencies, 0.95),
+            'p99': percentile(latencies, 0.99),
+            'queries': sum(queries) / len(queries),
+            'max_queries': queries[-1],
+            'db': sum(sample['db_ms'] for sample in group) / len(group),
+            'size': sum(sizes) / len(sizes) if sizes else None,
+            'errors': sum(1 for sample in group if sample['status'] >= 500),
+        })
+    return rows
+
+
+class Command(BaseCommand):
+    help = 'Report sampled request latency (p50/p95/p99), query counts and DB time per URL name'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--url-name',
+            action='append',
+            help='Only report this URL name (e.g. kiosk:home); may be repeated'
+        )
+        parser.add_argument(
+            '--since',
+            type=int,
+            default=None,
+            help='Only use samples from the last N minutes'
+        )
+        parser.add_argument(
+            '--sort',
+            choices=SORT_KEYS,
+            default='p95',
+            help='Column to sort by, descending (default: p95)'
+        )
+        parser.add_argument(
+            '--limit',
+            type=int,
+            default=30,
+            help='Number of URL names shown (default: 30)'
+        )
+        parser.add_argument(
+            '--json',
+            action='store_true',
+            help='Print the report as JSON'
+        )
+        parser.add_argument(
+            '--clear',
+            action='store_true',
+            help='Discard all collected samples after reporting'
+        )
+
+    def handle(self, *args, **options):
+        samples = load_samples()
+        if options['since']:
+            cutoff = time.time() - options['since'] * 60
+            samples = [sample for sample in samples if sample['timestamp'] >= cutoff]
+        if options['url_name']:
+            samples = [sample for sample in samples if sample['url_name'] in options['url_name']]
+
+        rows = sorted(summarize(samples), key=lambda row: row[options['sort']], reverse=True)[:options['limit']]
+
+        if options['json']:
+            self.stdout.write(json.dumps(rows, indent=2))
+        elif not rows:
+            self.stdout.write(self.style.WARNING('No samples collected yet (see PERF_SAMPLE_RATE)'))
+        else:
+            self.stdout.write(
+                f"{'url name':<36}{'count':>7}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+                f"{'queries':>9}{'max q':>7}{'db ms':>8}{'size KB':>9}{'5xx':>5}"
+            )
+            for row in rows:
+                size = f"{row['size'] / 1024:.1f}" if row['size'] is not None else '-'
+                self.stdout.write(
+                    f"{row['url_name'][:35]:<36}{row['count']:>7}{row['p50']:>9.1f}{row['p95']:>9.1f}"
+                    f"{row['p99']:>9.1f}{row['queries']:>9.1f}{row['max_queries']:>7}{row['db']:>8.1f}"
+                    f"{size:>9}{row['errors']:>5}"
+                )
+            self.stdout.write(self.style.SUCCESS(f'{len(samples)} sample(s) across {len(rows)} URL name(s)'))
+
+        if options['clear']:
+            clear_samples()
+            self.stdout.write(self.style.SUCCESS('Samples cleared'))
@@ -0,0 +1,60 @@
+"""
+Management command to rebuild the archive index from the archived records
+Run with: python manage.py rebuild_archive_index
+"""
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from sales_inventory_system.accounts.models import User
+from sales_inventory_system.orders.models import Order
+from sales_inventory_system.products.models import Product
+from sales_inventory_system.system.models import Archive, AuditTrail
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the archive index (system.Archive) from archived products, users and orders'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Records processed per database round trip (default: 500)'
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        total = 0
+
+        for model in (Product, User, Order):
+            total += self.rebuild_model(model, batch_size)
+
+        self.stdout.write(self.style.SUCCESS(f'Successfully indexed {total} archived record(s)'))
+
+    def rebuild_model(self, model, batch_size):
+        """Re-index every archived record of one model and drop stale entries"""
+        model_name = model.__name__
+        archived_ids = list(model.objects.filter(is_archived=True).values_list('id', flat=True))
+
+        with transaction.atomic():
+            Archive.objects.filter(model_name=model_name).exclude(record_id__in=archived_ids).delete()
+
+            for start in range(0, len(archived_ids), batch_size):
+                ids = archived_ids[start:start + batch_size]
+
+                # Latest ARCHIVE audit log per record supplies who archived it and when
+                archived_logs = {}
+                for log in AuditTrail.objects.filter(
+                    action='ARCHIVE',
+                    model_name=model_name,
+                    record_id__in=ids
+                ).order_by('created_at', 'id'):
+                    archived_logs[log.record_id] = log
+
+                for instance in model.objects.filter(id__in=ids):
+                    log = archived_logs.get(instance.id)
+                    entry = Archive.index_record(instance, user=log.user if log else None)
+                    if log:
+                        Archive.objects.filter(pk=entry.pk).update(created_at=log.created_at)
+
+        self.stdout.write(f'  {model_name}: {len(archived_ids)} archived record(s)')
+        return len(archived_ids)
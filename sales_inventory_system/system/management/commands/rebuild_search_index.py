@@ -0,0 +1,26 @@
+"""
+Management command to create or rebuild the order/product search indexes
+Run with: python manage.py rebuild_search_index
+"""
+from django.core.management.base import BaseCommand
+from django.db import connections
+from sales_inventory_system.sales_inventory.search import SEARCH_INDEXES, install_search_indexes
+
+
+class Command(BaseCommand):
+    help = 'Create missing search indexes and rebuild the SQLite full-text tables'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--database',
+            default='default',
+            help='Database alias to index (default: default)'
+        )
+
+    def handle(self, *args, **options):
+        using = options['database']
+        install_search_indexes(using, rebuild=True)
+
+        vendor = connections[using].vendor
+        tables = ', '.join(SEARCH_INDEXES)
+        self.stdout.write(self.style.SUCCESS(f'Search indexes ready on {vendor} for: {tables}'))
@@ -0,0 +1,121 @@
+"""
+Management command to roll old audit logs into compressed monthly archives
+Run with: python manage.py rollover_audit_trail --keep-months 6
+"""
+from datetime import datetime
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from sales_inventory_system.system.models import AuditTrail, AuditTrailArchive
+
+
+def month_start(year, month):
+    """Timezone-aware start of the given calendar month"""
+    return timezone.make_aware(datetime(year, month, 1))
+
+
+def add_months(value, months):
+    """Shift a month start by a number of months (may be negative)"""
+    index = value.year * 12 + (value.month - 1) + months
+    return month_start(index // 12, index % 12 + 1)
+
+
+class Command(BaseCommand):
+    help = 'Move audit logs older than the retention window into compressed monthly archives'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--keep-months',
+            type=int,
+            default=6,
+            help='Number of full months (plus the current one) to keep in the live table (default: 6)'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Logs archived and deleted per transaction (default: 1000)'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only report what would be archived'
+        )
+
+    def handle(self, *args, **options):
+        keep_months = options['keep_months']
+        batch_size = options['batch_size']
+        dry_run = options['dry_run']
+
+        if keep_months < 0:
+            raise CommandError('--keep-months must be zero or greater')
+
+        now = timezone.localtime()
+        cutoff = add_months(month_start(now.year, now.month), -keep_months)
+
+        oldest = AuditTrail.objects.filter(created_at__lt=cutoff).order_by('created_at').first()
+        if oldest is None:
+            self.stdout.write(self.style.WARNING('No audit logs older than the retention window'))
+            return
+
+        oldest_at = timezone.localtime(oldest.created_at)
+        period_start = month_start(oldest_at.year, oldest_at.month)
+        total_archived = 0
+
+        while period_start < cutoff:
+            period_end = add_months(period_start, 1)
+            period = period_start.strftime('%Y-%m')
+            logs = AuditTrail.objects.filter(
+                created_at__gte=period_start,
+                created_at__lt=period_end
+            ).order_by('id')
+
+            if dry_run:
+                count = logs.count()
+                if count:
+                    self.stdout.write(f'  {period}: {count} log(s) would be archived')
+                total_archived += count
+            else:
+                total_archived += self.archive_period(period, logs, batch_size)
+
+            period_start = period_end
+
+        if dry_run:
+            self.stdout.write(self.style.SUCCESS(f'Dry run: {total_archived} log(s) would be archived'))
+            return
+
+        AuditTrail.clear_filter_choices()
+        self.stdout.write(
+            self.style.SUCCESS(f'Successfully archived {total_archived} audit log(s) older than {cutoff:%Y-%m}')
+        )
+
+    def archive_period(self, period, logs, batch_size):
+        """
+        Move one month of logs into its archive row, --batch-size logs at a
+        time: each batch is appended and deleted in its own transaction, so
+        the month is never held in memory and an interrupted run resumes
+        without archiving a log twice.
+        """
+        archived = 0
+        last_id = 0
+
+        while True:
+            batch = list(logs.filter(id__gt=last_id)[:batch_size])
+            if not batch:
+                break
+
+            with transaction.atomic():
+                archive, _ = AuditTrailArchive.objects.select_for_update().get_or_create(
+                    period=period,
+                    defaults={'data': b''}
+                )
+                archive.append_rows([log.to_archive_dict() for log in batch])
+                archive.save()
+                AuditTrail.objects.filter(id__in=[log.id for log in batch]).delete()
+
+            archived += len(batch)
+            last_id = batch[-1].id
+
+        if archived:
+            self.stdout.write(f'  {period}: archived {archived} log(s)')
+        return archived
@@ -0,0 +1,296 @@
+"""
+Management command to benchmark the hot paths against a seeded throwaway database
+Run with: python manage.py run_benchmarks --orders 100000 --products 200 [--compare benchmarks/baseline.json]
+
+The benchmark runs in a separate test database (test_<name> on PostgreSQL,
+.cache/benchmark.sqlite3 on SQLite) seeded by seed_benchmark_data, with
+in-memory caches, so it never touches live data or the shared cache. Use
+--keepdb to reuse a seeded database between runs; seeding only tops it up.
+Run it once per database, e.g. a second time with DATABASE_URL pointing at
+a local PostgreSQL.
+
+Each scenario is timed with the test client over --iterations requests
+after --warmup untimed ones. Results (latency statistics and query counts
+per scenario, plus the commit, database and data volumes) are written as
+JSON; --compare checks them against an earlier result file.
+"""
+import json
+import platform
+import statistics
+import subprocess
+import time
+from pathlib import Path
+
+import django
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from sales_inventory_system.accounts.models import User
+from sales_inventory_system.analytics.panels import PANELS, invalidate_panels
+from sales_inventory_system.orders.models import Order, OrderItem, Payment
+from sales_inventory_system.products.models import Ingredient, Product
+from sales_inventory_system.sales_inventory.caching import invalidate
+
+BENCHMARK_CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'benchmark'},
+    'carts': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'benchmark-carts'},
+}
+
+
+class Scenario:
+    """One benchmarked request: who sends it, how to prepare it, how to send it"""
+
+    def __init__(self, name, role, request, setup=None, iterations=None):
+        self.name = name
+        self.role = role
+        self.request = request
+        self.setup = setup
+        self.iterations = iterations
+
+
+def clear_pos_cart(client, ctx):
+    client.post(reverse('orders:pos_cart_sync'), json.dumps({'ops': [{'op': 'clear'}]}),
+                content_type='application/json')
+
+
+def fill_pos_cart(client, ctx):
+    ops = [{'op': 'clear'}] + [{'op': 'add', 'product_id': pid, 'quantity': 1} for pid in ctx['product_ids'][:3]]
+    client.post(reverse('orders:pos_cart_sync'), json.dumps({'ops': ops}), content_type='application/json')
+
+
+def create_pending_order(client, ctx):
+    product = Product.objects.get(pk=ctx['product_ids'][0])
+    order = Order.objects.create(customer_name='Benchmark', total_amount=product.price * 2)
+    OrderItem.objects.create(order=order, product=product, quantity=2)
+    Payment.objects.create(order=order, method='CASH', amount=order.total_amount)
+    ctx['order_id'] = order.pk
+
+
+def drop_dashboard_panels(client, ctx):
+    invalidate_panels(*PANELS)
+
+
+def drop_forecast(client, ctx):
+    invalidate('forecast', 'v2_60_7')
+
+
+SCENARIOS = [
+    Scenario('kiosk_home', None, lambda c, ctx: c.get(reverse('kiosk:home'))),
+    Scenario('pos_home', 'cashier', lambda c, ctx: c.get(reverse('orders:pos_home'))),
+    Scenario('pos_add_to_cart', 'cashier',
+             lambda c, ctx: c.post(reverse('orders:pos_add_to_cart', args=[ctx['product_ids'][0]]), {'quantity': 1}),
+             setup=clear_pos_cart),
+    Scenario('pos_checkout', 'cashier',
+             lambda c, ctx: c.post(reverse('orders:pos_checkout'), {'customer_name': 'Benchmark', 'payment_method': 'CASH'}),
+             setup=fill_pos_cart),
+    Scenario('process_payment', 'cashier',
+             lambda c, ctx: c.post(reverse('orders:process_payment', args=[ctx['order_id']])),
+             setup=create_pending_order),
+    Scenario('order_list', 'admin', lambda c, ctx: c.get(reverse('orders:list'))),
+    Scenario('dashboard', 'admin', lambda c, ctx: c.get(reverse('analytics:dashboard'))),
+    Scenario('dashboard_cold', 'admin', lambda c, ctx: c.get(reverse('analytics:dashboard')),
+             setup=drop_dashboard_panels),
+    Scenario('sales_forecast', 'admin', lambda c, ctx: c.get(reverse('analytics:sales_forecast')),
+             setup=drop_forecast, iterations=3),
+    Scenario('bom_dashboard', 'admin', lambda c, ctx: c.get(reverse('products:bom_dashboard'))),
+    Scenario('bom_usage_report', 'admin', lambda c, ctx: c.get(reverse('products:bom_usage_report'))),
+    Scenario('bom_variance', 'admin', lambda c, ctx: c.get(reverse('products:bom_variance'))),
+    Scenario('bom_low_stock', 'admin', lambda c, ctx: c.get(reverse('products:bom_low_stock'))),
+    Scenario('bom_waste', 'admin', lambda c, ctx: c.get(reverse('products:bom_waste'))),
+]
+
+
+def summarize(timings, queries, errors):
+    ordered = sorted(timings)
+    return {
+        'iterations': len(timings),
+        'min_ms': round(ordered[0], 2),
+        'median_ms': round(statistics.median(ordered), 2),
+        'mean_ms': round(statistics.fmean(ordered), 2),
+        'p95_ms': round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 2),
+        'max_ms': round(ordered[-1], 2),
+        'stdev_ms': round(statistics.stdev(ordered), 2) if len(ordered) > 1 else 0.0,
+        'queries': statistics.median(queries),
+        'errors': errors,
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=settings.BASE_DIR,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = 'Benchmark kiosk, POS, payment, dashboard, forecast and BOM report views on seeded data'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--orders', type=int, default=10000, help='Orders to seed (default: 10000)')
+        parser.add_argument('--products', type=int, default=50, help='Products to seed (default: 50)')
+        parser.add_argument('--ingredients', type=int, default=100, help='Ingredients to seed (default: 100)')
+        parser.add_argument('--iterations', type=int, default=20, help='Timed requests per scenario (default: 20)')
+        parser.add_argument('--warmup', type=int, default=2, help='Untimed requests per scenario (default: 2)')
+        parser.add_argument(
+            '--scenario',
+            action='append',
+            choices=[scenario.name for scenario in SCENARIOS],
+            help='Only run this scenario; may be repeated'
+        )
+        parser.add_argument('--output', help='Result file (default: benchmarks/<vendor>-<commit>-<time>.json)')
+        parser.add_argument('--compare', help='Earlier result file to compare against')
+        parser.add_argument(
+            '--threshold',
+            type=float,
+            default=1.25,
+            help='Median slowdown ratio reported as a regression (default: 1.25)'
+        )
+        parser.add_argument(
+            '--fail-on-regression',
+            action='store_true',
+            help='Exit with an error if any scenario regressed'
+        )
+        parser.add_argument('--keepdb', action='store_true', help='Keep the seeded benchmark database for later runs')
+
+    def handle(self, *args, **options):
+        scenarios = [s for s in SCENARIOS if not options['scenario'] or s.name in options['scenario']]
+
+        test_settings = connection.settings_dict.setdefault('TEST', {})
+        if connection.vendor == 'sqlite' and not test_settings.get('NAME'):
+            # A file rather than :memory:, to measure real I/O and allow --keepdb
+            path = Path(settings.BASE_DIR) / '.cache' / 'benchmark.sqlite3'
+            path.parent.mkdir(parents=True, exist_ok=True)
+            test_settings['NAME'] = str(path)
+
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, keepdb=options['keepdb'])
+        try:
+            with override_settings(
+                CACHES=BENCHMARK_CACHES,
+                ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver'],
+                PERF_SAMPLE_RATE=0,
+            ):
+                self.stdout.write(f'Seeding benchmark data on {connection.vendor}...')
+                call_command(
+                    'seed_benchmark_data', orders=options['orders'], products=options['products'],
+                    ingredients=options['ingredients'], verbosity=options['verbosity'], stdout=self.stdout,
+                )
+                report = self.run(scenarios, options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=options['keepdb'])
+
+        output = Path(options['output'] or (
+            Path(settings.BASE_DIR) / 'benchmarks'
+            / f"{report['meta']['database']}-{report['meta']['commit'] or 'nogit'}-{timezone.now():%Y%m%d%H%M%S}.json"
+        ))
+        output.parent.mkdir(parents=True, exist_ok=True)
+        output.write_text(json.dumps(report, indent=2))
+        self.stdout.write(self.style.SUCCESS(f'Results written to {output}'))
+
+        if options['compare']:
+            self.compare(report, options['compare'], options['threshold'], options['fail_on_regression'])
+
+    def run(self, scenarios, options):
+        admin = User.objects.get(username='admin')
+        cashier = User.objects.filter(role='CASHIER').first()
+        ctx = {
+            'product_ids': list(
+                Product.objects.filter(is_archived=False, recipe__isnull=False).order_by('id').values_list('id', flat=True)
+            ),
+        }
+        volumes = {
+            'orders': Order.objects.count(),
+            'products': Product.objects.count(),
+            'ingredients': Ingredient.objects.count(),
+        }
+        clients = {None: Client(), 'admin': Client(), 'cashier': Client()}
+        clients['admin'].force_login(admin)
+        clients['cashier'].force_login(cashier)
+
+        self.stdout.write(f"{'scenario':<20}{'median ms':>11}{'p95 ms':>10}{'max ms':>10}{'queries':>9}{'errors':>8}")
+        results = {}
+        for scenario in scenarios:
+            client = clients[scenario.role]
+            iterations = scenario.iterations or options['iterations']
+            timings, queries, errors = [], [], 0
+
+            for i in range(options['warmup'] + iterations):
+                if scenario.setup:
+                    scenario.setup(client, ctx)
+                with CaptureQueriesContext(connection) as captured:
+                    started = time.perf_counter()
+                    response = scenario.request(client, ctx)
+                    elapsed = (time.perf_counter() - started) * 1000
+                if i < options['warmup']:
+                    continue
+                timings.append(elapsed)
+                queries.append(len(captured.captured_queries))
+                if response.status_code >= 400 or (
+                    response.get('Content-Type', '').startswith('application/json')
+                    and response.json().get('success') is False
+                ):
+                    errors += 1
+
+            results[scenario.name] = summarize(timings, queries, errors)
+            row = results[scenario.name]
+            self.stdout.write(
+                f"{scenario.name:<20}{row['median_ms']:>11.1f}{row['p95_ms']:>10.1f}{row['max_ms']:>10.1f}"
+                f"{row['queries']:>9}{row['errors']:>8}"
+            )
+
+        return {
+            'meta': {
+                'timestamp': timezone.now().isoformat(),
+                'commit': git_commit(),
+                'database': connection.vendor,
+                'database_version': '.'.join(str(part) for part in connection.get_database_version()),
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'volumes': volumes,
+                'iterations': options['iterations'],
+            },
+            'results': results,
+        }
+
+    def compare(self, report, baseline_path, threshold, fail_on_regression):
+        try:
+            baseline = json.loads(Path(baseline_path).read_text())
+        except (OSError, ValueError) as e:
+            raise CommandError(f'Cannot read baseline {baseline_path}: {e}')
+
+        self.stdout.write(
+            f"\nCompared with {baseline['meta'].get('commit')} ({baseline['meta'].get('database')}, "
+            f"{baseline['meta'].get('volumes', {}).get('orders')} orders)"
+        )
+        regressions = []
+        for name, current in report['results'].items():
+            previous = baseline['results'].get(name)
+            if not previous or not previous['median_ms']:
+                continue
+            ratio = current['median_ms'] / previous['median_ms']
+            status = ''
+            if ratio >= threshold:
+                status = 'REGRESSION'
+                regressions.append(name)
+            elif ratio <= 1 / threshold:
+                status = 'improved'
+            self.stdout.write(
+                f"{name:<20}{previous['median_ms']:>10.1f} -> {current['median_ms']:>8.1f} ms"
+                f"{ratio:>8.2f}x  queries {previous['queries']} -> {current['queries']}  {status}"
+            )
+
+        if regressions:
+            message = f"{len(regressions)} scenario(s) regressed: {', '.join(regressions)}"
+            if fail_on_regression:
+                raise CommandError(message)
+            self.stdout.write(self.style.WARNING(message))
+        else:
+            self.stdout.write(self.style.SUCCESS('No regressions'))
@@ -0,0 +1,183 @@
+"""
+Management command to check that the hot queries are served by indexes
+Run with: python manage.py verify_query_plans [--min-rows 5000] [--analyze] [--plans]
+
+Runs EXPLAIN for each query shape below on the configured database (SQLite
+or PostgreSQL) and fails if the planner reads the query's whole table:
+PostgreSQL "Seq Scan on <table>", SQLite "SCAN <table>", including a SCAN
+walking every entry of a (non-partial) index instead of seeking into it.
+
+Plans depend on table sizes: on a handful of rows PostgreSQL rightly
+prefers a sequential scan. Run it against large fixtures, e.g. after
+`python manage.py seed_benchmark_data --orders 100000`; tables with fewer
+than --min-rows rows are reported but not enforced. --analyze refreshes the
+planner statistics first.
+"""
+import re
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from sales_inventory_system.orders.models import Order, OrderItem, Payment
+from sales_inventory_system.products.models import Product, StockTransaction
+from sales_inventory_system.sales_inventory.dates import day_range, day_start
+
+SQLITE_SCAN = re.compile(r'\bSCAN (?:TABLE )?(\w+)(?: AS \w+)?(?: USING (?:COVERING )?INDEX (\w+))?')
+SQLITE_INDEX = re.compile(r'USING (?:COVERING )?INDEX (\w+)')
+POSTGRES_SCAN = re.compile(r'Seq Scan on (\w+)')
+POSTGRES_INDEX = re.compile(r'Index (?:Only )?Scan (?:Backward )?using (\w+)|Bitmap Index Scan on (\w+)')
+
+
+def revenue_by_day(days):
+    # analytics.views.sales_data_api (week/month)
+    start = day_start(timezone.localdate() - timedelta(days=days - 1))
+    return Payment.objects.filter(status='SUCCESS', created_at__gte=start).annotate(
+        date=TruncDate('created_at')
+    ).values('date').annotate(total=Sum('amount')).order_by('date')
+
+
+def revenue_today():
+    # orders.order_board statistics, admin dashboard
+    start, end = day_range(timezone.localdate())
+    return Payment.objects.filter(status='SUCCESS', created_at__gte=start, created_at__lt=end).values('status').annotate(
+        total=Sum('amount')
+    )
+
+
+def orders_today():
+    start, end = day_range(timezone.localdate())
+    return Order.objects.filter(created_at__gte=start, created_at__lt=end).values('status').annotate(count=Count('id'))
+
+
+def pending_expiry():
+    # Order.expire_old_pending_orders
+    return Order.objects.filter(status='PENDING', created_at__lt=timezone.now() - timedelta(minutes=15)).values('pk')
+
+
+def in_progress():
+    # POS and kitchen display
+    return Order.objects.filter(status='IN_PROGRESS').order_by('-created_at')
+
+
+def recent_finished():
+    # orders.order_board full sync
+    return Order.objects.filter(status='FINISHED').order_by('-created_at', '-id').values('pk')[:50]
+
+
+def top_sellers(days):
+    start = day_start(timezone.localdate() - timedelta(days=days - 1))
+    return OrderItem.objects.filter(created_at__gte=start).values('product').annotate(
+        total_quantity=Sum('quantity')
+    ).order_by('-total_quantity')[:10]
+
+
+def recent_purchases():
+    # products.bom_views.low_stock_report
+    return StockTransaction.objects.filter(
+        transaction_type='PURCHASE', created_at__gte=timezone.now() - timedelta(days=7)
+    ).values('pk')
+
+
+def items_of_product():
+    # PROTECT check when deleting a product, per-product item lookups
+    return OrderItem.objects.filter(product_id=1).values('pk')[:1]
+
+
+def product_listing():
+    # Kiosk home, POS, product list
+    return Product.objects.filter(is_archived=False).order_by('category', 'name')
+
+
+HOT_QUERIES = [
+    ('revenue by day, last 7 days', Payment, lambda: revenue_by_day(7)),
+    ('revenue today', Payment, revenue_today),
+    ('orders today', Order, orders_today),
+    ('pending order expiry', Order, pending_expiry),
+    ('orders in progress', Order, in_progress),
+    ('recent finished orders', Order, recent_finished),
+    ('top sellers, last 7 days', OrderItem, lambda: top_sellers(7)),
+    ('recent purchases', StockTransaction, recent_purchases),
+    ('active product listing', Product, product_listing),
+]
+
+# Shapes served by indexes that only exist on some databases
+VENDOR_HOT_QUERIES = {
+    'postgresql': [
+        # orders_orderitem_product_idx (orders migration 0010); SQLite runs without it
+        ('order items of a product', OrderItem, items_of_product),
+    ],
+}
+
+
+def partial_indexes(model):
+    return {index.name for index in model._meta.indexes if index.condition is not None}
+
+
+def parse_plan(vendor, plan, model):
+    """(sequential scan of the model's table?, indexes used) for an EXPLAIN output"""
+    table = model._meta.db_table
+    if vendor == 'sqlite':
+        # Walking a partial index only visits the rows the query wants
+        seq_scan = any(
+            name == table and index not in partial_indexes(model)
+            for name, index in SQLITE_SCAN.findall(plan)
+        )
+        indexes = SQLITE_INDEX.findall(plan)
+    else:
+        seq_scan = table in POSTGRES_SCAN.findall(plan)
+        indexes = [a or b for a, b in POSTGRES_INDEX.findall(plan)]
+    return seq_scan, list(dict.fromkeys(indexes))
+
+
+class Command(BaseCommand):
+    help = 'EXPLAIN the hot queries and fail if any falls back to a sequential scan'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--min-rows', type=int, default=5000,
+                            help='Only enforce index use on tables with at least this many rows (default: 5000)')
+        parser.add_argument('--analyze', action='store_true', help='Run ANALYZE before explaining')
+        parser.add_argument('--plans', action='store_true', help='Print the full plan of every query')
+
+    def handle(self, *args, **options):
+        vendor = connection.vendor
+        if vendor not in ('sqlite', 'postgresql'):
+            raise CommandError(f'Query plans can only be verified on SQLite or PostgreSQL, not {vendor}')
+
+        if options['analyze']:
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE')
+
+        hot_queries = HOT_QUERIES + VENDOR_HOT_QUERIES.get(vendor, [])
+        self.stdout.write(f'Verifying {len(hot_queries)} query plans on {vendor}')
+        rows_by_model = {}
+        failures = []
+        for name, model, build in hot_queries:
+            table = model._meta.db_table
+            if model not in rows_by_model:
+                rows_by_model[model] = model.objects.count()
+            rows = rows_by_model[model]
+
+            plan = build().explain()
+            seq_scan, indexes = parse_plan(vendor, plan, model)
+            if not seq_scan:
+                status = self.style.SUCCESS('ok')
+            elif rows < options['min_rows']:
+                status = self.style.WARNING('seq scan (small table, not enforced)')
+            else:
+                status = self.style.ERROR('SEQ SCAN')
+                failures.append(name)
+
+            self.stdout.write(
+                f"  {name:<30}{table:<28}{rows:>9} rows  {', '.join(indexes) or '-':<48}{status}"
+            )
+            if options['plans'] or (seq_scan and rows >= options['min_rows']):
+                for line in plan.splitlines():
+                    self.stdout.write(f'      {line}')
+
+        if failures:
+            raise CommandError(f"Sequential scans in {len(failures)} hot queries: {', '.join(failures)}")
+        self.stdout.write(self.style.SUCCESS('All hot queries use an index'))
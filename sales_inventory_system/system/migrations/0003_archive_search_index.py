@@ -0,0 +1,51 @@
+# Generated by Django 5.2.8 on 2026-10-19 07:12
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def remove_duplicate_archives(apps, schema_editor):
+    """Keep only the newest archive row per record before adding the unique constraint"""
+    Archive = apps.get_model('system', 'Archive')
+    seen = set()
+    duplicate_ids = []
+    for archive_id, model_name, record_id in Archive.objects.order_by('-created_at', '-id').values_list('id', 'model_name', 'record_id'):
+        key = (model_name, record_id)
+        if key in seen:
+            duplicate_ids.append(archive_id)
+        seen.add(key)
+    Archive.objects.filter(id__in=duplicate_ids).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('system', '0002_audittrailarchive'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='archive',
+            name='system_arch_model_n_7c1d56_idx',
+        ),
+        migrations.AddField(
+            model_name='archive',
+            name='search_text',
+            field=models.TextField(blank=True, help_text='Searchable fields of the record'),
+        ),
+        migrations.AddField(
+            model_name='archive',
+            name='title',
+            field=models.CharField(blank=True, help_text='Display name used for ranking', max_length=255),
+        ),
+        migrations.AddIndex(
+            model_name='archive',
+            index=models.Index(fields=['model_name', '-created_at'], name='system_archive_model_idx'),
+        ),
+        migrations.RunPython(remove_duplicate_archives, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='archive',
+            constraint=models.UniqueConstraint(fields=('model_name', 'record_id'), name='system_archive_record_uniq'),
+        ),
+    ]
@@ -0,0 +1,100 @@
+from django.db import migrations
+
+
+def archive_entry(model_name, instance):
+    """
+    (title, search fields, data snapshot) of a record, as Archive.entry_for
+    built them when this migration was written. Kept inline so later changes
+    to the model don't alter what this migration writes.
+    """
+    if model_name == 'Product':
+        return instance.name, [instance.name, instance.description, instance.category], {
+            'name': instance.name,
+            'category': instance.category or 'N/A',
+            'price': float(instance.price),
+        }
+
+    if model_name == 'User':
+        full_name = f"{instance.first_name} {instance.last_name}".strip()
+        return instance.username, [instance.username, instance.email, full_name], {
+            'username': instance.username,
+            'email': instance.email,
+            'full_name': full_name or instance.username,
+            'role': instance.get_role_display(),
+        }
+
+    return instance.order_number, [instance.order_number, instance.customer_name, instance.table_number], {
+        'order_number': instance.order_number,
+        'customer_name': instance.customer_name or 'N/A',
+        'status': instance.get_status_display(),
+        'total_amount': float(instance.total_amount),
+        'created_at': instance.created_at.strftime("%Y-%m-%d %H:%M"),
+    }
+
+
+def backfill_archive_index(apps, schema_editor):
+    """
+    Index records archived before the archive index existed, like
+    rebuild_archive_index: who archived them and when comes from their
+    latest ARCHIVE audit log. Records already indexed are left alone.
+    """
+    Archive = apps.get_model('system', 'Archive')
+    AuditTrail = apps.get_model('system', 'AuditTrail')
+    models = {
+        'Product': apps.get_model('products', 'Product'),
+        'User': apps.get_model('accounts', 'User'),
+        'Order': apps.get_model('orders', 'Order'),
+    }
+    batch_size = 500
+
+    for model_name, model in models.items():
+        indexed = set(Archive.objects.filter(model_name=model_name).values_list('record_id', flat=True))
+        missing = [
+            record_id for record_id in model.objects.filter(is_archived=True).values_list('id', flat=True)
+            if record_id not in indexed
+        ]
+
+        for start in range(0, len(missing), batch_size):
+            ids = missing[start:start + batch_size]
+
+            archived_logs = {}
+            for log in AuditTrail.objects.filter(
+                action='ARCHIVE', model_name=model_name, record_id__in=ids
+            ).order_by('created_at', 'id'):
+                archived_logs[log.record_id] = log
+
+            entries = []
+            for instance in model.objects.filter(id__in=ids):
+                title, fields, data = archive_entry(model_name, instance)
+                log = archived_logs.get(instance.id)
+                entries.append(Archive(
+                    model_name=model_name,
+                    record_id=instance.id,
+                    title=title[:255],
+                    search_text='\n'.join(str(field) for field in fields if field),
+                    data=data,
+                    archived_by_id=log.user_id if log else None,
+                ))
+            Archive.objects.bulk_create(entries)
+
+            # created_at is auto_now_add, so the archive time is set afterwards
+            for entry in entries:
+                log = archived_logs.get(entry.record_id)
+                if log:
+                    Archive.objects.filter(model_name=model_name, record_id=entry.record_id).update(
+                        created_at=log.created_at
+                    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('system', '0003_archive_search_index'),
+        ('accounts', '0001_initial'),
+        ('orders', '0006_merge_20260102_2240'),
+        ('products', '0007_merge_20260102_2240'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_archive_index, migrations.RunPython.noop),
+    ]
@@ -1,5 +1,13 @@
 from django.db import models
 from django.conf import settings
+from django.core.cache import cache
+from django.utils.dateparse import parse_datetime
+import gzip
+import json
+
+# Cache key for the distinct model/action values shown in the audit filters
+AUDIT_FILTER_CHOICES_CACHE_KEY = 'audit_trail:filter_choices'
+AUDIT_FILTER_CHOICES_TIMEOUT = 60 * 60  # 1 hour
 
 class AuditTrail(models.Model):
     """Audit trail model for logging all system actions"""
@@ -36,12 +44,116 @@ class AuditTrail(models.Model):
     def __str__(self):
         return f"{self.user} {self.get_action_display()} {self.model_name} #{self.record_id}"
 
+    @classmethod
+    def filter_choices(cls):
+        """
+        Distinct model names and actions for the audit trail filter dropdowns.
+
+        The DISTINCT scans grow with the table, so the result is cached and
+        only invalidated when a log introduces a new value (see system.signals)
+        or when old periods are rolled over into AuditTrailArchive.
+        """
+        choices = cache.get(AUDIT_FILTER_CHOICES_CACHE_KEY)
+        if choices is None:
+            choices = {
+                'models': list(
+                    cls.objects.values_list('model_name', flat=True).distinct().order_by('model_name')
+                ),
+                'actions': list(
+                    cls.objects.values_list('action', flat=True).distinct().order_by('action')
+                ),
+            }
+            cache.set(AUDIT_FILTER_CHOICES_CACHE_KEY, choices, AUDIT_FILTER_CHOICES_TIMEOUT)
+        return choices
+
+    @staticmethod
+    def clear_filter_choices():
+        """Drop the cached filter dropdown values"""
+        cache.delete(AUDIT_FILTER_CHOICES_CACHE_KEY)
+
+    def to_archive_dict(self):
+        """Serialize the log for storage in a compressed AuditTrailArchive period"""
+        return {
+            'id': self.id,
+            'user_id': self.user_id,
+            'action': self.action,
+            'model_name': self.model_name,
+            'record_id': self.record_id,
+            'description': self.description,
+            'data_snapshot': self.data_snapshot,
+            'ip_address': self.ip_address,
+            'created_at': self.created_at.isoformat(),
+        }
+
+
+class AuditTrailArchive(models.Model):
+    """
+    Compressed, per-month storage for audit logs past the retention window.
+
+    Each row holds one calendar month (period) of AuditTrail rows as
+    gzip-compressed JSON lines, so the live audit table only carries recent
+    history. Populated by the rollover_audit_trail management command.
+    """
+
+    period = models.CharField(max_length=7, unique=True, help_text="Calendar month, e.g. '2025-11'")
+    row_count = models.IntegerField(default=0)
+    first_created_at = models.DateTimeField(null=True, blank=True)
+    last_created_at = models.DateTimeField(null=True, blank=True)
+    data = models.BinaryField(help_text="gzip-compressed JSON lines of AuditTrail rows")
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-period']
+
+    def __str__(self):
+        return f"Audit archive {self.period} ({self.row_count} logs)"
+
+    def rows(self):
+        """Decompress and return the archived logs as a list of dicts"""
+        if not self.data:
+            return []
+        # gzip.decompress() reads every appended member in turn
+        payload = gzip.decompress(bytes(self.data)).decode('utf-8')
+        rows = [json.loads(line) for line in payload.splitlines() if line]
+        rows.sort(key=lambda row: (row['created_at'], row['id']))
+        return rows
+
+    def append_rows(self, rows):
+        """
+        Add serialized logs to this period as a new gzip member, so appending
+        a batch never decompresses the rows already archived.
+        """
+        if not rows:
+            return
+        rows = sorted(rows, key=lambda row: (row['created_at'], row['id']))
+        # Each line starts with a newline so members join cleanly onto older payloads
+        payload = ''.join('\n' + json.dumps(row, default=str) for row in rows)
+        self.data = bytes(self.data or b'') + gzip.compress(payload.encode('utf-8'))
+        self.row_count += len(rows)
+
+        first_created_at = parse_datetime(rows[0]['created_at'])
+        last_created_at = parse_datetime(rows[-1]['created_at'])
+        if self.first_created_at is None or first_created_at < self.first_created_at:
+            self.first_created_at = first_created_at
+        if self.last_created_at is None or last_created_at > self.last_created_at:
+            self.last_created_at = last_created_at
 
 class Archive(models.Model):
-    """Archive model for storing deleted/archived records"""
+    """
+    Index of currently archived records (products, users, orders).
+
+    One row per archived record, kept in step with is_archived by the
+    post_save/post_delete receivers in system.signals, so archive listings
+    and search read this small table instead of scanning the source tables
+    or the audit trail. The archive views add who archived the record
+    (record_archiver).
+    """
 
     model_name = models.CharField(max_length=100)
     record_id = models.IntegerField()
+    title = models.CharField(max_length=255, blank=True, help_text="Display name used for ranking")
+    search_text = models.TextField(blank=True, help_text="Searchable fields of the record")
     data = models.JSONField()
     archived_by = models.ForeignKey(
         settings.AUTH_USER_MODEL,
@@ -54,9 +166,131 @@ class Archive(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        constraints = [
+            models.UniqueConstraint(fields=['model_name', 'record_id'], name='system_archive_record_uniq'),
+        ]
         indexes = [
-            models.Index(fields=['model_name', 'record_id']),
+            models.Index(fields=['model_name', '-created_at'], name='system_archive_model_idx'),
         ]
 
     def __str__(self):
         return f"Archived {self.model_name} #{self.record_id}"
+
+    @staticmethod
+    def entry_for(instance):
+        """
+        Build (title, search fields, data snapshot) for an archivable record.
+        The snapshot holds what archive search returns, so results need no joins.
+        """
+        model_name = instance.__class__.__name__
+
+        if model_name == 'Product':
+            return instance.name, [instance.name, instance.description, instance.category], {
+                'name': instance.name,
+                'category': instance.category or 'N/A',
+                'price': float(instance.price),
+            }
+
+        if model_name == 'User':
+            full_name = f"{instance.first_name} {instance.last_name}".strip()
+            return instance.username, [instance.username, instance.email, full_name], {
+                'username': instance.username,
+                'email': instance.email,
+                'full_name': full_name or instance.username,
+                'role': instance.get_role_display(),
+            }
+
+        if model_name == 'Order':
+            return instance.order_number, [instance.order_number, instance.customer_name, instance.table_number], {
+                'order_number': instance.order_number,
+                'customer_name': instance.customer_name or 'N/A',
+                'status': instance.get_status_display(),
+                'total_amount': float(instance.total_amount),
+                'created_at': instance.created_at.strftime("%Y-%m-%d %H:%M"),
+            }
+
+        raise ValueError(f'{model_name} records cannot be archived')
+
+    @classmethod
+    def _entry_fields(cls, instance):
+        title, fields, data = cls.entry_for(instance)
+        return {
+            'title': title[:255],
+            'search_text': '\n'.join(str(field) for field in fields if field),
+            'data': data,
+        }
+
+    @classmethod
+    def index_record(cls, instance, user=None, reason=''):
+        """Add or refresh the archive entry for a record that was just archived"""
+        entry, _ = cls.objects.update_or_create(
+            model_name=instance.__class__.__name__,
+            record_id=instance.pk,
+            defaults={**cls._entry_fields(instance), 'archived_by': user, 'reason': reason}
+        )
+        return entry
+
+    @classmethod
+    def record_archiver(cls, instance, user, reason=''):
+        """Note who archived a record, once saving it has indexed it (see sync_record)"""
+        cls.objects.filter(model_name=instance.__class__.__name__, record_id=instance.pk).update(
+            archived_by=user,
+            reason=reason
+        )
+
+    @classmethod
+    def unindex_record(cls, instance):
+        """Remove the archive entry for a record that was restored"""
+        cls.objects.filter(model_name=instance.__class__.__name__, record_id=instance.pk).delete()
+
+    @classmethod
+    def sync_record(cls, instance):
+        """
+        Match the entry of a saved record to its is_archived flag: refresh the
+        snapshot of an archived record (keeping who archived it and why), or
+        remove the entry of one that is no longer archived.
+        """
+        if not instance.is_archived:
+            cls.unindex_record(instance)
+            return None
+        entry, _ = cls.objects.update_or_create(
+            model_name=instance.__class__.__name__,
+            record_id=instance.pk,
+            defaults=cls._entry_fields(instance)
+        )
+        return entry
+
+    @classmethod
+    def search(cls, query, model_names=None, limit=10):
+        """
+        Ranked archive search in a single query.
+
+        Matches are ranked exact title > title prefix > title substring >
+        other fields, newest first within a rank, and capped at `limit`
+        results per model.
+        """
+        from django.db.models import Case, F, IntegerField, Value, When, Window
+        from django.db.models.functions import RowNumber
+        from sales_inventory_system.sales_inventory.search import search_filter
+
+        entries = search_filter(cls.objects.all(), query, ['search_text'])
+        if model_names:
+            entries = entries.filter(model_name__in=model_names)
+
+        entries = entries.annotate(
+            rank=Case(
+                When(title__iexact=query, then=Value(0)),
+                When(title__istartswith=query, then=Value(1)),
+                When(title__icontains=query, then=Value(2)),
+                default=Value(3),
+                output_field=IntegerField(),
+            )
+        ).annotate(
+            position=Window(
+                RowNumber(),
+                partition_by=[F('model_name')],
+                order_by=[F('rank').asc(), F('created_at').desc(), F('id').desc()],
+            )
+        ).filter(position__lte=limit).order_by('model_name', 'position')
+
+        return entries.only('model_name', 'record_id', 'title', 'data', 'created_at')
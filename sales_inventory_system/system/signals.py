@@ -0,0 +1,61 @@
+"""
+Signals for audit trail and archive index bookkeeping
+"""
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+from .models import Archive, AuditTrail, AUDIT_FILTER_CHOICES_CACHE_KEY
+
+# Models whose is_archived flag is mirrored in the Archive index
+ARCHIVABLE_MODELS = ('products.Product', settings.AUTH_USER_MODEL, 'orders.Order')
+
+
+@receiver(post_save, sender=AuditTrail)
+def refresh_audit_filter_choices(sender, instance, created, **kwargs):
+    """
+    Invalidate the cached audit filter dropdowns when a log introduces a
+    model name or action that is not listed yet.
+    """
+    if not created:
+        return
+
+    choices = cache.get(AUDIT_FILTER_CHOICES_CACHE_KEY)
+    if choices is None:
+        return
+
+    if instance.model_name not in choices['models'] or instance.action not in choices['actions']:
+        AuditTrail.clear_filter_choices()
+
+
+def remember_archived(sender, instance, **kwargs):
+    """Note is_archived as loaded, so saves of unarchived records skip the index"""
+    # Deferred fields stay unknown (None) instead of being fetched
+    instance._archive_indexed = instance.__dict__.get('is_archived')
+
+
+def sync_archive_index(sender, instance, created, raw=False, **kwargs):
+    """
+    Keep the archive index in step with is_archived on every save - views,
+    the admin, shell scripts - inside the saving transaction.
+    """
+    is_archived = instance.__dict__.get('is_archived')
+    if raw or is_archived is None:
+        return
+
+    was_archived = getattr(instance, '_archive_indexed', None)
+    if is_archived or (not created and was_archived is not False):
+        Archive.sync_record(instance)
+    instance._archive_indexed = is_archived
+
+
+def unindex_deleted(sender, instance, **kwargs):
+    """Drop the archive entry of a deleted record"""
+    Archive.unindex_record(instance)
+
+
+for model in ARCHIVABLE_MODELS:
+    post_init.connect(remember_archived, sender=model, dispatch_uid=f'archive_remember_{model}')
+    post_save.connect(sync_archive_index, sender=model, dispatch_uid=f'archive_sync_{model}')
+    post_delete.connect(unindex_deleted, sender=model, dispatch_uid=f'archive_unindex_{model}')
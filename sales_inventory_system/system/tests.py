@@ -1,3 +1,819 @@
-from django.test import TestCase
+import importlib
+import io
+import json
+import sqlite3
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from unittest import mock, skipUnless
+from asgiref.sync import sync_to_async
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.http import HttpResponse
+from django.test import LiveServerTestCase, RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
 
-# Create your tests here.
+from sales_inventory_system.accounts.models import User
+from sales_inventory_system.orders.models import Order
+from sales_inventory_system.products.models import Ingredient, Product, RecipeIngredient, RecipeItem
+from sales_inventory_system.sales_inventory import caching, db_pool, serialization
+from sales_inventory_system.sales_inventory.cache_backends import CULL_CHECK_INTERVAL, SQLiteCache
+from sales_inventory_system.sales_inventory import instrumentation, loadtest
+from sales_inventory_system.sales_inventory.middleware import HeavyRequestLimiter
+from sales_inventory_system.sales_inventory.pagination import (
+    InvalidCursor, KeysetPaginator, decode_cursor, encode_cursor,
+)
+from sales_inventory_system.sales_inventory.search import fts_table_name, search_filter
+from sales_inventory_system.sales_inventory.testing import TEST_CACHES, QueryBudgetTestCase
+from sales_inventory_system.sales_inventory.timing import ServerTiming
+from sales_inventory_system.sales_inventory.write_queue import serialized_writes
+from sales_inventory_system.system.management.commands.benchmark_serialization import (
+    format_instance_audit_logs, format_instance_orders, instance_audit_logs, instance_orders,
+)
+from sales_inventory_system.system.management.commands.rollover_audit_trail import month_start
+from sales_inventory_system.system.models import Archive, AuditTrail, AuditTrailArchive
+
+
+class SystemQueryBudgetTests(QueryBudgetTestCase):
+    """Audit trail and archive pages"""
+
+    def setUp(self):
+        super().setUp()
+        self.login(self.admin)
+
+    def test_audit_trail(self):
+        self.assertQueryBudget(6, lambda: self.client.get(reverse('system:audit')))
+
+    def test_audit_trail_filtered(self):
+        self.assertQueryBudget(6, lambda: self.client.get(
+            reverse('system:audit'), {'action': 'CREATE', 'model': 'Product', 'user': 'adm', 'date_range': '7days'}
+        ))
+
+    def test_audit_trail_ajax(self):
+        self.assertQueryBudget(6, lambda: self.client.get(
+            reverse('system:audit'), HTTP_X_REQUESTED_WITH='XMLHttpRequest'
+        ))
+
+    def test_audit_trail_ajax_cursor(self):
+        self.assertQueryBudget(6, lambda: self.client.get(
+            reverse('system:audit'), {'cursor': ''}, HTTP_X_REQUESTED_WITH='XMLHttpRequest'
+        ))
+
+    def test_archive_list(self):
+        self.assertQueryBudget(3, lambda: self.client.get(reverse('system:archive')))
+
+    def test_archive_list_filtered(self):
+        self.assertQueryBudget(3, lambda: self.client.get(reverse('system:archive'), {'model': 'Order'}))
+
+
+class HeavyRequestLimitTests(QueryBudgetTestCase):
+    """Reports and downloads are limited to HEAVY_REQUEST_SLOTS at a time"""
+
+    def setUp(self):
+        super().setUp()
+        self.grow(2)
+        self.login(self.admin)
+
+    def test_heavy_request_runs_and_releases_slot(self):
+        for _ in range(2):
+            self.assertEqual(self.client.get(reverse('products:bom_waste')).status_code, 200)
+        self.assertEqual(HeavyRequestLimiter(1, 150).in_use(), 0)
+
+    def test_heavy_request_rejected_when_slots_busy(self):
+        limiter = HeavyRequestLimiter(1, 150)
+        lease = limiter.acquire()
+        response = self.client.get(reverse('products:bom_usage_report'), {'download': 'csv'})
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '10')
+
+        limiter.release(lease)
+        response = self.client.get(reverse('products:bom_usage_report'), {'download': 'csv'})
+        self.assertEqual(response.status_code, 200)
+
+    def test_ajax_rejection_is_json(self):
+        HeavyRequestLimiter(1, 150).acquire()
+        response = self.client.get(reverse('products:bom_dashboard'), HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+        self.assertEqual(response.status_code, 503)
+        self.assertFalse(response.json()['success'])
+
+    def test_interactive_requests_unaffected(self):
+        HeavyRequestLimiter(1, 150).acquire()
+        self.assertEqual(self.client.get(reverse('kiosk:home')).status_code, 200)
+        self.assertEqual(self.client.get(reverse('orders:list')).status_code, 200)
+
+
+@override_settings(CACHES=TEST_CACHES)
+class DbPoolStatsTests(SimpleTestCase):
+    """Workers publish pool statistics to the shared cache for db_pool_stats"""
+
+    def setUp(self):
+        cache.clear()
+
+    def test_collect_published_stats(self):
+        stats = {'default': {'pool_size': 3, 'requests_num': 4, 'requests_wait_ms': 10, 'connections_num': 2,
+                             'connections_ms': 30, 'usage_ms': 80}}
+        db_pool.publish_pool_stats(stats, worker_id='web:1')
+        db_pool.publish_pool_stats(stats, worker_id='web:2')
+        db_pool.publish_pool_stats(stats, worker_id='web:1')
+
+        workers = db_pool.collect_pool_stats()
+        self.assertEqual(sorted(workers), ['web:1', 'web:2'])
+
+        row = db_pool.summarize(workers['web:1']['default'])
+        self.assertEqual(row['checkouts'], 4)
+        self.assertEqual(row['avg_wait_ms'], 2.5)
+        self.assertEqual(row['avg_connect_ms'], 15)
+        self.assertEqual(row['avg_usage_ms'], 20)
+
+    def test_no_pool_on_sqlite(self):
+        self.assertEqual(db_pool.pooled_connections(), [])
+        self.assertEqual(db_pool.pool_stats(), {})
+
+
+class WriteQueueTests(SimpleTestCase):
+    """Checkout writes on SQLite take turns before opening their transaction"""
+
+    @override_settings(SQLITE_WRITE_QUEUE=True)
+    def test_nested_writes_share_one_turn(self):
+        timing = ServerTiming()
+        with serialized_writes(timing=timing):
+            with serialized_writes(timing=timing):
+                pass
+        self.assertEqual(timing.header_value(total=False).count('writeq'), 1)
+
+        # The turn was released: a following writer gets one straight away
+        with serialized_writes(timing=timing):
+            pass
+        self.assertEqual(timing.header_value(total=False).count('writeq'), 2)
+
+    @override_settings(SQLITE_WRITE_QUEUE=False)
+    def test_disabled(self):
+        timing = ServerTiming()
+        with serialized_writes(timing=timing):
+            pass
+        self.assertNotIn('writeq', timing.header_value(total=False))
+
+
+class TestCacheIsolationTests(SimpleTestCase):
+    """Test runs never touch the developer's shared caches (testing.TestRunner)"""
+
+    def test_caches_are_in_memory(self):
+        for alias, config in settings.CACHES.items():
+            self.assertEqual(config['BACKEND'], 'django.core.cache.backends.locmem.LocMemCache', alias)
+
+
+
+class GetOrComputeTests(SimpleTestCase):
+    """get_or_compute refreshes early in one caller and serves the old value to the rest"""
+
+    def setUp(self):
+        cache.clear()
+        caching.reset_cache_stats(['xfetch'])
+        self.calls = []
+
+    def cached(self, compute):
+        return caching.get_or_compute('xfetch', 'key', compute, ttl=60)
+
+    def test_early_refresh_in_one_caller(self):
+        # Ten seconds from expiry, after a one-second computation
+        cache.set(caching.family_key('xfetch', 'key'), ('old', time.time() + 10, 1.0), 120)
+
+        def compute():
+            # A second request arriving while the first recomputes
+            self.calls.append(self.cached(lambda: self.calls.append('second computed')))
+            return 'new'
+
+        with mock.patch.object(caching.random, 'random', return_value=0.0):
+            self.assertEqual(self.cached(compute), 'old')  # not early with U = 0
+        with mock.patch.object(caching.random, 'random', return_value=1 - 1e-6):
+            self.assertEqual(self.cached(compute), 'new')  # -log(1e-6) * 1s pulls expiry 13.8s earlier
+
+        self.assertEqual(self.calls, ['old'])
+        self.assertEqual(self.cached(compute), 'new')
+        stats = caching.cache_stats(['xfetch'])['xfetch']
+        self.assertEqual((stats['refresh'], stats['stale'], stats['hit']), (1, 1, 2))
+
+    def test_miss_computes_and_caches(self):
+        self.assertEqual(self.cached(lambda: 'value'), 'value')
+        self.assertEqual(self.cached(lambda: 'other'), 'value')
+        self.assertFalse(cache.get(f"{caching.family_key('xfetch', 'key')}:lock"))
+
+    def test_lock_released_when_compute_fails(self):
+        with self.assertRaises(ZeroDivisionError):
+            self.cached(lambda: 1 / 0)
+        self.assertEqual(self.cached(lambda: 'value'), 'value')
+
+class SQLiteCacheCullTests(SimpleTestCase):
+    """Culling bounds the default cache but never evicts live carts"""
+
+    def make_cache(self, max_entries):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        return SQLiteCache(f'{directory.name}/cache.sqlite3', {'OPTIONS': {'MAX_ENTRIES': max_entries}})
+
+    def test_max_entries_evicts(self):
+        store = self.make_cache(10)
+        for n in range(CULL_CHECK_INTERVAL):
+            store.set(f'key{n}', n, 60)
+        self.assertLessEqual(len(store.get_many([f'key{n}' for n in range(CULL_CHECK_INTERVAL)])), 10)
+
+    def test_no_max_entries_keeps_live_entries(self):
+        store = self.make_cache(0)
+        store.set('expired', 1, -1)
+        keys = [f'cart{n}' for n in range(CULL_CHECK_INTERVAL - 1)]
+        for n, key in enumerate(keys):
+            store.set(key, n, 60)
+        self.assertEqual(len(store.get_many(keys)), len(keys))
+        count = store._connection().execute('SELECT COUNT(*) FROM cache_entries').fetchone()[0]
+        self.assertEqual(count, len(keys))  # the expired entry was purged
+
+
+class QueryPlanTests(TestCase):
+    """The hot queries stay on their indexes (SQLite plans do not depend on table size)"""
+
+    def test_hot_queries_use_indexes(self):
+        out = io.StringIO()
+        call_command('verify_query_plans', min_rows=0, stdout=out)
+        self.assertIn('All hot queries use an index', out.getvalue())
+
+
+class ConditionalJsonTests(QueryBudgetTestCase):
+    """Polled JSON endpoints answer 304 until their data changes"""
+
+    def setUp(self):
+        super().setUp()
+        self.grow(2)
+
+    def poll(self, url, etag=None, **kwargs):
+        headers = {'HTTP_IF_NONE_MATCH': etag} if etag else {}
+        return self.client.get(url, **kwargs, **headers)
+
+    def test_order_list(self):
+        self.login(self.admin)
+        url = reverse('orders:list')
+        self.assertNotIn('ETag', self.poll(url))  # the HTML page is not conditional
+
+        response = self.poll(url, HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+        etag = response['ETag']
+        self.assertIn('no-cache', response['Cache-Control'])
+        with self.assertNumQueries(2):  # session and user only
+            response = self.poll(url, etag, HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+        self.assertEqual(response.status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Order.objects.create(customer_name='New', total_amount=100)
+        response = self.poll(url, etag, HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['orders'][0]['customer_name'], 'New')
+
+    def test_kiosk_cart(self):
+        url = reverse('kiosk:get_cart')
+        sync = lambda ops: self.client.post(
+            reverse('kiosk:cart_sync'), json.dumps({'ops': ops}), content_type='application/json'
+        )
+        sync([{'op': 'add', 'product_id': self.products[0].pk, 'quantity': 1}])
+        etag = self.poll(url)['ETag']
+        with self.assertNumQueries(0):
+            self.assertEqual(self.poll(url, etag).status_code, 304)
+
+        sync([{'op': 'add', 'product_id': self.products[1].pk, 'quantity': 1}])
+        response = self.poll(url, etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()), 2)
+
+    def toggle_ingredient(self):
+        ingredient = Ingredient.objects.first()
+        ingredient.is_available = False
+        with self.captureOnCommitCallbacks(execute=True):
+            ingredient.save()
+
+    async def test_cashier_ingredients(self):
+        await self.async_client.aforce_login(self.cashier)
+        url = reverse('products:api_cashier_ingredients')
+        etag = (await self.async_client.get(url))['ETag']
+        response = await self.async_client.get(url, headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 304)
+
+        await sync_to_async(self.toggle_ingredient)()
+        response = await self.async_client.get(url, headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+
+
+class SerializationTests(QueryBudgetTestCase):
+    """values() rows and dumps() produce the payloads the instance path did"""
+
+    def test_format_rows(self):
+        created = datetime(2025, 3, 4, 17, 5, tzinfo=dt_timezone.utc)
+        rows = [
+            {'total': 12.5, 'status': 'FINISHED', 'created_at': created, 'table_number': None},
+            {'total': 3.0, 'status': 'UNKNOWN', 'created_at': None, 'table_number': '7'},
+        ]
+        serialization.format_rows(
+            rows,
+            rename={'total': 'total_amount'},
+            datetimes={'created_at': '%b %d, %Y %I:%M %p'},
+            choices={'status': Order.STATUS_CHOICES},
+            defaults={'table_number': '-'},
+        )
+        self.assertEqual(rows, [
+            {'total_amount': 12.5, 'status': 'Finished', 'created_at': 'Mar 04, 2025 05:05 PM', 'table_number': '-'},
+            {'total_amount': 3.0, 'status': 'UNKNOWN', 'created_at': None, 'table_number': '7'},
+        ])
+
+    def test_dumps_matches_without_orjson(self):
+        data = {'price': Decimal('1.50'), 'at': datetime(2025, 3, 4, 17, 5, 6, 789000, tzinfo=dt_timezone.utc),
+                'rows': [{'id': 1, 'name': 'Café'}], 'none': None}
+        encoded = serialization.dumps(data)
+        with mock.patch.object(serialization, 'orjson', None):
+            fallback = serialization.dumps(data)
+        self.assertEqual(json.loads(encoded), json.loads(fallback))
+        self.assertEqual(json.loads(fallback)['at'], '2025-03-04T17:05:06.789Z')
+
+    def test_order_list_payload(self):
+        self.grow(3)
+        self.login(self.admin)
+        response = self.client.get(reverse('orders:list'), HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertEqual(response.json()['orders'], format_instance_orders(instance_orders(20)))
+
+    def test_audit_trail_payload(self):
+        self.grow(3)
+        AuditTrail.objects.create(user=None, action='DELETE', model_name='Order', record_id=1, description='Gone')
+        self.login(self.admin)
+        response = self.client.get(reverse('system:audit'), HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+        self.assertEqual(response.json()['audit_logs'], format_instance_audit_logs(instance_audit_logs(50)))
+
+    def test_product_list_payload(self):
+        self.grow(3)
+        self.login(self.admin)
+        response = self.client.get(reverse('products:list'), HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+        products = response.json()['products']
+        self.assertEqual(len(products), 3)
+        self.assertEqual(products[0]['price'], 100.0)
+        self.assertEqual(set(products[0]), {
+            'id', 'name', 'description', 'price', 'stock', 'calculated_stock', 'threshold',
+            'category', 'is_low_stock', 'image_url',
+        })
+
+
+
+
+@skipUnless(connection.vendor == 'sqlite' and sqlite3.sqlite_version_info >= (3, 34, 0), 'needs SQLite FTS5 trigram')
+class SearchFilterTests(TestCase):
+    """search_filter() on SQLite: the FTS5 trigram index keeps icontains semantics"""
+
+    fields = ['name', 'description', 'category']
+
+    def setUp(self):
+        self.pizza = Product.objects.create(name='Pepperoni Pizza', price=Decimal('250'), category='Pizza')
+        self.pasta = Product.objects.create(name='Carbonara', price=Decimal('180'), category='Pasta',
+                                            description='Creamy egg sauce')
+
+    def search(self, query):
+        queryset = search_filter(Product.objects.all(), query, self.fields)
+        return queryset, set(queryset.values_list('pk', flat=True))
+
+    def test_matches_inside_words(self):
+        queryset, found = self.search('eroni')
+        self.assertIn(fts_table_name('products_product'), str(queryset.query))
+        self.assertEqual(found, {self.pizza.pk})
+        self.assertEqual(self.search('reamy')[1], {self.pasta.pk})
+
+    def test_case_insensitive(self):
+        self.assertEqual(self.search('PEPPERONI')[1], {self.pizza.pk})
+        self.assertEqual(self.search('cArBoN')[1], {self.pasta.pk})
+
+    def test_follows_updates_and_deletes(self):
+        self.pizza.name = 'Hawaiian Pizza'
+        self.pizza.save()
+        self.assertEqual(self.search('Pepperoni')[1], set())
+        self.assertEqual(self.search('waiian')[1], {self.pizza.pk})
+
+        pasta_pk = self.pasta.pk
+        self.pasta.delete()
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT rowid FROM products_product_fts WHERE products_product_fts MATCH %s', ['"Carbonara"']
+            )
+            self.assertNotIn((pasta_pk,), cursor.fetchall())
+        self.assertEqual(self.search('Carbonara')[1], set())
+
+    def test_short_queries_use_icontains(self):
+        queryset, found = self.search('eP')
+        self.assertNotIn(fts_table_name('products_product'), str(queryset.query))
+        self.assertEqual(found, {self.pizza.pk})
+        self.assertEqual(self.search('gg')[1], {self.pasta.pk})
+        self.assertEqual(self.search('  ')[1], {self.pizza.pk, self.pasta.pk})
+
+class ArchiveIndexSyncTests(TestCase):
+    """The archive index follows is_archived on any save, not just the archive views"""
+
+    def setUp(self):
+        self.admin = User.objects.create_user(username='admin', role='ADMIN')
+        self.product = Product.objects.create(name='Calzone', price=Decimal('150'), category='Pizza')
+
+    def entries(self):
+        return Archive.objects.filter(model_name='Product', record_id=self.product.pk)
+
+    def test_save_archives_and_restores(self):
+        self.product.is_archived = True
+        self.product.save()
+        Archive.record_archiver(self.product, self.admin, reason='seasonal')
+        self.assertEqual(self.entries().get().title, 'Calzone')
+
+        product = Product.objects.get(pk=self.product.pk)
+        product.name = 'Calzone Deluxe'
+        product.save()
+        entry = self.entries().get()
+        self.assertEqual(entry.title, 'Calzone Deluxe')
+        self.assertEqual((entry.archived_by, entry.reason), (self.admin, 'seasonal'))
+
+        product.is_archived = False
+        product.save(update_fields=['is_archived'])
+        self.assertFalse(self.entries().exists())
+
+    def test_delete_unindexes(self):
+        self.product.is_archived = True
+        self.product.save()
+        self.product.delete()
+        self.assertFalse(Archive.objects.exists())
+
+    def test_unarchived_saves_skip_the_index(self):
+        product = Product.objects.get(pk=self.product.pk)
+        product.name = 'Calzone Deluxe'
+        with CaptureQueriesContext(connection) as queries:
+            product.save()
+        self.assertFalse([query for query in queries.captured_queries if 'system_archive' in query['sql']])
+
+    def test_restore_after_bulk_archive(self):
+        # update() sends no signals; an unknown or stale flag still clears the entry
+        Product.objects.filter(pk=self.product.pk).update(is_archived=True)
+        Archive.index_record(Product.objects.get(pk=self.product.pk))
+        product = Product.objects.only('id', 'name').get(pk=self.product.pk)
+        product.is_archived = False
+        product.save()
+        self.assertFalse(self.entries().exists())
+
+class ArchiveBackfillTests(TestCase):
+    """Migration 0004 indexes records archived before the archive index existed"""
+
+    def test_backfill(self):
+        admin = User.objects.create_user(username='admin', role='ADMIN')
+        product = Product.objects.create(name='Old pizza', price=Decimal('100'), category='Pizza', is_archived=True)
+        log = AuditTrail.objects.create(user=admin, action='ARCHIVE', model_name='Product', record_id=product.pk,
+                                        description='Archived Old pizza')
+        AuditTrail.objects.filter(pk=log.pk).update(created_at=datetime(2025, 1, 2, tzinfo=dt_timezone.utc))
+        order = Order.objects.create(customer_name='Gone', is_archived=True)
+        # As if archived before the index existed
+        Archive.objects.all().delete()
+        indexed = Product.objects.create(name='Indexed', price=Decimal('50'), is_archived=True)
+        Archive.index_record(indexed, reason='kept')
+
+        migration = importlib.import_module('sales_inventory_system.system.migrations.0004_backfill_archive_index')
+        migration.backfill_archive_index(apps, None)
+
+        entry = Archive.objects.get(model_name='Product', record_id=product.pk)
+        self.assertEqual(entry.archived_by, admin)
+        self.assertEqual(entry.created_at, datetime(2025, 1, 2, tzinfo=dt_timezone.utc))
+        self.assertIn('Old pizza', entry.search_text)
+        self.assertEqual(Archive.objects.get(model_name='Order', record_id=order.pk).archived_by, None)
+        self.assertEqual(Archive.objects.get(model_name='Product', record_id=indexed.pk).reason, 'kept')
+        self.assertEqual(Archive.objects.count(), 3)
+
+
+class RolloverAuditTrailTests(TestCase):
+    """rollover_audit_trail moves logs past the retention window into monthly archives"""
+
+    def setUp(self):
+        # --keep-months 1 on 2026-07-15 keeps June and July live
+        self.cutoff = month_start(2026, 6)
+        patcher = mock.patch('django.utils.timezone.now', return_value=month_start(2026, 7) + timedelta(days=14))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def log_at(self, created_at, description='Updated'):
+        log = AuditTrail.objects.create(action='UPDATE', model_name='Product', record_id=1, description=description)
+        AuditTrail.objects.filter(pk=log.pk).update(created_at=created_at)
+        log.refresh_from_db()
+        return log
+
+    def rollover(self, **options):
+        call_command('rollover_audit_trail', keep_months=1, stdout=io.StringIO(), **options)
+
+    def test_cutoff_boundary(self):
+        last_archived = self.log_at(self.cutoff - timedelta(microseconds=1))
+        first_kept = self.log_at(self.cutoff)
+        self.rollover()
+
+        archive = AuditTrailArchive.objects.get()
+        self.assertEqual(archive.period, '2026-05')
+        self.assertEqual([row['id'] for row in archive.rows()], [last_archived.pk])
+        self.assertEqual(list(AuditTrail.objects.values_list('pk', flat=True)), [first_kept.pk])
+
+    def test_batches_round_trip(self):
+        logs = [self.log_at(month_start(2026, 3) + timedelta(days=day), f'Log {day}') for day in (4, 0, 2, 3, 1)]
+        self.rollover(batch_size=2)
+
+        archive = AuditTrailArchive.objects.get(period='2026-03')
+        expected = sorted((log.to_archive_dict() for log in logs), key=lambda row: (row['created_at'], row['id']))
+        self.assertEqual(archive.rows(), expected)
+        self.assertEqual(archive.row_count, 5)
+        self.assertEqual(archive.first_created_at, month_start(2026, 3))
+        self.assertEqual(archive.last_created_at, month_start(2026, 3) + timedelta(days=4))
+        self.assertFalse(AuditTrail.objects.exists())
+
+    def test_append_rows_keeps_existing_payload(self):
+        archive = AuditTrailArchive(period='2026-01', data=b'')
+        late = {'id': 2, 'description': 'late', 'created_at': '2026-01-20T10:00:00+08:00'}
+        early = {'id': 1, 'description': 'early', 'created_at': '2026-01-05T10:00:00+08:00'}
+        archive.append_rows([late])
+        archive.append_rows([early])
+        archive.append_rows([])
+
+        self.assertEqual(archive.rows(), [early, late])
+        self.assertEqual(archive.row_count, 2)
+        self.assertEqual(archive.first_created_at.isoformat(), early['created_at'])
+        self.assertEqual(archive.last_created_at.isoformat(), late['created_at'])
+
+    def test_rerun_same_month(self):
+        first = self.log_at(month_start(2026, 4) + timedelta(days=10))
+        self.rollover()
+        straggler = self.log_at(month_start(2026, 4) + timedelta(days=2))
+        self.rollover()
+        self.rollover()
+
+        archive = AuditTrailArchive.objects.get()
+        self.assertEqual(archive.period, '2026-04')
+        self.assertEqual([row['id'] for row in archive.rows()], [straggler.pk, first.pk])
+        self.assertEqual(archive.row_count, 2)
+        self.assertEqual(archive.first_created_at, straggler.created_at)
+        self.assertEqual(archive.last_created_at, first.created_at)
+
+
+class KeysetPaginatorTests(TestCase):
+    """KeysetPaginator walks (-created_at, -id) pages both ways, through ties and bad cursors"""
+
+    def setUp(self):
+        # Three timestamps shared by seven logs, so most page edges fall inside a tie
+        times = [datetime(2026, 1, day, tzinfo=dt_timezone.utc) for day in (1, 2, 2, 2, 2, 3, 3)]
+        for when in times:
+            log = AuditTrail.objects.create(action='UPDATE', model_name='Product', record_id=1, description='x')
+            AuditTrail.objects.filter(pk=log.pk).update(created_at=when)
+        self.expected = list(AuditTrail.objects.order_by('-created_at', '-id').values_list('pk', flat=True))
+        self.paginator = KeysetPaginator(AuditTrail.objects.all(), 3, ordering=('-created_at', '-id'))
+
+    def ids(self, page):
+        return [log.pk for log in page]
+
+    def test_next_and_previous_pages(self):
+        pages = [self.paginator.get_page()]
+        while pages[-1].has_next():
+            pages.append(self.paginator.get_page(pages[-1].next_cursor))
+
+        self.assertEqual([self.ids(page) for page in pages], [self.expected[:3], self.expected[3:6], self.expected[6:]])
+        self.assertFalse(pages[0].has_previous())
+        self.assertIsNone(pages[0].previous_cursor)
+        self.assertIsNone(pages[-1].next_cursor)
+
+        previous = self.paginator.get_page(pages[-1].previous_cursor, 'previous')
+        self.assertEqual(self.ids(previous), self.expected[3:6])
+        self.assertTrue(previous.has_next())
+        first = self.paginator.get_page(previous.previous_cursor, 'previous')
+        self.assertEqual(self.ids(first), self.expected[:3])
+        self.assertFalse(first.has_previous())
+        self.assertEqual(self.ids(self.paginator.get_page(first.next_cursor)), self.expected[3:6])
+
+    def test_values_rows(self):
+        paginator = KeysetPaginator(AuditTrail.objects.values('id', 'created_at'), 3, ordering=('-created_at', '-id'))
+        page = paginator.get_page(paginator.get_page().next_cursor)
+        self.assertEqual([row['id'] for row in page], self.expected[3:6])
+
+    def test_invalid_cursor_returns_first_page(self):
+        cursors = [
+            'not a cursor!',
+            encode_cursor([]),
+            encode_cursor(['2026-01-02T00:00:00+00:00']),
+            encode_cursor(['not a date', 1]),
+            encode_cursor(['2026-01-02T00:00:00+00:00', 'not an id']),
+            self.paginator.get_page().next_cursor[:-2],
+        ]
+        for cursor in cursors:
+            for direction in ('next', 'previous'):
+                with self.subTest(cursor=cursor, direction=direction):
+                    page = self.paginator.get_page(cursor, direction)
+                    self.assertEqual(self.ids(page), self.expected[:3])
+                    self.assertFalse(page.has_previous())
+
+    def test_decode_cursor(self):
+        values = ['2026-01-02T00:00:00+00:00', 5]
+        self.assertEqual(decode_cursor(encode_cursor(values)), values)
+        # not base64 JSON, not UTF-8, and a JSON object rather than a list
+        for cursor in ('%%%', '__4', 'eyJhIjoxfQ'):
+            with self.subTest(cursor=cursor), self.assertRaises(InvalidCursor):
+                decode_cursor(cursor)
+
+
+
+@override_settings(CACHES=TEST_CACHES, PERF_SAMPLE_RATE=1, PERF_RING_SLOTS=2, PERF_SLOW_REQUEST_MS=60000)
+class InstrumentationTests(TestCase):
+    """InstrumentationMiddleware measures requests and samples them into the shared ring"""
+
+    def setUp(self):
+        cache.clear()
+        instrumentation.buffer.flush()
+        instrumentation.clear_samples()
+
+    def request(self, queries=3, status=200):
+        def view(request):
+            for _ in range(queries):
+                User.objects.count()
+            return HttpResponse('x' * 100, status=status)
+
+        request = RequestFactory().get('/orders/')
+        request.resolver_match = mock.Mock(view_name='orders:list')
+        return instrumentation.InstrumentationMiddleware(view)(request)
+
+    def test_counts_queries_and_time(self):
+        response = self.request(queries=3)
+        self.assertRegex(response['Server-Timing'], r'^db;dur=\d+\.\d;desc="3 queries", app;dur=\d+\.\d$')
+
+        sample = instrumentation.load_samples()[0]
+        self.assertEqual(
+            (sample['url_name'], sample['method'], sample['status'], sample['queries'], sample['size']),
+            ('orders:list', 'GET', 200, 3, 100)
+        )
+        self.assertGreater(sample['db_ms'], 0)
+        self.assertGreaterEqual(sample['total_ms'], sample['db_ms'])
+
+    def test_queries_outside_requests_not_counted(self):
+        self.request(queries=1)
+        User.objects.count()
+        self.assertEqual([sample['queries'] for sample in instrumentation.load_samples()], [1])
+
+    @override_settings(PERF_SAMPLE_RATE=0)
+    def test_unsampled_requests_only_get_the_header(self):
+        response = self.request()
+        self.assertIn('Server-Timing', response)
+        self.assertEqual(instrumentation.load_samples(), [])
+
+    def test_ring_reuses_oldest_slot(self):
+        buffer = instrumentation.SampleBuffer()
+        for batch in range(3):
+            buffer.add((time.time(), f'batch{batch}', 'GET', 200, 1.0, 0.5, 1, 10))
+            buffer.flush()
+
+        # Two slots: the third batch overwrote the first
+        samples = instrumentation.load_samples()
+        self.assertEqual(sorted(sample['url_name'] for sample in samples), ['batch1', 'batch2'])
+
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual(instrumentation.percentile(values, 0.50), 50)
+        self.assertEqual(instrumentation.percentile(values, 0.95), 95)
+        self.assertEqual(instrumentation.percentile([7], 0.99), 7)
+        self.assertIsNone(instrumentation.percentile([], 0.5))
+
+
+@override_settings(CACHES=TEST_CACHES, PERF_RING_SLOTS=2)
+class PerfReportTests(SimpleTestCase):
+    """perf_report summarizes the samples in the shared ring"""
+
+    def setUp(self):
+        cache.clear()
+        instrumentation.buffer.flush()
+        now = time.time()
+        kiosk = [(now, 'kiosk:home', 'GET', 200, float(ms), 1.0, 4, 2048) for ms in range(1, 21)]
+        board = [
+            (now, 'orders:board', 'GET', 200, 5.0, 2.0, 2, None),
+            (now, 'orders:board', 'GET', 500, 7.0, 4.0, 6, None),
+            (now - 3600, 'orders:board', 'GET', 200, 9.0, 3.0, 4, None),
+        ]
+        cache.set(instrumentation.RING_SLOT_KEY.format(0), kiosk, 60)
+        cache.set(instrumentation.RING_SLOT_KEY.format(1), board, 60)
+
+    def report(self, *args):
+        out = io.StringIO()
+        call_command('perf_report', '--json', *args, stdout=out)
+        return {row['url_name']: row for row in json.loads(out.getvalue())}
+
+    def test_summary(self):
+        rows = self.report()
+        kiosk, board = rows['kiosk:home'], rows['orders:board']
+        self.assertEqual(list(rows), ['kiosk:home', 'orders:board'])  # sorted by p95, slowest first
+        self.assertEqual((kiosk['count'], kiosk['p50'], kiosk['p95'], kiosk['p99']), (20, 10.0, 19.0, 20.0))
+        self.assertEqual((kiosk['queries'], kiosk['size']), (4, 2048))
+        self.assertEqual((board['count'], board['errors'], board['max_queries']), (3, 1, 6))
+        self.assertEqual((board['queries'], board['db'], board['size']), (4, 3.0, None))
+
+    def test_filters(self):
+        self.assertEqual(list(self.report('--url-name', 'orders:board')), ['orders:board'])
+        self.assertEqual(self.report('--since', '30')['orders:board']['count'], 2)
+        self.assertEqual(list(self.report('--sort', 'db', '--limit', '1')), ['orders:board'])
+
+    def test_table_and_clear(self):
+        out = io.StringIO()
+        call_command('perf_report', '--clear', stdout=out)
+        lines = out.getvalue().splitlines()
+        self.assertTrue(lines[0].startswith('url name'))
+        self.assertTrue(lines[1].startswith('kiosk:home'))
+        self.assertIn('23 sample(s) across 2 URL name(s)', out.getvalue())
+        self.assertEqual(instrumentation.load_samples(), [])
+
+
+
+class LoadTestStatsTests(SimpleTestCase):
+    """Stats.report() latency percentiles, rates and error rates"""
+
+    def test_report(self):
+        stats = loadtest.Stats()
+        for ms in range(1, 101):
+            stats.record('kiosk_browse', 'kiosk_home', loadtest.StepResult(200, float(ms)))
+        stats.record('kiosk_browse', 'cart_state', loadtest.StepResult(500, 5.0))
+        stats.record('kiosk_browse', 'cart_state', loadtest.StepResult(302, 5.0))
+        stats.record('pos_checkout', 'checkout', loadtest.StepResult(0, 1000.0))  # connection error
+        stats.iteration('kiosk_browse')
+        stats.started, stats.finished = 0.0, 10.0
+
+        report = stats.report()
+        home = report['steps']['kiosk_browse']['kiosk_home']
+        self.assertEqual(
+            (home['requests'], home['rps'], home['p50_ms'], home['p95_ms'], home['p99_ms'], home['max_ms']),
+            (100, 10.0, 50.0, 95.0, 99.0, 100.0)
+        )
+        self.assertEqual(report['steps']['kiosk_browse']['cart_state']['error_rate'], 0.5)
+        kiosk = report['scenarios']['kiosk_browse']
+        self.assertEqual((kiosk['requests'], kiosk['errors'], kiosk['iterations']), (102, 1, 1))
+        self.assertEqual(report['scenarios']['pos_checkout']['error_rate'], 1.0)
+        self.assertEqual((report['total']['requests'], report['total']['errors']), (103, 2))
+        self.assertEqual(report['duration_s'], 10.0)
+
+    def test_empty_report(self):
+        total = loadtest.Stats().report()['total']
+        self.assertEqual((total['requests'], total['p95_ms'], total['error_rate']), (0, 0, 0.0))
+
+    def test_assign_scenarios(self):
+        assignments = loadtest.assign_scenarios(20, loadtest.DEFAULT_MIX)
+        self.assertEqual(len(assignments), 20)
+        self.assertEqual(set(assignments), set(loadtest.DEFAULT_MIX))
+        self.assertEqual(max(loadtest.DEFAULT_MIX, key=assignments.count), 'kiosk_browse')
+        self.assertEqual(len(loadtest.assign_scenarios(3, loadtest.DEFAULT_MIX)), 3)
+
+
+class LoadTestScenarioTests(LiveServerTestCase):
+    """Scenarios run against a live server: CSRF cookies, login and checkouts"""
+
+    def setUp(self):
+        cache.clear()
+        self.cashier = User.objects.create_user(username='cashier', password='cashier-pass', role='CASHIER')
+        product = Product.objects.create(name='Pizza', price=Decimal('100'), stock=50, requires_bom=True)
+        ingredient = Ingredient.objects.create(name='Dough', current_stock=Decimal('1000'))
+        recipe = RecipeItem.objects.create(product=product, created_by=self.cashier)
+        RecipeIngredient.objects.create(recipe=recipe, ingredient=ingredient, quantity=Decimal('1'))
+
+    def run_once(self, scenario_class, credentials=None):
+        stats = loadtest.Stats()
+        scenario = scenario_class({})
+        user = loadtest.VirtualUser(self.live_server_url, stats, scenario, timeout=10)
+        if credentials:
+            self.assertTrue(user.login(*credentials))
+        scenario.run(user)
+        return stats.report()
+
+    def assertNoErrors(self, report):
+        failed = {
+            f'{scenario}:{step}': row['errors']
+            for scenario, steps in report['steps'].items() for step, row in steps.items() if row['errors']
+        }
+        self.assertEqual(failed, {})
+
+    def test_kiosk_checkout(self):
+        report = self.run_once(loadtest.KioskCheckout)
+        self.assertNoErrors(report)
+        self.assertEqual(Order.objects.get().customer_name, 'Load test')
+
+    def test_pos_checkout_logs_in(self):
+        report = self.run_once(loadtest.PosCheckout, credentials=('cashier', 'cashier-pass'))
+        self.assertNoErrors(report)
+        self.assertEqual(report['scenarios']['login']['requests'], 2)
+        self.assertEqual(Order.objects.get().processed_by, self.cashier)
+
+    def test_wrong_password_is_a_failed_login(self):
+        user = loadtest.VirtualUser(self.live_server_url, loadtest.Stats(), loadtest.PosCheckout({}))
+        self.assertFalse(user.login('cashier', 'wrong'))
+
+    def test_command(self):
+        out = io.StringIO()
+        with tempfile.TemporaryDirectory() as directory:
+            output = f'{directory}/report.json'
+            call_command('load_test', url=self.live_server_url, users=1, duration=1, ramp_up=0, think_time=0.2,
+                         scenario=['kiosk_browse'], output=output, stdout=out)
+            with open(output) as report_file:
+                report = json.load(report_file)
+        self.assertGreater(report['scenarios']['kiosk_browse']['iterations'], 0)
+        self.assertEqual(report['total']['errors'], 0)
+        self.assertIn('kiosk_browse', out.getvalue())
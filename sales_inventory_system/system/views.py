@@ -1,9 +1,12 @@
 from django.shortcuts import render
 from django.contrib.auth.decorators import login_required, user_passes_test
-from django.http import HttpResponse, JsonResponse
+from django.http import HttpResponse
 from django.core.paginator import Paginator
 from django.utils import timezone
 from datetime import timedelta, datetime
+from django.db.models import F
+from sales_inventory_system.sales_inventory.pagination import KeysetPaginator, keyset_pagination_data
+from sales_inventory_system.sales_inventory.serialization import ISO, format_rows, json_response
 from .models import AuditTrail, Archive
 
 
@@ -11,6 +14,24 @@ def is_admin(user):
     return user.is_authenticated and user.is_admin
 
 
+def audit_trail_values(audit_logs):
+    """The audit trail's JSON columns as values() rows"""
+    return audit_logs.values(
+        'id', 'created_at', 'action', 'model_name', 'record_id', 'description', 'ip_address',
+        username=F('user__username'),
+    )
+
+
+def audit_trail_rows(rows):
+    """Turn audit_trail_values() rows into the audit trail's JSON rows, in place"""
+    return format_rows(
+        rows,
+        rename={'created_at': 'timestamp', 'username': 'user'},
+        datetimes={'timestamp': ISO},
+        defaults={'user': 'System', 'ip_address': 'N/A'},
+    )
+
+
 @login_required
 @user_passes_test(is_admin)
 def audit_trail(request):
@@ -61,42 +82,34 @@ def audit_trail(request):
             except (ValueError, TypeError):
                 pass
 
-    # Pagination
-    paginator = Paginator(audit_logs, 50)  # 50 logs per page
-    page_number = request.GET.get('page', 1)
-    page_obj = paginator.get_page(page_number)
-
-    # Get unique models and actions for filters
-    models = AuditTrail.objects.values_list('model_name', flat=True).distinct().order_by('model_name')
-    actions = AuditTrail.objects.values_list('action', flat=True).distinct().order_by('action')
+    is_ajax = request.headers.get('X-Requested-With') == 'XMLHttpRequest'
+    # Plain rows for the JSON response (sales_inventory.serialization)
+    page_source = audit_trail_values(audit_logs) if is_ajax else audit_logs
+
+    # Pagination - AJAX clients can opt into keyset pagination with ?cursor=
+    use_cursor = is_ajax and 'cursor' in request.GET
+    if use_cursor:
+        paginator = KeysetPaginator(page_source, 50, ordering=('-created_at', '-id'))
+        page_obj = paginator.get_page(request.GET.get('cursor'), request.GET.get('direction', 'next'))
+    else:
+        paginator = Paginator(page_source.order_by('-created_at', '-id'), 50)  # 50 logs per page
+        page_number = request.GET.get('page', 1)
+        page_obj = paginator.get_page(page_number)
+
+    # Get unique models and actions for filters (cached, see AuditTrail.filter_choices)
+    filter_choices = AuditTrail.filter_choices()
+    models = filter_choices['models']
+    actions = filter_choices['actions']
 
     # Handle AJAX requests for async filtering
-    if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
+    if is_ajax:
         # Prepare audit logs data for JSON response
-        logs_data = []
-        for log in page_obj:
-            logs_data.append({
-                'id': log.id,
-                'timestamp': log.created_at.isoformat(),
-                'user': log.user.username if log.user else 'System',
-                'action': log.action,
-                'model_name': log.model_name,
-                'record_id': log.record_id,
-                'description': log.description,
-                'ip_address': log.ip_address or 'N/A'
-            })
-
-        return JsonResponse({
-            'success': True,
-            'filters': {
-                'action': action_filter,
-                'model': model_filter,
-                'user': user_filter,
-                'date_range': date_range,
-                'date_from': date_from_str,
-                'date_to': date_to_str
-            },
-            'pagination': {
+        logs_data = audit_trail_rows(list(page_obj))
+
+        if use_cursor:
+            pagination = keyset_pagination_data(page_obj, 50, request.GET.get('count', 'approx'), audit_logs)
+        else:
+            pagination = {
                 'page': page_obj.number,
                 'total_pages': paginator.num_pages,
                 'per_page': 50,
@@ -107,7 +120,19 @@ def audit_trail(request):
                 'has_next': page_obj.has_next(),
                 'previous_page_number': page_obj.previous_page_number() if page_obj.has_previous() else None,
                 'next_page_number': page_obj.next_page_number() if page_obj.has_next() else None
+            }
+
+        return json_response({
+            'success': True,
+            'filters': {
+                'action': action_filter,
+                'model': model_filter,
+                'user': user_filter,
+                'date_range': date_range,
+                'date_from': date_from_str,
+                'date_to': date_to_str
             },
+            'pagination': pagination,
             'audit_logs': logs_data,
             'available_actions': list(actions),
             'available_models': list(models)